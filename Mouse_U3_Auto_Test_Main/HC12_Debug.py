@@ -1,6 +1,5 @@
-import serial
-import time
 import serial.tools.list_ports
+from serial_line_engine import open_line_engine, any_line
 
 ports = serial.tools.list_ports.comports()
 print("可用的 COM 埠：")
@@ -13,42 +12,39 @@ class HC12Controller:
         初始化HC-12控制器
         port: COM埠 (Windows: 'COM3', Linux/Mac: '/dev/ttyUSB0')
         """
+        self.last_send_time = None
         try:
-            self.ser = serial.Serial(port, baudrate, timeout=1)
+            self.engine = open_line_engine(port, baudrate, timeout=1, init_delay=2)  # 等待HC-12初始化
             print(f"已連接到 {port}")
-            time.sleep(2)  # 等待HC-12初始化
         except Exception as e:
             print(f"連接失敗: {e}")
-            self.ser = None
+            self.engine = None
     
     def send_message(self, message):
         """發送訊息"""
-        if self.ser and self.ser.is_open:
-            self.ser.write(message.encode())
+        if self.engine and self.engine.is_open:
+            self.last_send_time = self.engine.write(message)
             print(f"已發送: {message}")
             return True
         return False
     
     def read_message(self, timeout=5):
         """讀取回復訊息"""
-        if not self.ser or not self.ser.is_open:
+        if not self.engine or not self.engine.is_open:
             return None
         
-        start_time = time.time()
-        while time.time() - start_time < timeout:
-            if self.ser.in_waiting > 0:
-                message = self.ser.readline().decode().strip()
-                print(f"收到回復: {message}")
-                return message
-            time.sleep(0.1)
+        message = self.engine.wait_for_blocking(any_line, timeout=timeout, since=self.last_send_time)
+        if message is not None:
+            print(f"收到回復: {message}")
+            return message
         
         print("等待回復超時")
         return None
     
     def close(self):
         """關閉連線"""
-        if self.ser and self.ser.is_open:
-            self.ser.close()
+        if self.engine and self.engine.is_open:
+            self.engine.close()
             print("連線已關閉")
 
 def main():
@@ -58,7 +54,7 @@ def main():
     # 建立HC-12控制器
     hc12 = HC12Controller(PORT)
     
-    if hc12.ser is None:
+    if hc12.engine is None:
         return
     
     try:
@@ -31,10 +31,12 @@ void loop() {
       digitalWrite(relayPin, LOW);     // 啟動繼電器（滾輪開始轉）
       delay(1500);                     // 緩衝時間
       hc12.println("Test_Start");      // 回傳開始訊號
+      unsigned long startMs = millis();
 
       delay(70000);                    // 滾輪作動 70 秒
       digitalWrite(relayPin, HIGH);    // 關閉繼電器
-      hc12.println("Relay_End");       // optional 通知主機
+      hc12.print("Test_Done:");        // 通知主機測試結束，附上 Arduino 實際計時 (ms)
+      hc12.println(millis() - startMs);  // 主機據此提早截圖並計算與 PC 的時鐘漂移
 
       // ⛔️ 收尾：LED 熄滅
       digitalWrite(ledPin, LOW);
@@ -0,0 +1,184 @@
+# =============================================
+# 🔹 測試機台代理程式 - bench_agent.py
+# 功能：連線到 campaign_coordinator.py，接收指派的工作後以主程式相同的測試引擎（sweep_engine.py）執行，
+#       每站結束即回報站點，截圖完成後回報一筆結果（截圖路徑 + 判讀結果）；機台本身的 config.py（COM Port / 小智 IP）不變
+#   python bench_agent.py --coordinator 192.168.1.10:8765 --name bench-A
+#   python bench_agent.py --coordinator 127.0.0.1:8765 --name bench-B --mode rounds --duts U3-002
+#   python -m simulators --mode agent -- --coordinator 127.0.0.1:8765 --name sim-A   # 模擬器
+# =============================================
+
+import sys
+import socket
+import asyncio
+import argparse
+from campaign_coordinator import MODES, send_message, read_message
+
+# 回報協調器的站點欄位（其餘如 capture_task 為本機物件）
+STATION_FIELDS = ("point", "round", "angle", "dut", "success", "started_at", "total_sec", "timings",
+                  "handshake_attempts", "test_done", "screen_state", "clock_drift_ms", "error")
+
+
+class BenchAgent:
+    """
+    測試機台代理
+    - heartbeat_sec：心跳間隔（實際時間；需小於協調器的 heartbeat_timeout）
+    """
+
+    def __init__(self, name, mode, host, port, duts=(), heartbeat_sec=5, log_func=print):
+        self.name = name
+        self.mode = mode
+        self.host = host
+        self.port = port
+        self.duts = list(duts)
+        self.heartbeat_sec = heartbeat_sec
+        self.log = log_func
+        self.writer = None
+        self.loop = None
+        self.job_task = None
+        self.analysis = {}      # 截圖路徑 → 判讀結果（等截圖完成後與站點合併成一筆 result）
+
+    def send(self, message):
+        if self.writer is not None:
+            send_message(self.writer, message)
+
+    async def connect(self, retries=30, retry_sec=2):
+        """連線協調器（協調器可能稍後才啟動，逐次重試）"""
+        for attempt in range(1, retries + 1):
+            try:
+                reader, self.writer = await asyncio.open_connection(self.host, self.port)
+                break
+            except OSError as e:
+                if attempt == retries:
+                    raise
+                self.log(f"[Agent] ⏳ 無法連線協調器 {self.host}:{self.port}（{e}），{retry_sec} 秒後重試")
+                await asyncio.sleep(retry_sec)
+        self.send({"type": "hello", "bench": self.name, "mode": self.mode, "duts": self.duts})
+        self.log(f"[Agent] 🔗 已連線協調器 {self.host}:{self.port}，機台: {self.name}（{self.mode}）")
+        return reader
+
+    def listener(self, job_id, kind, record):
+        """
+        SweepEngine.run_test_cycle 的回呼：站點結束即送 station；截圖完成後送一筆 result
+        （站點識別 + 截圖路徑 + 判讀結果），每站只回報一次結果
+        """
+        if kind == "result":
+            # 判讀於截圖管線的背景執行緒、截圖完成之前執行：先暫存，由截圖完成的回呼一併送出
+            self.analysis[record.get("screenshot")] = record
+            return
+        self.send({"type": "station", "job": job_id,
+                   "record": {k: record[k] for k in STATION_FIELDS if k in record}})
+        capture_task = record.get("capture_task")
+        if capture_task is not None:
+            # 站點識別以站點紀錄為準（判讀結果的趟次 / DUT 依截圖檔名規則，可能為 None）
+            keys = {k: record.get(k) for k in ("point", "round", "angle", "dut")}
+            capture_task.add_done_callback(lambda task: self.send_result(job_id, keys, task))
+
+    def send_result(self, job_id, keys, task):
+        screenshot = None if task.cancelled() or task.exception() else task.result()
+        analysis = self.analysis.pop(screenshot, None) or {}
+        fields = {k: analysis[k] for k in ("report_rate", "status", "raw_text", "analyze_ms") if k in analysis}
+        self.send({"type": "result", "job": job_id, "record": dict(keys, screenshot=screenshot, **fields)})
+
+    async def run_job(self, engine, job):
+        """執行一筆指派的工作，結束後回報 done"""
+        skip = {tuple(key) for key in job.get("skip", [])}
+        if self.mode == "turntable":
+            extent, desc = {"angles": job["angles"]}, f"角度 {job['angles']}"
+        else:
+            extent, desc = {"rounds": job["rounds"]}, f"{job['rounds']} 趟"
+        self.log(f"[Agent] 📥 工作 #{job['id']}：DUT {job.get('dut') or '-'}，測試點 {job['points']}，{desc}"
+                 f"{f'，略過 {len(skip)} 站' if skip else ''}")
+        engine.campaign_id = None
+        try:
+            status = await engine.run_test_cycle(test_points=job["points"], dut=job.get("dut"), skip=skip,
+                                                listener=lambda kind, record: self.listener(job["id"], kind, record),
+                                                **extent)
+            self.send({"type": "done", "job": job["id"], "status": status or "completed"})
+        except asyncio.CancelledError:
+            if engine.campaign_id is not None:
+                engine.run_index.finish_campaign(engine.campaign_id, "aborted")
+            raise
+        except Exception as e:
+            self.log(f"[Agent] ❌ 工作 #{job['id']} 發生錯誤: {e}")
+            if engine.campaign_id is not None:
+                engine.run_index.finish_campaign(engine.campaign_id, "failed")
+            self.send({"type": "done", "job": job["id"], "status": "failed", "error": str(e)})
+
+    async def heartbeat(self):
+        while True:
+            await asyncio.sleep(self.heartbeat_sec)
+            self.send({"type": "heartbeat"})
+            await self.writer.drain()
+
+    async def run(self, engine):
+        """接收指派直到協調器送出 shutdown 或中斷連線"""
+        self.loop = asyncio.get_running_loop()
+        reader = await self.connect()
+        heartbeat = asyncio.create_task(self.heartbeat())
+        try:
+            while True:
+                message = await read_message(reader)
+                if message is None:
+                    self.log("[Agent] 🔌 協調器中斷連線")
+                    break
+                kind = message.get("type")
+                if kind == "assign":
+                    if self.job_task is not None and not self.job_task.done():
+                        self.log("[Agent] ⚠️ 已有工作執行中，忽略新的指派")
+                        continue
+                    self.job_task = asyncio.create_task(self.run_job(engine, message["job"]))
+                elif kind == "shutdown":
+                    self.log("[Agent] 🏁 協調器通知所有工作已完成")
+                    break
+                elif kind == "error":
+                    self.log(f"[Agent] ❌ 協調器拒絕: {message.get('message')}")
+                    break
+        finally:
+            heartbeat.cancel()
+            if self.job_task is not None and not self.job_task.done():
+                # 協調器已不在：中止目前工作（已完成的站點仍寫入本機 RunIndex），小智返航
+                self.job_task.cancel()
+                await asyncio.gather(self.job_task, return_exceptions=True)
+                await engine.client.send_return()
+                self.log("[Agent] 🛑 已中止目前工作，小智返回原點")
+            self.writer.close()
+
+
+def parse_address(text):
+    host, _, port = text.rpartition(":")
+    return host or "127.0.0.1", int(port)
+
+
+async def run_agent(args):
+    # 建立引擎時即初始化 LOG / 輪盤，HC-12 於第一筆工作開啟，與直接執行主程式相同
+    from sweep_engine import create_engine
+    from config import WS_IP, WS_PORT
+    engine = create_engine(args.mode)
+    log = engine.log
+    host, port = parse_address(args.coordinator)
+    agent = BenchAgent(args.name, args.mode, host, port, duts=args.duts.split(",") if args.duts else (),
+                       heartbeat_sec=args.heartbeat, log_func=log)
+    try:
+        await engine.connect(WS_IP, WS_PORT)
+        log("🔗 已連接到小智")
+        await agent.run(engine)
+    finally:
+        await engine.close()
+        engine.log_file.flush()
+        engine.log_file.close()
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description="U3 測試機台代理（連線 campaign_coordinator.py）")
+    parser.add_argument("--coordinator", default="127.0.0.1:8765", help="協調器位址 host:port")
+    parser.add_argument("--name", default=socket.gethostname(), help="機台名稱（預設電腦名稱）")
+    parser.add_argument("--mode", choices=MODES, default="turntable", help="本機台執行的主程式")
+    parser.add_argument("--duts", help="本機台上的 DUT（逗號分隔；未指定 = 任何 DUT 的工作都接）")
+    parser.add_argument("--heartbeat", type=float, default=5, help="心跳間隔秒數")
+    args = parser.parse_args(argv)
+    asyncio.run(run_agent(args))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
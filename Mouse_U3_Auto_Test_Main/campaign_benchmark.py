@@ -0,0 +1,231 @@
+# =============================================
+# 🔹 測試流程基準測試 - campaign_benchmark.py
+# 功能：以模擬裝置（simulators）執行標準測試組合，統計每站各階段耗時
+#       （行駛 / 回穩 / HC-12 / 測試 / 截圖 / 補足）的百分位數，
+#       並計算「流程額外耗時」= 站點總耗時 − 模擬硬體本身所需時間
+#       可存成基準檔，之後超出容許範圍即回傳失敗（exit code 1）
+#   python campaign_benchmark.py                       # 執行全部組合並與基準比較
+#   python campaign_benchmark.py rounds turntable      # 只執行指定組合
+#   python campaign_benchmark.py --save-baseline       # 更新基準檔
+# =============================================
+
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import datetime
+import tempfile
+
+from clock_util import Clock, set_clock, get_clock
+from stats_util import summarize
+from route_planner import point_position
+from simulators import FakeRobotServer, FakeHC12, FakeTurntable, install_fake_gui
+from simulators.fake_gui import PRIMAX_TITLE
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_BASELINE = os.path.join(BASE_DIR, "benchmark_baseline.json")
+
+# 標準測試組合：以測試計畫（campaign_plan）描述，經 compile_plan 展開後交給主程式相同的 SweepEngine 執行
+SHAPES = {
+    "rounds":    {"mode": "rounds", "points": "1-10", "rounds": 2},
+    "turntable": {"mode": "turntable", "points": "1-10", "angles": [0, 45, 90, -45, -90]},
+    "sweep50":   {"mode": "rounds", "points": "1-10", "rounds": 5},
+    "sweep100":  {"mode": "rounds", "points": "1-10", "rounds": 10},
+}
+
+PHASES = ["travel", "settle", "prerequisite", "handshake", "test", "capture", "padding", "total", "overhead"]
+
+
+def build_plan(name, shape, args, hc12_port):
+    """測試組合 → 已編譯的測試計畫（時間設定依命令列參數，DUT 指向模擬 HC-12）"""
+    from campaign_plan import compile_plan
+    test_sec = args.test_duration if args.fixed_test else min(min(args.test_duration, 70) + args.test_done_grace,
+                                                              args.test_duration)
+    spec = dict(shape, name=f"基準測試 {name}", dut="BENCH",
+                dut_slots=[{"name": "BENCH", "com_port": hc12_port, "window_title": PRIMAX_TITLE}],
+                timing={"test_duration": args.test_duration, "settle_sec": args.settle_sec,
+                        "min_dwell_sec": args.min_dwell_sec, "wait_test_done": not args.fixed_test,
+                        "test_done_grace_sec": args.test_done_grace},
+                estimate={"travel_base_sec": args.travel_base, "travel_sec_per_meter": args.travel_per_meter,
+                          "handshake_sec": args.hc12_delay, "test_sec": test_sec, "deg_per_sec": args.deg_per_sec})
+    return compile_plan(spec), test_sec
+
+
+async def run_shape(name, shape, args, work_dir, log_func):
+    """以新的模擬裝置與 SweepEngine 執行一個測試組合，回傳 (每站紀錄列表, 流程秒數, 實際秒數)"""
+    # 主程式模組在匯入時即載入 pyautogui，須先換成模擬 GUI；LOG / 測試紀錄 / 截圖寫入暫存資料夾
+    os.environ.update({"U3_LOG_DIR": os.path.join(work_dir, name, "LOG"),
+                       "U3_RESULT_DIR": os.path.join(work_dir, name, "Result_Screen_Shot"),
+                       "U3_HC12_STATS": os.path.join(work_dir, name, "LOG", "hc12_stats.json")})
+    from sweep_engine import SweepEngine, RobotAxis, DutAxis, TurntableAxis, TEST_TYPES
+    from turntable_controller import TurntableController
+    from log_util import init_log
+
+    clock = get_clock()
+    server = FakeRobotServer(port=0, base_sec=args.travel_base, sec_per_meter=args.travel_per_meter, log_func=log_func)
+    server.start_in_thread()
+    hc12_device = FakeHC12(reply_delay=args.hc12_delay, jitter=0, relay_sec=min(args.test_duration, 70),
+                           seed=0, log_func=log_func).start()
+    turntable_device = FakeTurntable(deg_per_sec=args.deg_per_sec, log_func=log_func).start()
+
+    plan, test_sec = build_plan(name, shape, args, hc12_device.port)
+    log_file, log_print = init_log(TEST_TYPES[plan.mode], BASE_DIR, console=args.verbose)
+    axes = []
+    if plan.mode == "turntable":
+        controller = TurntableController(turntable_device.port, log_func=log_print, wrap_limit=plan.spec["wrap_limit"])
+        axes.append(TurntableAxis(controller, log_func=log_print))
+    engine = SweepEngine(plan.mode, log_file, log_print, RobotAxis(log_func=log_print), DutAxis(log_func=log_print),
+                         axes)
+
+    records = []
+    position = 0
+
+    def on_event(kind, record):
+        nonlocal position
+        if kind != "station":
+            return
+        records.append(record)
+        # 模擬硬體本身所需時間：行駛 + 回穩 + 輪盤 + HC-12 回覆 + 測試 + 補足
+        timings = record["timings"]
+        target = point_position(record["point"])
+        record["expected"] = (server.travel_sec(position, target) + args.settle_sec
+                              + timings.get("prerequisite", 0) + args.hc12_delay + test_sec
+                              + timings.get("padding", 0))
+        position = target
+        task = record.get("capture_task")
+        if task is not None:  # 截圖於背景完成後才有耗時
+            started = record["capture_started"]
+            task.add_done_callback(lambda _: timings.__setitem__("capture", clock.time() - started))
+
+    real_start = time.perf_counter()
+    campaign_start = clock.time()
+    try:
+        await engine.connect(server.host, server.port)
+        await engine.run_test_cycle(plan=plan, listener=on_event)
+    finally:
+        await engine.close()
+        log_file.close()
+        server.stop()
+        hc12_device.close()
+        turntable_device.close()
+    return records, clock.time() - campaign_start, time.perf_counter() - real_start
+
+
+def analyze(records):
+    """每站紀錄 → 各階段統計（秒，已換算為實際測試時間）"""
+    values = {phase: [] for phase in PHASES}
+    for record in records:
+        if not record.get("success"):
+            continue
+        timings = record["timings"]
+        for phase in PHASES[:-2]:
+            if phase in timings:
+                values[phase].append(timings[phase])
+        values["total"].append(record["total_sec"])
+        values["overhead"].append(max(record["total_sec"] - record["expected"], 0))
+    return {phase: summarize(v) for phase, v in values.items() if v}
+
+
+def print_report(name, report):
+    print(f"\n📊 {name}: {report['stations']} 站 (成功 {report['succeeded']})，"
+          f"總計 {report['campaign_sec'] / 60:.1f} 分鐘（實際執行 {report['real_sec']:.1f} 秒，x{report['time_scale']:g}）")
+    print(f"   {'階段':<12}{'mean':>9}{'p50':>9}{'p90':>9}{'p99':>9}{'max':>9}")
+    for phase in PHASES:
+        stats = report["phases"].get(phase)
+        if stats:
+            print(f"   {phase:<12}" + "".join(f"{stats[k]:>9.2f}" for k in ("mean", "p50", "p90", "p99", "max")))
+
+
+def check_regression(name, report, baseline, tolerance_sec, tolerance_pct):
+    """比較每站流程額外耗時（p50 / p90），回傳錯誤訊息列表"""
+    failures = []
+    base = baseline.get("shapes", {}).get(name)
+    if not base or "overhead" not in base["phases"] or "overhead" not in report["phases"]:
+        print(f"   ℹ️ {name} 無基準資料，略過比較")
+        return failures
+    for key in ("p50", "p90"):
+        current = report["phases"]["overhead"][key]
+        reference = base["phases"]["overhead"][key]
+        limit = reference * (1 + tolerance_pct / 100) + tolerance_sec
+        mark = "✅" if current <= limit else "❌"
+        print(f"   {mark} overhead {key}: {current:.2f} 秒 (基準 {reference:.2f}，上限 {limit:.2f})")
+        if current > limit:
+            failures.append(f"{name} overhead {key} {current:.2f} > {limit:.2f}")
+    return failures
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description="U3 測試流程基準測試（模擬裝置）")
+    parser.add_argument("shapes", nargs="*", help=f"測試組合：{' / '.join(SHAPES)}（預設全部）")
+    parser.add_argument("--time-scale", type=float, default=200, help="時間倍率（基準檔需使用相同倍率）")
+    parser.add_argument("--test-duration", type=float, default=80)
+    parser.add_argument("--fixed-test", action="store_true", help="不等待 Test_Done，固定測試時間（舊流程）")
+    parser.add_argument("--test-done-grace", type=float, default=2)
+    parser.add_argument("--settle-sec", type=float, default=3)
+    parser.add_argument("--min-dwell-sec", type=float, default=0)
+    parser.add_argument("--travel-base", type=float, default=2.0)
+    parser.add_argument("--travel-per-meter", type=float, default=1.5)
+    parser.add_argument("--hc12-delay", type=float, default=2.7)
+    parser.add_argument("--deg-per-sec", type=float, default=18)
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="基準檔路徑")
+    parser.add_argument("--save-baseline", action="store_true", help="將本次結果存為基準")
+    parser.add_argument("--tolerance-sec", type=float, default=0.5, help="每站額外耗時容許增加秒數")
+    parser.add_argument("--tolerance-pct", type=float, default=20, help="每站額外耗時容許增加比例 (%%)")
+    parser.add_argument("--json", help="另存完整結果 JSON")
+    parser.add_argument("--verbose", action="store_true", help="顯示流程 LOG")
+    args = parser.parse_args(argv)
+    unknown = [name for name in args.shapes if name not in SHAPES]
+    if unknown:
+        parser.error(f"未知的測試組合: {', '.join(unknown)}")
+
+    log_func = print if args.verbose else (lambda msg, *a, **k: None)
+    install_fake_gui(force=True, log_func=log_func)  # 一律使用模擬 GUI，避免在實機桌面上按鍵 / 截圖
+    set_clock(Clock(args.time_scale))
+
+    results = {"created_at": datetime.datetime.now().isoformat(timespec="seconds"),
+               "time_scale": args.time_scale, "test_duration": args.test_duration,
+               "fixed_test": args.fixed_test, "shapes": {}}
+    with tempfile.TemporaryDirectory(prefix="u3_bench_") as work_dir:
+        for name in args.shapes or list(SHAPES):
+            records, campaign_sec, real_sec = asyncio.run(run_shape(name, SHAPES[name], args, work_dir, log_func))
+            report = {"stations": len(records), "succeeded": sum(1 for r in records if r.get("success")),
+                      "campaign_sec": campaign_sec, "real_sec": real_sec, "time_scale": args.time_scale,
+                      "phases": analyze(records)}
+            results["shapes"][name] = report
+            print_report(name, report)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f"\n💾 已儲存基準: {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"\nℹ️ 尚無基準檔 ({args.baseline})，可加上 --save-baseline 建立")
+        return 0
+    with open(args.baseline, encoding="utf-8") as f:
+        baseline = json.load(f)
+    if (baseline.get("time_scale") != args.time_scale or baseline.get("test_duration") != args.test_duration
+            or baseline.get("fixed_test", True) != args.fixed_test):
+        print(f"\n❌ 基準檔條件不同 (x{baseline.get('time_scale')}, 測試 {baseline.get('test_duration')} 秒)，無法比較")
+        return 2
+
+    print("\n🔍 與基準比較")
+    failures = []
+    for name, report in results["shapes"].items():
+        failures += check_regression(name, report, baseline, args.tolerance_sec, args.tolerance_pct)
+    if failures:
+        print("\n❌ 流程額外耗時超出容許範圍:\n   " + "\n   ".join(failures))
+        return 1
+    print("\n✅ 未超出基準容許範圍")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,154 @@
+# =============================================
+# 🔹 測試中斷續跑 - campaign_checkpoint.py
+# 功能：每站完成後把進度（趟次 / 角度、測試點、截圖路徑、輪盤位置）寫入小型 JSON 檔，
+#       主程式中途發生錯誤（WebSocket 斷線、串口錯誤、Primax 當掉）後，
+#       以 --resume 略過已成功的站點（失敗 / 跳過的站點重新測試）、還原輪盤位置，並沿用同一筆測試紀錄繼續
+# =============================================
+
+import os
+import json
+import datetime
+from log_util import default_log_dir
+from campaign_keys import station_key, completed_keys
+
+
+def default_checkpoint_path(test_type):
+    """../LOG/<測試類型>_checkpoint.json（每種測試一份，測試完成後自動刪除）"""
+    return os.path.join(default_log_dir(), f"{test_type}_checkpoint.json")
+
+
+def _now():
+    return datetime.datetime.now().isoformat(timespec="seconds")
+
+
+class CampaignCheckpoint:
+    """
+    測試進度檢查點
+    - mode："rounds" 或 "turntable"（站點皆以 (趟次, 角度, 測試點) 識別）
+    - resume：True = 依檔案續跑；False = 重新開始（舊檔覆寫）
+    """
+
+    def __init__(self, path, mode, resume=False, log_func=print):
+        self.path = path
+        self.mode = mode
+        self.resume = resume
+        self.log = log_func
+        self.state = None
+
+    def _read(self):
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            self.log(f"[Resume] ⚠️ 無法讀取檢查點 {self.path}: {e}")
+            return None
+
+    def open(self, config):
+        """
+        測試開始時呼叫：續跑且檢查點與本次設定相符時載入並回傳 True，否則回傳 False（由 begin 重新建立）
+        config：測試點 / 趟數或角度 / 路徑等設定，不同時不可續跑（站點識別會對不上）
+        """
+        data = self._read()
+        if not self.resume:
+            if data and data.get("stations"):
+                self.log(f"[Resume] ⚠️ 發現未完成的測試紀錄 #{data.get('campaign_id')}"
+                         f"（已完成 {len(completed_keys(data['stations']))} 站），本次重新開始；續跑請加 --resume")
+            return False
+        if data is None:
+            self.log("[Resume] ⚠️ 找不到檢查點，從頭開始測試")
+            return False
+        config = json.loads(json.dumps(config))
+        if data.get("mode") != self.mode or data.get("config") != config:
+            self.log(f"[Resume] ❌ 檢查點設定與目前 config 不同，無法續跑（檢查點: {data.get('config')}）")
+            return False
+        data["resumes"] = data.get("resumes", 0) + 1
+        self.state = data
+        self.save()
+        position = f"，輪盤位置 {data.get('turntable_position', 0)}°" if self.mode == "turntable" else ""
+        done = completed_keys(data["stations"])
+        failed = {station_key(record) for record in data["stations"]} - done
+        retry = f"，{len(failed)} 站失敗將重新測試" if failed else ""
+        self.log(f"[Resume] ♻️ 續跑測試紀錄 #{data['campaign_id']}：已完成 {len(done)} 站{retry}，"
+                 f"第 {data['resumes']} 次續跑{position}")
+        return True
+
+    def begin(self, campaign_id, config):
+        self.state = {"campaign_id": campaign_id, "mode": self.mode, "config": json.loads(json.dumps(config)),
+                      "started_at": _now(), "updated_at": None, "resumes": 0,
+                      "turntable_position": 0, "rotating": None, "stations": []}
+        self.save()
+
+    @property
+    def campaign_id(self):
+        return self.state["campaign_id"]
+
+    @property
+    def resumes(self):
+        return self.state.get("resumes", 0)
+
+    def turntable_position(self):
+        """續跑時輪盤的實際位置；上次中斷於旋轉途中時以起點為準並提出警告"""
+        rotating = self.state.get("rotating")
+        if rotating:
+            self.log(f"[Resume] ⚠️ 上次中斷於輪盤旋轉中（{rotating['from']}° → {rotating['to']}°），"
+                     f"位置無法確認，以 {rotating['from']}° 繼續；請確認輪盤實際角度")
+            return rotating["from"]
+        return self.state.get("turntable_position", 0)
+
+    def done_keys(self):
+        """續跑時略過的站點：只含成功的站點，失敗 / 跳過的站點重新測試（見 completed_keys）"""
+        return completed_keys(self.state["stations"])
+
+    def begin_rotation(self, start, target):
+        self.state["rotating"] = {"from": start, "to": target}
+        self.save()
+
+    def set_turntable(self, position):
+        self.state["turntable_position"] = position
+        self.state["rotating"] = None
+        self.save()
+
+    def record(self, record, turntable_position=None):
+        """記錄一個已完成的站點，回傳此筆紀錄（截圖完成後補上路徑）"""
+        entry = {k: record.get(k) for k in ("round", "angle", "point", "dut", "success")}
+        entry.update(screenshot=None, turntable_position=turntable_position, completed_at=_now())
+        self.state["stations"].append(entry)
+        self.save()
+        return entry
+
+    def station_listener(self, turntable_position=None):
+        """給 StationScheduler.add_listener 使用（turntable_position：回傳目前輪盤位置的函式）"""
+        def on_station(station):
+            entry = self.record(station, turntable_position() if turntable_position else None)
+            capture_task = station.get("capture_task")
+            if capture_task is not None:
+                def on_capture(task):
+                    if not task.cancelled() and task.exception() is None:
+                        entry["screenshot"] = task.result()
+                        self.save()
+                capture_task.add_done_callback(on_capture)
+        return on_station
+
+    def save(self):
+        """先寫暫存檔再取代，避免中斷時留下不完整的檢查點"""
+        if self.state is None:
+            return
+        self.state["updated_at"] = _now()
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp = self.path + ".tmp"
+        try:
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(self.state, f, ensure_ascii=False, indent=1)
+            os.replace(tmp, self.path)
+        except OSError as e:
+            self.log(f"[Resume] ⚠️ 檢查點寫入失敗: {e}")
+
+    def finish(self):
+        """測試完整結束：刪除檢查點"""
+        self.state = None
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
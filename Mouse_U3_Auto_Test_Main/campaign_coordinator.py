@@ -0,0 +1,386 @@
+# =============================================
+# 🔹 多機台測試協調器 - campaign_coordinator.py
+# 功能：把測試佇列（DUT × 測試點 × 角度 / 趟數）分配給多台測試機台（bench_agent.py），
+#       即時接收每站進度與判讀結果；機台離線或逾時未回報時，將未完成的站點重新指派給其他機台
+#   python campaign_coordinator.py queue.json                      # 依佇列檔分配
+#   python campaign_coordinator.py --duts U3-001,U3-002 --split angle -o report.json
+#
+# 通訊協定：TCP，每行一個 JSON 訊息（UTF-8）
+#   機台 → 協調器：hello {bench, mode, duts} / heartbeat / station {job, record} / result {job, record}
+#                  / done {job, status, error}
+#   result 為每站截圖完成後一筆（截圖路徑 + 判讀結果）；同一站點重複回報時依 (站點, DUT) 合併
+#   協調器 → 機台：assign {job: {id, mode, dut, points, angles | rounds, skip}} / shutdown / error {message}
+#   skip 為該工作已成功的站點 [[趟次, 角度, 測試點名稱], ...]，重新指派時由機台略過（失敗的站點重新測試）
+# =============================================
+
+import os
+import sys
+import json
+import asyncio
+import argparse
+import collections
+from campaign_keys import station_key, completed_keys
+
+MODES = ("rounds", "turntable")
+
+
+# === 通訊協定 ===
+def send_message(writer, message):
+    """寫入一行 JSON（不等待送出；連線已關閉時略過）"""
+    if writer.is_closing():
+        return False
+    writer.write((json.dumps(message, ensure_ascii=False, default=str) + "\n").encode("utf-8"))
+    return True
+
+
+async def read_message(reader):
+    """讀取一行 JSON，連線結束回傳 None；格式錯誤回傳 {"type": "invalid"}"""
+    line = await reader.readline()
+    if not line:
+        return None
+    try:
+        message = json.loads(line)
+    except json.JSONDecodeError:
+        return {"type": "invalid", "raw": line[:200].decode("utf-8", errors="replace")}
+    return message if isinstance(message, dict) else {"type": "invalid", "raw": str(message)[:200]}
+
+
+# === 測試佇列 ===
+def load_queue(path):
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    return data["jobs"] if isinstance(data, dict) else data
+
+
+def expand_queue(specs, split=None):
+    """
+    檢查佇列並補上 config 預設值，回傳工作列表
+    每筆：{"mode": "turntable" | "rounds", "dut": 名稱, "points": [1, 2, ...], "angles": [...] | "rounds": N}
+    split="angle"：輪盤工作拆成每個角度一筆，讓多台機台分攤同一型號的測試
+    """
+    from config import TEST_POINT_RANGE, TEST_ROUNDS, TURNTABLE_ANGLES
+    jobs = []
+    for index, spec in enumerate(specs, 1):
+        mode = spec.get("mode", "turntable")
+        if mode not in MODES:
+            raise ValueError(f"第 {index} 筆工作的 mode 必須是 {' / '.join(MODES)}: {mode}")
+        points = list(spec.get("points") or TEST_POINT_RANGE)
+        if not all(isinstance(p, int) for p in points):
+            raise ValueError(f"第 {index} 筆工作的 points 必須是測試點編號（整數）: {points}")
+        job = {"mode": mode, "dut": spec.get("dut"), "points": points}
+        if mode == "turntable":
+            angles = list(spec.get("angles") or TURNTABLE_ANGLES)
+            if split == "angle":
+                jobs += [dict(job, angles=[angle]) for angle in angles]
+                continue
+            job["angles"] = angles
+        else:
+            job["rounds"] = int(spec.get("rounds") or TEST_ROUNDS)
+        jobs.append(job)
+    return jobs
+
+
+class Job:
+    """一筆測試工作與其進度（已完成站點、判讀結果、指派紀錄）"""
+
+    def __init__(self, job_id, spec):
+        self.id = job_id
+        self.spec = spec
+        self.mode = spec["mode"]
+        self.status = "queued"   # queued / running / completed / failed
+        self.attempts = 0
+        self.bench = None
+        self.done = {}           # (station_key, dut) → 最後一筆站點紀錄
+        self.results = {}        # (station_key, dut) → 截圖 / 判讀結果（重新測試時更新）
+        self.history = []        # [(機台, 結果)]
+
+    @property
+    def total(self):
+        return len(self.spec["points"]) * (len(self.spec["angles"]) if self.mode == "turntable" else self.spec["rounds"])
+
+    @property
+    def label(self):
+        return f"#{self.id} {self.spec.get('dut') or '-'} {self.mode}"
+
+    @property
+    def reported(self):
+        """已回報的站點（含失敗）"""
+        return {key for key, _ in self.done}
+
+    @property
+    def completed(self):
+        return completed_keys(self.done.values())
+
+    def assignment(self):
+        return dict(self.spec, id=self.id, skip=[list(key) for key in self.completed])
+
+    def summary(self):
+        return {"id": self.id, **self.spec, "status": self.status, "attempts": self.attempts,
+                "history": self.history, "stations": self.total, "done": len(self.reported),
+                "succeeded": len(self.completed),
+                "records": list(self.done.values()), "results": list(self.results.values())}
+
+
+class Bench:
+    """已連線的測試機台"""
+
+    def __init__(self, name, mode, duts, writer, now):
+        self.name = name
+        self.mode = mode
+        self.duts = set(duts or [])  # 空 = 任何 DUT 都可測
+        self.writer = writer
+        self.last_seen = now
+        self.job = None
+
+    def accepts(self, job):
+        return job.mode == self.mode and (not self.duts or job.spec.get("dut") in self.duts)
+
+
+class CampaignCoordinator:
+    """
+    測試協調器
+    - heartbeat_timeout：機台超過此秒數沒有任何訊息即視為離線（實際時間，不受 U3_TIME_SCALE 影響）
+    - max_attempts：同一工作最多指派次數（機台離線 / 回報失敗都算一次）
+    """
+
+    def __init__(self, specs, host="127.0.0.1", port=8765, heartbeat_timeout=30, max_attempts=3, log_func=print):
+        self.jobs = [Job(index, spec) for index, spec in enumerate(specs, 1)]
+        self.jobs_by_id = {job.id: job for job in self.jobs}
+        self.queue = collections.deque(self.jobs)
+        self.host = host
+        self.port = port
+        self.heartbeat_timeout = heartbeat_timeout
+        self.max_attempts = max_attempts
+        self.log = log_func
+        self.benches = {}
+        self.handlers = set()  # 每個連線的處理 task（結束時等待全部收尾）
+        self.finished = None
+
+    def _now(self):
+        return asyncio.get_running_loop().time()
+
+    async def run(self):
+        """啟動服務直到所有工作完成 / 失敗，回傳報告"""
+        self.finished = asyncio.Event()
+        server = await asyncio.start_server(self.handle_bench, self.host, self.port)
+        self.port = server.sockets[0].getsockname()[1]
+        self.log(f"[Coordinator] 🌐 等待機台連線 {self.host}:{self.port}，共 {len(self.jobs)} 筆工作 "
+                 f"({sum(job.total for job in self.jobs)} 站)")
+        self._check_finished()
+        monitor = asyncio.create_task(self.monitor())
+        try:
+            await self.finished.wait()
+        finally:
+            monitor.cancel()
+            server.close()
+            for bench in list(self.benches.values()):
+                send_message(bench.writer, {"type": "shutdown"})
+                bench.writer.close()
+            if self.handlers:
+                await asyncio.wait(self.handlers, timeout=5)
+            await server.wait_closed()
+        self.log_summary()
+        return self.report()
+
+    async def handle_bench(self, reader, writer):
+        peer = writer.get_extra_info("peername")
+        task = asyncio.current_task()
+        self.handlers.add(task)
+        task.add_done_callback(self.handlers.discard)
+        bench = None
+        reason = "連線中斷"
+        try:
+            hello = await asyncio.wait_for(read_message(reader), self.heartbeat_timeout)
+            if not hello or hello.get("type") != "hello" or hello.get("mode") not in MODES:
+                self.log(f"[Coordinator] ⚠️ {peer} 未送出有效的 hello，中斷連線")
+                return
+            name = hello.get("bench") or f"{peer[0]}:{peer[1]}"
+            if name in self.benches:
+                send_message(writer, {"type": "error", "message": f"機台名稱重複: {name}"})
+                self.log(f"[Coordinator] ⚠️ 機台名稱重複: {name}")
+                return
+            bench = Bench(name, hello["mode"], hello.get("duts"), writer, self._now())
+            self.benches[name] = bench
+            self.log(f"[Coordinator] 🔗 機台 {name} 已連線（{bench.mode}"
+                     f"{'，DUT: ' + ', '.join(sorted(bench.duts)) if bench.duts else ''}）")
+            self.dispatch()
+
+            while True:
+                message = await read_message(reader)
+                if message is None:
+                    break
+                bench.last_seen = self._now()
+                self.on_message(bench, message)
+        except asyncio.TimeoutError:
+            self.log(f"[Coordinator] ⚠️ {peer} 等待 hello 逾時")
+        except (ConnectionError, OSError) as e:
+            reason = f"連線錯誤: {e}"
+        finally:
+            if bench is not None:
+                self.drop(bench, reason)
+            writer.close()
+
+    def on_message(self, bench, message):
+        kind = message.get("type")
+        job = self.jobs_by_id.get(message.get("job"))
+        if kind == "heartbeat":
+            return
+        if kind in ("station", "result", "done") and job is None:
+            self.log(f"[Coordinator] ⚠️ {bench.name} 回報未知工作: {message.get('job')}")
+            return
+
+        if kind == "station":
+            record = dict(message.get("record") or {}, bench=bench.name)
+            job.done[(station_key(record), record.get("dut"))] = record
+            where = f"{record.get('angle')}°" if job.mode == "turntable" else f"第{record.get('round')}趟"
+            self.log(f"[Coordinator] 📍 {bench.name} {job.label} {where} {record.get('point')} "
+                     f"{'✅' if record.get('success') else '❌'} ({len(job.reported)}/{job.total})")
+        elif kind == "result":
+            record = dict(message.get("record") or {}, bench=bench.name)
+            key = (station_key(record), record.get("dut"))
+            job.results[key] = dict(job.results.get(key, {}), **record)
+            if "report_rate" in record:
+                self.log(f"[Coordinator] 📊 {bench.name} {job.label} {record.get('point')}: "
+                         f"ReportRate={record.get('report_rate')} ({record.get('status')})")
+        elif kind == "done":
+            if bench.job is not job:
+                self.log(f"[Coordinator] ⚠️ {bench.name} 回報已重新指派的工作 {job.label}，忽略")
+                return
+            bench.job = None
+            status = message.get("status")
+            job.history.append((bench.name, status))
+            if status == "completed":
+                job.status = "completed"
+                job.bench = None
+                self.log(f"[Coordinator] ✅ {bench.name} 完成 {job.label} ({len(job.reported)}/{job.total} 站)")
+            else:
+                self.log(f"[Coordinator] ❌ {bench.name} 工作失敗 {job.label}: {message.get('error') or status}")
+                self.requeue(job)
+            self._check_finished()
+            self.dispatch()
+        elif kind == "invalid":
+            self.log(f"[Coordinator] ⚠️ {bench.name} 無法解析的訊息: {message.get('raw')}")
+        else:
+            self.log(f"[Coordinator] ⚠️ {bench.name} 未知訊息類型: {kind}")
+
+    def requeue(self, job):
+        """放回佇列最前面（保留已成功的站點，失敗的站點重新測試）；超過指派次數則判定失敗"""
+        job.bench = None
+        if len(job.completed) >= job.total:
+            job.status = "completed"  # 所有站點皆已成功，只差 done 訊息
+            self.log(f"[Coordinator] ✅ {job.label} 所有站點已成功回報，視為完成")
+            return
+        if job.attempts >= self.max_attempts:
+            job.status = "failed"
+            self.log(f"[Coordinator] ❌ {job.label} 已指派 {job.attempts} 次，放棄（成功 {len(job.completed)}/{job.total} 站）")
+            return
+        job.status = "queued"
+        self.queue.appendleft(job)
+        self.log(f"[Coordinator] ♻️ {job.label} 重新排入佇列，剩餘 {job.total - len(job.completed)} 站")
+
+    def drop(self, bench, reason):
+        """機台離線：移除並重新指派其工作"""
+        if self.benches.get(bench.name) is not bench:
+            return
+        del self.benches[bench.name]
+        bench.writer.close()
+        self.log(f"[Coordinator] 🔌 機台 {bench.name} 離線（{reason}）")
+        job, bench.job = bench.job, None
+        if job is not None:
+            job.history.append((bench.name, "dropped"))
+            self.requeue(job)
+            self._check_finished()
+        self.dispatch()
+
+    def dispatch(self):
+        """把佇列中的工作指派給閒置且可測試該工作的機台"""
+        for bench in list(self.benches.values()):
+            if bench.job is not None:
+                continue
+            job = next((job for job in self.queue if bench.accepts(job)), None)
+            if job is None:
+                continue
+            self.queue.remove(job)
+            job.attempts += 1
+            job.status = "running"
+            job.bench = bench.name
+            bench.job = job
+            send_message(bench.writer, {"type": "assign", "job": job.assignment()})
+            resumed = f"，略過已完成 {len(job.completed)} 站" if job.completed else ""
+            self.log(f"[Coordinator] 📤 指派 {job.label} → {bench.name}（第 {job.attempts} 次{resumed}）")
+
+    async def monitor(self):
+        """定期檢查心跳，逾時的機台視為離線"""
+        while True:
+            await asyncio.sleep(max(self.heartbeat_timeout / 3, 0.5))
+            self.check_heartbeats()
+
+    def check_heartbeats(self):
+        now = self._now()
+        for bench in list(self.benches.values()):
+            if now - bench.last_seen > self.heartbeat_timeout:
+                self.drop(bench, f"{self.heartbeat_timeout:g} 秒未回報")
+
+    def _check_finished(self):
+        if self.finished is not None and all(job.status in ("completed", "failed") for job in self.jobs):
+            self.finished.set()
+
+    def report(self):
+        return {"jobs": [job.summary() for job in self.jobs]}
+
+    def log_summary(self):
+        self.log("[Coordinator] 📋 工作摘要:")
+        for job in self.jobs:
+            summary = job.summary()
+            benches = " → ".join(f"{name}({status})" for name, status in job.history) or "-"
+            self.log(f"  {job.label}: {job.status}，{summary['succeeded']}/{summary['done']}/{job.total} "
+                     f"(成功/完成/全部)，機台: {benches}")
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description="U3 多機台測試協調器")
+    parser.add_argument("queue", nargs="?", help="測試佇列 JSON（工作列表）")
+    parser.add_argument("--duts", help="未指定佇列檔時：以逗號分隔的 DUT 名稱，每個 DUT 一筆 config 預設的完整測試")
+    parser.add_argument("--mode", choices=MODES, default="turntable", help="--duts 建立的工作類型")
+    parser.add_argument("--split", choices=["angle"], help="輪盤工作拆成每個角度一筆")
+    parser.add_argument("--host", default="127.0.0.1", help="監聽位址（多台電腦時設 0.0.0.0）")
+    parser.add_argument("--port", type=int, default=8765, help="監聽埠號（0 = 自動選擇）")
+    parser.add_argument("--heartbeat-timeout", type=float, default=30, help="機台離線判定秒數")
+    parser.add_argument("--max-attempts", type=int, default=3, help="同一工作最多指派次數")
+    parser.add_argument("-o", "--output", help="輸出工作報告 JSON")
+    args = parser.parse_args(argv)
+
+    if args.queue:
+        specs = load_queue(args.queue)
+    elif args.duts:
+        specs = [{"mode": args.mode, "dut": dut.strip()} for dut in args.duts.split(",") if dut.strip()]
+    else:
+        parser.error("請指定佇列檔或 --duts")
+    try:
+        jobs = expand_queue(specs, args.split)
+    except (ValueError, KeyError) as e:
+        print(f"❌ 佇列格式錯誤: {e}", file=sys.stderr)
+        return 1
+
+    from log_util import init_log
+    base_path = os.path.dirname(os.path.abspath(__file__))
+    log_file, log_print = init_log("Coordinator", base_path)
+    coordinator = CampaignCoordinator(jobs, host=args.host, port=args.port, heartbeat_timeout=args.heartbeat_timeout,
+                                      max_attempts=args.max_attempts, log_func=log_print)
+    try:
+        report = asyncio.run(coordinator.run())
+    except KeyboardInterrupt:
+        log_print("[Coordinator] 🛑 中斷")
+        report = coordinator.report()
+    finally:
+        log_file.flush()
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        log_print(f"[Coordinator] 📝 報告已輸出: {args.output}")
+    log_file.close()
+    return 0 if all(job["status"] == "completed" for job in report["jobs"]) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
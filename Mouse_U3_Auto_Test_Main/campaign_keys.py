@@ -0,0 +1,22 @@
+# =============================================
+# 🔹 站點識別 - campaign_keys.py
+# 功能：檢查點（campaign_checkpoint.py）與協調器（campaign_coordinator.py）共用的站點識別，
+#       以及「已成功完成的站點」判定（續跑 / 重新指派時略過）
+# =============================================
+
+
+def station_key(record):
+    """站點識別：(趟次, 角度, 測試點)（與 ExecutionPlan.key 相同；多趟版角度為 None）"""
+    return (record.get("round"), record.get("angle"), record.get("point"))
+
+
+def completed_keys(records):
+    """
+    已成功完成的站點（續跑 / 重新指派時略過）：同一站點與裝置以最後一筆紀錄為準，
+    多 DUT 時所有裝置都成功才算完成；失敗或跳過（無法抵達、看門狗中止、握手失敗）的站點重新測試
+    """
+    latest = {}
+    for record in records:
+        latest[(station_key(record), record.get("dut"))] = bool(record.get("success"))
+    failed = {key for (key, _), success in latest.items() if not success}
+    return {key for key, _ in latest} - failed
@@ -0,0 +1,431 @@
+# =============================================
+# 🔹 測試計畫 - campaign_plan.py
+# 功能：以 JSON 計畫檔宣告測試維度（趟數 / 角度 / 測試點 / DUT slot）、各階段時間與重試設定，
+#       編譯時檢查內容、展開為依序執行的站點列表，並在硬體動作前列出預估時間與小智移動距離
+#   python campaign_plan.py plans/turntable_full.json          # 只檢查與預估，不連線任何硬體
+#   python campaign_plan.py plans/turntable_full.json --list   # 逐站列出執行順序
+#   python campaign_plan.py plans/rounds_quick.json --json out.json   # 另輸出展開後的站點列表
+#   python U3_Mouse_Auto_Test_Main_Turntable.py --plan plans/turntable_full.json
+# 計畫檔省略的欄位一律使用 config.py 的設定（不指定 --plan = 與原本相同）
+# 掃描順序 order（外層 → 內層）未指定時依各軸切換成本排列，輪盤模式可另設 rounds（每個角度跑多趟）
+# =============================================
+
+import sys
+import json
+import argparse
+import datetime
+import collections
+from route_planner import plan_sweep_route, route_distance, log_route_summary
+from turntable_controller import TurntableController
+from campaign_watchdog import TravelEstimator
+from clock_util import get_clock
+
+MODES = ("rounds", "turntable")
+MODE_NAMES = {"rounds": "多趟", "turntable": "輪盤"}
+
+# 展開後的站點：seq 為執行順序（從 1 開始），rotate_to 為此站前需轉到的角度（None = 不旋轉），
+# expected_sec 為預估的站點耗時（行駛 + 回穩 + 輪盤等待 + 握手 + 測試 + 停留）
+StationTask = collections.namedtuple("StationTask", ["seq", "round_index", "angle", "point", "position",
+                                                     "rotate_to", "expected_sec"])
+
+# 掃描軸：round 趟數（重複掃描，無硬體）、angle 輪盤角度、point 小智測試點
+AXES = ("round", "angle", "point")
+AXIS_NAMES = {"round": "趟數", "angle": "角度", "point": "測試點"}
+
+
+class PlanError(ValueError):
+    """計畫檔內容錯誤（一次列出所有問題）"""
+
+    def __init__(self, errors):
+        self.errors = list(errors)
+        super().__init__("計畫檔錯誤：" + "；".join(self.errors))
+
+
+def plan_defaults(mode):
+    """計畫檔的預設值（即 config.py 目前的設定）"""
+    from config import TEST_POINT_PATTERN, TEST_POINT_RANGE, TEST_ROUNDS, ROUTE_SERPENTINE
+    from config import TURNTABLE_ANGLES, TURNTABLE_ANGLE_NAMES, TURNTABLE_WRAP_LIMIT
+    from config import TEST_DURATION, SETTLE_SEC, MIN_DWELL_SEC, WAIT_TEST_DONE, TEST_DONE_GRACE_SEC
+    from config import HC12_HANDSHAKE_TIMEOUT, HC12_MIN_TIMEOUT, HC12_MAX_ATTEMPTS, HC12_RETRY_GAP_SEC, HC12_HANDSHAKE_BUDGET
+    from config import ARRIVAL_BASE_SEC, ARRIVAL_SEC_PER_METER, ARRIVAL_MAX_RESENDS, SWEEP_ORDER
+    defaults = {
+        "name": None,
+        "mode": mode,
+        "points": list(TEST_POINT_RANGE),
+        "point_pattern": TEST_POINT_PATTERN,
+        "serpentine": ROUTE_SERPENTINE,
+        "order": [axis for axis in SWEEP_ORDER if axis in mode_axes(mode)] if SWEEP_ORDER else None,
+        "dut": None,                            # None = config.DUT_NAME（多 DUT 時為各 slot 名稱）
+        "dut_slots": None,                      # None = config.DUT_SLOTS
+        "timing": {
+            "test_duration": TEST_DURATION,     # 按下空白鍵後的測試時間（等待 Test_Done 時為上限）
+            "settle_sec": SETTLE_SEC,           # 抵達後等待車身回穩
+            "min_dwell_sec": MIN_DWELL_SEC,     # 每站最短停留時間
+            "wait_test_done": WAIT_TEST_DONE,
+            "test_done_grace_sec": TEST_DONE_GRACE_SEC,
+        },
+        "retry": {
+            "hc12_max_attempts": HC12_MAX_ATTEMPTS,
+            "hc12_timeout": HC12_HANDSHAKE_TIMEOUT,
+            "hc12_min_timeout": HC12_MIN_TIMEOUT,
+            "hc12_retry_gap_sec": HC12_RETRY_GAP_SEC,
+            "hc12_budget_sec": HC12_HANDSHAKE_BUDGET,
+            "arrival_max_resends": ARRIVAL_MAX_RESENDS,
+        },
+        "estimate": {                           # 只用於預估時間，不影響測試流程
+            "startup_sec": 15,                  # Sikuli 開啟測試軟體
+            "travel_base_sec": ARRIVAL_BASE_SEC,
+            "travel_sec_per_meter": ARRIVAL_SEC_PER_METER,
+            "handshake_sec": 3,                 # Test.ino 收到 Robot_Arrived 約 2.7 秒後回覆
+            "test_sec": TEST_DURATION,          # 實際測試時間（等待 Test_Done 時通常較短）
+            "deg_per_sec": 18,                  # 輪盤 3 RPM
+            "rotation_settle_sec": 3,
+        },
+    }
+    if mode == "rounds":
+        defaults["rounds"] = TEST_ROUNDS
+    else:
+        # 輪盤模式也可重複多趟（每個角度跑 rounds 趟），預設 1 趟
+        defaults.update(rounds=1, angles=list(TURNTABLE_ANGLES), wrap_limit=TURNTABLE_WRAP_LIMIT,
+                        angle_names=dict(zip(map(str, TURNTABLE_ANGLES), TURNTABLE_ANGLE_NAMES)))
+    return defaults
+
+
+def _parse_points(points):
+    """測試點：整數列表，或 "1-10" 範圍字串"""
+    if isinstance(points, str):
+        start, _, stop = points.partition("-")
+        return list(range(int(start), int(stop or start) + 1))
+    return list(points)
+
+
+def mode_axes(mode):
+    """模式使用的掃描軸：多趟為 趟數 × 測試點，輪盤另加角度"""
+    return ("round", "point") if mode == "rounds" else AXES
+
+
+def transition_costs(spec):
+    """
+    各硬體軸切換一次的預估秒數（只用於排列掃描順序）
+    - point：小智在相鄰測試點間行駛
+    - angle：輪盤以最壞情況估計（反向解纏時最多轉 2 × wrap_limit），加上回穩
+    """
+    est, points = spec["estimate"], sorted(spec["points"])
+    gap = (points[-1] - points[0]) / (len(points) - 1) if len(points) > 1 else 0
+    costs = {"point": est["travel_base_sec"] + est["travel_sec_per_meter"] * gap}
+    if spec["mode"] == "turntable":
+        costs["angle"] = 2 * spec["wrap_limit"] / est["deg_per_sec"] + est["rotation_settle_sec"]
+    return costs
+
+
+def default_order(spec):
+    """
+    依切換成本排列掃描順序（外層 → 內層）：越貴的軸越外層、變動越少；
+    趟數為重複掃描，固定放在測試點外層（輪盤模式即「每個角度跑 rounds 趟」）
+    """
+    costs = transition_costs(spec)
+    order = sorted(costs, key=costs.get, reverse=True)
+    order.insert(order.index("point"), "round")
+    return order
+
+
+def _merge(defaults, spec, errors, path=""):
+    """以計畫檔覆寫預設值（各區塊逐欄覆寫），不認得的欄位列為錯誤（多半是拼錯）"""
+    merged = dict(defaults)
+    for key, value in spec.items():
+        if key not in defaults:
+            errors.append(f"未知的欄位 {path}{key}")
+        elif isinstance(defaults[key], dict) and key != "angle_names":
+            if isinstance(value, dict):
+                merged[key] = _merge(defaults[key], value, errors, f"{key}.")
+            else:
+                errors.append(f"{path}{key} 必須是物件")
+        else:
+            merged[key] = value
+    return merged
+
+
+def _number(errors, section, values, key, minimum=0, integer=False):
+    value = values[key]
+    kind = int if integer else (int, float)
+    if isinstance(value, bool) or not isinstance(value, kind) or value < minimum:
+        errors.append(f"{section}.{key} 必須是 ≥ {minimum} 的{'整數' if integer else '數字'}: {value!r}")
+
+
+def _validate(spec, errors):
+    mode = spec["mode"]
+    try:
+        spec["points"] = _parse_points(spec["points"])
+    except (TypeError, ValueError):
+        errors.append(f"points 必須是整數列表或 \"1-10\": {spec['points']!r}")
+        spec["points"] = []
+    points = spec["points"]
+    if not points:
+        errors.append("points 不可為空")
+    elif not all(isinstance(p, int) and not isinstance(p, bool) and p > 0 for p in points):
+        errors.append(f"points 必須是正整數: {points}")
+    elif len(set(points)) != len(points):
+        errors.append(f"points 有重複的測試點: {points}")
+    try:
+        names = [spec["point_pattern"].format(p) for p in points[:1] or [1]]
+        if names and not any(ch.isdigit() for ch in names[0]):
+            errors.append(f"point_pattern 必須包含測試點編號: {spec['point_pattern']!r}")
+    except (AttributeError, IndexError, ValueError, KeyError):
+        errors.append(f"point_pattern 必須是格式化字串（例如 '{{:d}}m'、'A{{:02d}}'）: {spec['point_pattern']!r}")
+
+    if isinstance(spec["rounds"], bool) or not isinstance(spec["rounds"], int) or spec["rounds"] < 1:
+        errors.append(f"rounds 必須是 ≥ 1 的整數: {spec['rounds']!r}")
+    order = spec["order"]
+    if order is not None:
+        axes = mode_axes(mode)
+        if not isinstance(order, list) or not all(axis in axes for axis in order) or len(set(order)) != len(order):
+            errors.append(f"order 必須是 {' / '.join(axes)} 組成的列表（外層 → 內層）: {order!r}")
+        elif not set(axes) - {"round"} <= set(order):
+            errors.append(f"order 缺少掃描軸 {', '.join(sorted(set(axes) - {'round'} - set(order)))}: {order}")
+    if mode != "rounds":
+        angles = spec["angles"]
+        if not isinstance(angles, list) or not angles or not all(isinstance(a, int) for a in angles):
+            errors.append(f"angles 必須是整數角度列表: {angles!r}")
+        else:
+            if len(set(angles)) != len(angles):
+                errors.append(f"angles 有重複的角度: {angles}")
+            turntable = TurntableController(None, wrap_limit=spec["wrap_limit"])
+            for angle in angles:
+                try:
+                    turntable.plan_move(angle)
+                except ValueError as e:
+                    errors.append(str(e))
+
+    slots = spec["dut_slots"]
+    if slots is not None:
+        if not isinstance(slots, list) or not all(isinstance(s, dict) and s.get("name") and s.get("com_port")
+                                                  for s in slots):
+            errors.append("dut_slots 必須是 [{\"name\": ..., \"com_port\": ...}, ...]")
+        elif len({s["name"] for s in slots}) != len(slots):
+            errors.append(f"dut_slots 名稱重複: {[s['name'] for s in slots]}")
+
+    timing, retry, estimate = spec["timing"], spec["retry"], spec["estimate"]
+    for key in ("test_duration", "settle_sec", "min_dwell_sec", "test_done_grace_sec"):
+        _number(errors, "timing", timing, key)
+    if not isinstance(timing["wait_test_done"], bool):
+        errors.append(f"timing.wait_test_done 必須是 true / false: {timing['wait_test_done']!r}")
+    _number(errors, "retry", retry, "hc12_max_attempts", minimum=1, integer=True)
+    _number(errors, "retry", retry, "arrival_max_resends", integer=True)
+    for key in ("hc12_timeout", "hc12_min_timeout", "hc12_retry_gap_sec", "hc12_budget_sec"):
+        _number(errors, "retry", retry, key)
+    if not errors and retry["hc12_min_timeout"] > retry["hc12_timeout"]:
+        errors.append("retry.hc12_min_timeout 不可大於 retry.hc12_timeout")
+    for key in estimate:
+        _number(errors, "estimate", estimate, key)
+    if not errors and estimate["deg_per_sec"] <= 0:
+        errors.append("estimate.deg_per_sec 必須大於 0")
+
+
+def compile_plan(spec=None, mode=None):
+    """
+    檢查計畫並展開為 ExecutionPlan（錯誤時拋出 PlanError）
+    spec：計畫檔內容（dict；省略的欄位使用 config）；mode：主程式的模式，與計畫檔不同時視為錯誤
+    """
+    spec = dict(spec or {})
+    plan_mode = spec.get("mode", mode or "turntable")
+    if plan_mode not in MODES:
+        raise PlanError([f"mode 必須是 {' / '.join(MODES)}: {plan_mode!r}"])
+    if mode is not None and plan_mode != mode:
+        raise PlanError([f"此計畫為{MODE_NAMES[plan_mode]}模式，無法以{MODE_NAMES[mode]}主程式執行"])
+    errors = []
+    merged = _merge(plan_defaults(plan_mode), spec, errors)  # 格式錯誤的區塊保留預設值，仍可繼續檢查其他欄位
+    _validate(merged, errors)
+    if errors:
+        raise PlanError(errors)
+    return ExecutionPlan(merged)
+
+
+def load_plan(path):
+    """讀取計畫檔（JSON）"""
+    try:
+        with open(path, encoding="utf-8") as f:
+            spec = json.load(f)
+    except OSError as e:
+        raise PlanError([f"無法讀取計畫檔 {path}: {e}"]) from None
+    except ValueError as e:
+        raise PlanError([f"計畫檔 {path} 不是有效的 JSON: {e}"]) from None
+    if not isinstance(spec, dict):
+        raise PlanError([f"計畫檔 {path} 必須是 JSON 物件"])
+    spec.setdefault("name", path)
+    return spec
+
+
+def format_duration(seconds):
+    seconds = int(round(seconds))
+    return f"{seconds // 3600}:{seconds % 3600 // 60:02d}:{seconds % 60:02d}"
+
+
+class ExecutionPlan:
+    """
+    編譯後的測試計畫
+    - order：掃描順序（外層 → 內層，未指定時依切換成本排列）
+    - tasks：依執行順序的 StationTask 列表（蛇行路徑、輪盤旋轉點已展開）
+    - naive：原始順序（用於比較移動距離）
+    - transitions：輪盤旋轉 / 小智移動次數
+    - phases：各階段預估秒數合計；total_sec：含啟動與返航的預估總時間
+    """
+
+    def __init__(self, spec):
+        self.spec = spec
+        self.mode = spec["mode"]
+        self.name = spec["name"] or "config.py"
+        self.points = spec["points"]
+        self.rounds = spec["rounds"]
+        self.angles = spec.get("angles")
+        self.dut = spec["dut"]
+        self.dut_slots = spec["dut_slots"]
+        self.timing = spec["timing"]
+        self.retry = spec["retry"]
+        self.estimate = spec["estimate"]
+        self.order = list(spec["order"] or default_order(spec))
+        if "round" not in self.order:           # 計畫檔省略趟數時放在測試點外層
+            self.order.insert(self.order.index("point"), "round")
+        values = {"round": list(range(self.rounds)), "angle": self.angles, "point": self.points}
+        axes = [(axis, values[axis]) for axis in self.order]
+        pattern = spec["point_pattern"]
+        route = plan_sweep_route(axes, pattern, serpentine=spec["serpentine"])
+        self.naive = plan_sweep_route(axes, pattern, serpentine=False)
+        self.tasks, self.phases = self._expand(route)
+        self.total_sec = sum(self.phases.values())
+        self.transitions = collections.Counter(
+            rotation=sum(1 for task in self.tasks if task.rotate_to is not None),
+            travel=sum(1 for a, b in zip([None] + self.tasks, self.tasks) if a is None or a.position != b.position))
+
+    def _expand(self, route):
+        """展開站點並逐站預估耗時（輪盤旋轉與前往該角度第一站同時進行）"""
+        est, timing = self.estimate, self.timing
+        travel = TravelEstimator(base_sec=est["travel_base_sec"], sec_per_meter=est["travel_sec_per_meter"])
+        turntable = TurntableController(None, wrap_limit=self.spec.get("wrap_limit", 180),
+                                        deg_per_sec=est["deg_per_sec"])
+        test_sec = min(est["test_sec"], timing["test_duration"])
+        phases = collections.Counter(startup=est["startup_sec"])
+        tasks = []
+        position, previous_angle = 0, None
+        for seq, station in enumerate(route, 1):
+            rotate_to = None
+            if self.mode == "turntable" and station.angle != previous_angle:
+                rotate_to = station.angle
+            previous_angle = station.angle
+            travel_sec = travel.model(position, station.position)
+            wait_sec = 0
+            if rotate_to is not None:
+                relative, turntable.position = turntable.plan_move(rotate_to)
+                rotation_sec = turntable.estimate_rotation_sec(relative) + (est["rotation_settle_sec"] if relative else 0)
+                wait_sec = max(rotation_sec - travel_sec - timing["settle_sec"], 0)
+            padding = max(timing["min_dwell_sec"] - test_sec, 0)
+            parts = {"travel": travel_sec, "settle": timing["settle_sec"], "rotation": wait_sec,
+                     "handshake": est["handshake_sec"], "test": test_sec, "padding": padding}
+            phases.update(parts)
+            tasks.append(StationTask(seq, station.round_index, station.angle, station.point, station.position,
+                                     rotate_to, sum(parts.values())))
+            position = station.position
+        phases["return"] = travel.model(position, 0)
+        return tasks, phases
+
+    @property
+    def distance(self):
+        return route_distance(self.tasks)
+
+    def key(self, task):
+        """站點識別（與 campaign_keys.station_key 相同）：(趟次, 角度, 測試點)，多趟模式角度為 None"""
+        return (task.round_index + 1, task.angle, task.point)
+
+    def remaining(self, skip=()):
+        return [task for task in self.tasks if self.key(task) not in skip]
+
+    def estimate_sec(self, tasks):
+        """指定站點的預估秒數（續跑 / 重新指派時的剩餘時間，不含啟動）"""
+        return sum(task.expected_sec for task in tasks) + self.phases["return"]
+
+    def angle_name(self, angle):
+        """angle_names 有設定的角度使用名稱，其他直接顯示度數"""
+        return self.spec.get("angle_names", {}).get(str(angle), f"{angle}°")
+
+    def campaign_config(self):
+        """寫入測試紀錄與檢查點的設定（續跑時以此比對）"""
+        extent = {"rounds": self.rounds} if self.mode == "rounds" else {"angles": list(self.angles)}
+        if self.mode == "turntable" and self.rounds > 1:
+            extent["rounds"] = self.rounds
+        return {"test_points": list(self.points), **extent, "test_duration": self.timing["test_duration"],
+                "serpentine": self.spec["serpentine"], "order": self.order}
+
+    def scheduler_options(self):
+        """StationScheduler 的時間與重試參數"""
+        timing, retry = self.timing, self.retry
+        return {"test_duration": timing["test_duration"], "settle_sec": timing["settle_sec"],
+                "min_dwell_sec": timing["min_dwell_sec"], "wait_test_done": timing["wait_test_done"],
+                "test_done_grace_sec": timing["test_done_grace_sec"], "max_retries": retry["hc12_max_attempts"],
+                "handshake_timeout": retry["hc12_timeout"], "min_timeout": retry["hc12_min_timeout"],
+                "retry_gap_sec": retry["hc12_retry_gap_sec"], "handshake_budget_sec": retry["hc12_budget_sec"]}
+
+    def block_label(self, task):
+        """站點所屬的一趟（測試點以外的軸）：多趟為「第N趟」，輪盤為角度名稱（多趟時加上第幾輪）"""
+        if self.mode == "rounds":
+            return f"第{task.round_index + 1}趟"
+        name = self.angle_name(task.angle)
+        return f"{name}（第{task.round_index + 1}輪）" if self.rounds > 1 else name
+
+    def describe(self):
+        sizes = {"round": f"{self.rounds} 趟", "angle": f"{len(self.angles or ())} 角度",
+                 "point": f"{len(self.points)} 測試點"}
+        shown = [axis for axis in self.order if axis != "round" or self.mode == "rounds" or self.rounds > 1]
+        return f"{' × '.join(sizes[axis] for axis in shown)} = {len(self.tasks)} 站"
+
+    def to_json(self):
+        return {"name": self.name, "spec": self.spec, "total_sec": round(self.total_sec, 1),
+                "distance": self.distance, "phases": {k: round(v, 1) for k, v in self.phases.items()},
+                "tasks": [task._asdict() for task in self.tasks]}
+
+
+PHASE_NAMES = {"startup": "啟動", "travel": "行駛", "settle": "回穩", "rotation": "輪盤等待",
+               "handshake": "握手", "test": "測試", "padding": "停留", "return": "返航"}
+
+
+def log_plan(plan, log_func=print):
+    """印出計畫內容、移動距離與預估完成時間"""
+    dut = ", ".join(slot["name"] for slot in plan.dut_slots) if plan.dut_slots else (plan.dut or "依 config")
+    log_func(f"[Plan] 📝 {plan.name}：{MODE_NAMES[plan.mode]}模式，{plan.describe()}（DUT: {dut}）")
+    log_route_summary(plan.tasks, plan.naive, log_func=log_func, rotate_at_first=plan.mode == "turntable")
+    rotations = f"輪盤旋轉 {plan.transitions['rotation']} 次、" if plan.mode == "turntable" else ""
+    log_func(f"[Plan] 🔀 掃描順序（外 → 內）: {' → '.join(AXIS_NAMES[axis] for axis in plan.order)}；"
+             f"{rotations}小智移動 {plan.transitions['travel']} 次")
+    breakdown = "、".join(f"{PHASE_NAMES[k]} {format_duration(v)}" for k, v in plan.phases.items() if v)
+    finish = datetime.datetime.now() + datetime.timedelta(seconds=get_clock().to_real(plan.total_sec))
+    log_func(f"[Plan] ⏱️ 預估總時間 {format_duration(plan.total_sec)}（{breakdown}）")
+    log_func(f"[Plan] 🕒 現在開始預計 {finish:%m/%d %H:%M} 完成")
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description="檢查 U3 測試計畫並預估時間（不連線硬體）")
+    parser.add_argument("plan", nargs="?", help="計畫檔（JSON）；省略 = 依 config.py")
+    parser.add_argument("--mode", choices=MODES, help="未指定計畫檔或計畫檔未寫 mode 時使用")
+    parser.add_argument("--list", action="store_true", help="逐站列出執行順序與預估耗時")
+    parser.add_argument("--json", help="輸出展開後的站點列表與預估到此檔案")
+    args = parser.parse_args(argv)
+    try:
+        plan = compile_plan(load_plan(args.plan) if args.plan else {"mode": args.mode or "turntable"},
+                            mode=args.mode)
+    except PlanError as e:
+        print(f"[Plan] ❌ {args.plan or 'config'}：")
+        for error in e.errors:
+            print(f"  - {error}")
+        return 1
+    log_plan(plan)
+    for task in plan.tasks if args.list else ():
+        label = plan.block_label(task)
+        rotate = f"  ↻ 輪盤轉向 {task.rotate_to}°" if task.rotate_to is not None else ""
+        print(f"  {task.seq:>3}. {label} {task.point:<6} 約 {task.expected_sec:3.0f} 秒{rotate}")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(plan.to_json(), f, ensure_ascii=False, indent=1)
+        print(f"[Plan] 💾 已輸出 {args.json}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
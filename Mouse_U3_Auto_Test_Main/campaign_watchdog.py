@@ -0,0 +1,209 @@
+# =============================================
+# 🔹 測試看門狗 - campaign_watchdog.py
+# 功能：無人值守時讓測試自行從異常中恢復
+#   - TravelEstimator：依站點距離與本次實測行駛時間估計抵達期限，逾時重送指令，仍未抵達則拋出 ArrivalTimeout
+#   - CampaignWatchdog：一段時間沒有任何進度即依序執行恢復動作（重送 → 重新連線 → 跳過此站 → 中止），
+#     中止後以 CampaignStalled 結束，已完成的站點保留在檢查點，可用 --resume 繼續
+# =============================================
+
+import asyncio
+import inspect
+import statistics
+import collections
+from clock_util import get_clock
+from route_planner import point_position
+
+# 恢復動作顯示名稱（config.WATCHDOG_POLICY 使用左側的名稱）
+ACTION_NAMES = {
+    "resend": "重送送餐指令",
+    "reconnect": "重新連線小智",
+    "skip_station": "跳過目前站點",
+    "abort": "中止測試",
+}
+
+
+class ArrivalTimeout(Exception):
+    """重送指令後仍未在期限內抵達"""
+
+
+class CampaignStalled(Exception):
+    """看門狗依恢復策略中止測試"""
+
+
+class TravelEstimator:
+    """
+    行駛時間估計與抵達等待
+    - 預期行駛時間：同一段路（起點 → 終點）的實測平均；沒有實測時以
+      base_sec + sec_per_meter × 距離，再乘上本次其他路段「實測 / 估計」的中位數修正
+    - 期限 = max(min_sec, 預期 × factor)，逾時即重送指令，最多 max_resends 次
+    """
+
+    def __init__(self, base_sec=10, sec_per_meter=3, factor=2.0, min_sec=30, max_resends=2,
+                 history=5, clock=None, log_func=print):
+        self.base_sec = base_sec
+        self.sec_per_meter = sec_per_meter
+        self.factor = factor
+        self.min_sec = min_sec
+        self.max_resends = max_resends
+        self.clock = clock or get_clock()
+        self.log = log_func
+        self.position = 0                       # 小智目前位置（測試點編號，出餐點 = 0）
+        self.samples = collections.defaultdict(lambda: collections.deque(maxlen=history))  # (起點, 終點) → 實測秒數
+        self.ratios = collections.deque(maxlen=50)  # 實測 / 距離模型
+
+    def model(self, start, end):
+        if start == end:
+            return self.base_sec / 2            # 原地重新指派仍需確認定位
+        return self.base_sec + self.sec_per_meter * abs(end - start)
+
+    def expected(self, start, end):
+        samples = self.samples.get((start, end))
+        if samples:
+            return statistics.mean(samples)
+        ratio = statistics.median(self.ratios) if self.ratios else 1.0
+        return self.model(start, end) * ratio
+
+    def deadline(self, start, end):
+        return max(self.min_sec, self.expected(start, end) * self.factor)
+
+    def record(self, start, end, elapsed):
+        self.samples[(start, end)].append(elapsed)
+        self.ratios.append(elapsed / self.model(start, end))
+
+    async def wait(self, target, arrived, resend=None):
+        """
+        等待 arrived（asyncio.Event）被設定，回傳行駛秒數
+        resend：逾時時呼叫的 async 函式（重送指令）；None = 不重送，第一次逾時即拋出 ArrivalTimeout
+        """
+        start, end = self.position, point_position(target)
+        expected = self.expected(start, end)
+        deadline = self.deadline(start, end)
+        began = self.clock.time()
+        attempts = 1 + (self.max_resends if resend is not None else 0)
+        for attempt in range(1, attempts + 1):
+            try:
+                await asyncio.wait_for(arrived.wait(), self.clock.to_real(deadline))
+            except asyncio.TimeoutError:
+                waited = self.clock.time() - began
+                if attempt == attempts:
+                    raise ArrivalTimeout(f"{target} 等待 {waited:.0f} 秒仍未抵達（預期 {expected:.0f} 秒）") from None
+                self.log(f"[WS] ⏰ {target} 已等待 {waited:.0f} 秒未抵達（預期 {expected:.0f} 秒），"
+                         f"重送指令 ({attempt}/{self.max_resends})")
+                await resend()
+                continue
+            elapsed = self.clock.time() - began
+            if attempt == 1:                    # 重送過的行駛時間含等待期限，不列入估計
+                self.record(start, end, elapsed)
+            self.position = end
+            return elapsed
+
+
+class CampaignWatchdog:
+    """
+    測試停滯看門狗
+    - stall_sec：超過此秒數沒有任何進度（touch）即執行 policy 中的下一個恢復動作；0 = 停用
+    - policy：恢復動作名稱（add_action 登記，"abort" 為內建）；有新進度後從第一個動作重新開始
+    以 async with 包住站點迴圈：中止時取消該任務，離開區塊時改拋出 CampaignStalled
+    """
+
+    def __init__(self, stall_sec=300, policy=("resend", "reconnect", "skip_station", "abort"), poll_sec=5,
+                 clock=None, log_func=print):
+        self.stall_sec = stall_sec
+        self.policy = list(policy)
+        self.poll_sec = poll_sec
+        self.clock = clock or get_clock()
+        self.log = log_func
+        self.actions = {"abort": self._abort}
+        self.level = 0                          # 本次停滯已執行的恢復動作數
+        self.last_progress = self.clock.time()
+        self.last_stage = "start"
+        self.recoveries = []                    # (最後進度, 恢復動作)，測試結束時統計
+        self.target = None                      # 中止時取消的任務
+        self.monitor_task = None
+        self.tripped = False
+
+    @property
+    def enabled(self):
+        return bool(self.stall_sec)
+
+    def add_action(self, name, action):
+        """登記恢復動作（一般函式或 async 函式）"""
+        self.actions[name] = action
+
+    def touch(self, stage):
+        """回報進度：重新計時，恢復動作從頭開始"""
+        self.last_progress = self.clock.time()
+        self.last_stage = stage
+        self.level = 0
+
+    async def __aenter__(self):
+        self.touch("start")
+        if self.enabled:
+            self.target = asyncio.current_task()
+            self.monitor_task = asyncio.create_task(self._monitor())
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        if self.monitor_task is not None:
+            self.monitor_task.cancel()
+            await asyncio.gather(self.monitor_task, return_exceptions=True)
+            self.monitor_task = None
+        if self.recoveries:
+            self.log(f"[Watchdog] 📋 本次測試執行恢復動作 {len(self.recoveries)} 次: "
+                     f"{', '.join(f'{stage}→{action}' for stage, action in self.recoveries)}")
+        if exc_type is asyncio.CancelledError and self.tripped:
+            task = asyncio.current_task()
+            if hasattr(task, "uncancel"):      # Python 3.11+：清除取消狀態，之後的 await 不會再被取消
+                task.uncancel()
+            raise CampaignStalled(f"超過 {self.stall_sec} 秒沒有進度（最後: {self.last_stage}），已中止測試") from None
+        return False
+
+    async def _monitor(self):
+        while True:
+            await self.clock.sleep(self.poll_sec)
+            idle = self.clock.time() - self.last_progress
+            if idle < self.stall_sec or self.level >= len(self.policy):
+                continue
+            name = self.policy[self.level]
+            self.level += 1
+            self.last_progress = self.clock.time()  # 給此動作 stall_sec 秒生效，期間沒有進度才執行下一個
+            self.recoveries.append((self.last_stage, name))
+            self.log(f"[Watchdog] ⚠️ {idle:.0f} 秒沒有進度（最後: {self.last_stage}），"
+                     f"恢復動作 {self.level}/{len(self.policy)}: {ACTION_NAMES.get(name, name)}")
+            action = self.actions.get(name)
+            if action is None:
+                self.log(f"[Watchdog] ⚠️ 未登記的恢復動作 {name}，略過")
+                continue
+            try:
+                result = action()
+                if inspect.isawaitable(result):
+                    await result
+            except Exception as e:
+                self.log(f"[Watchdog] ❌ 恢復動作 {name} 失敗: {e}")
+
+    def _abort(self):
+        self.tripped = True
+        if self.target is not None:
+            self.target.cancel()
+
+
+def create_travel_estimator(log_func=print):
+    """依 config 建立行駛時間估計"""
+    from config import ARRIVAL_BASE_SEC, ARRIVAL_SEC_PER_METER, ARRIVAL_DEADLINE_FACTOR
+    from config import ARRIVAL_MIN_SEC, ARRIVAL_MAX_RESENDS
+    return TravelEstimator(base_sec=ARRIVAL_BASE_SEC, sec_per_meter=ARRIVAL_SEC_PER_METER,
+                           factor=ARRIVAL_DEADLINE_FACTOR, min_sec=ARRIVAL_MIN_SEC,
+                           max_resends=ARRIVAL_MAX_RESENDS, log_func=log_func)
+
+
+def create_watchdog(robot, scheduler, log_func=print):
+    """
+    依 config 建立看門狗並登記恢復動作（robot：sweep_engine.RobotAxis，scheduler：StationScheduler）
+    """
+    from config import WATCHDOG_STALL_SEC, WATCHDOG_POLICY
+    watchdog = CampaignWatchdog(stall_sec=WATCHDOG_STALL_SEC, policy=WATCHDOG_POLICY, log_func=log_func)
+    watchdog.add_action("resend", robot.client.resend_outstanding)
+    watchdog.add_action("reconnect", robot.client.reconnect)
+    watchdog.add_action("skip_station", scheduler.abort_station)
+    scheduler.watchdog = watchdog
+    return watchdog
@@ -0,0 +1,71 @@
+# =============================================
+# 🔹 時鐘模組 - clock_util.py
+# 功能：所有流程等待（回穩、測試時間、重試間隔、串口初始化、逾時）統一經由時鐘，
+#       設定 U3_TIME_SCALE（例如 100）即可讓整個測試以 100 倍速重播，
+#       耗時報表仍以「實際測試」的秒數呈現
+# =============================================
+
+import os
+import time
+import asyncio
+import threading
+
+
+class Clock:
+    """
+    縮放時鐘
+    - scale = 1：與真實時間相同（實機測試）
+    - scale = N：所有等待縮短為 1/N，time()/monotonic() 以 N 倍速前進，
+      因此用 clock.time() 計算的耗時即為換算後的實際秒數
+    注意：串口、WebSocket、截圖等真實 I/O 的延遲同樣會被放大 N 倍，
+    倍率過高時這些延遲會掩蓋流程本身的時間（建議模擬時 ≤ 200）
+    """
+
+    def __init__(self, scale=1.0):
+        if scale <= 0:
+            raise ValueError(f"時間倍率必須大於 0: {scale}")
+        self.scale = float(scale)
+        self._origin_wall = time.time()
+        self._origin_mono = time.monotonic()
+
+    @property
+    def scaled(self):
+        return self.scale != 1.0
+
+    def time(self):
+        """縮放後的 time.time()（以建立時刻為起點）"""
+        return self._origin_wall + (time.time() - self._origin_wall) * self.scale
+
+    def monotonic(self):
+        return self._origin_mono + (time.monotonic() - self._origin_mono) * self.scale
+
+    def to_real(self, seconds):
+        """流程秒數 → 實際等待秒數（None 代表不限時，原樣回傳）"""
+        return None if seconds is None else seconds / self.scale
+
+    async def sleep(self, seconds):
+        await asyncio.sleep(max(seconds, 0) / self.scale)
+
+    def sleep_blocking(self, seconds):
+        time.sleep(max(seconds, 0) / self.scale)
+
+
+_clock = None
+_clock_lock = threading.Lock()
+
+
+def get_clock():
+    """取得共用時鐘（第一次呼叫時依環境變數 U3_TIME_SCALE 建立，預設 1 = 真實時間）"""
+    global _clock
+    with _clock_lock:
+        if _clock is None:
+            _clock = Clock(float(os.environ.get("U3_TIME_SCALE", 1)))
+        return _clock
+
+
+def set_clock(clock):
+    """替換共用時鐘（模擬 / 基準測試用），回傳原本的時鐘"""
+    global _clock
+    with _clock_lock:
+        previous, _clock = _clock, clock
+        return previous
@@ -3,10 +3,14 @@
 # 功能：設定相關基礎設定
 # =============================================
 
-COM_PORT = "COM3"
-TURNTABLE_COM_PORT = "COM5"    # 輪盤控制 COM Port
-WS_IP = "192.168.0.225"
-WS_PORT = 8000                 # 小智 WebSocket Port
+import os
+import json
+
+# 硬體連線（可用環境變數覆寫，python -m simulators 會自動指向模擬裝置）
+COM_PORT = os.environ.get("U3_COM_PORT", "COM3")
+TURNTABLE_COM_PORT = os.environ.get("U3_TURNTABLE_COM_PORT", "COM5")    # 輪盤控制 COM Port
+WS_IP = os.environ.get("U3_WS_IP", "192.168.0.225")
+WS_PORT = int(os.environ.get("U3_WS_PORT", 8000))                      # 小智 WebSocket Port
 
 # 測試點命名方式：支援格式化字串，例如 'A{:02d}'、'{:d}M' 等
 TEST_POINT_PATTERN = '{:d}m'   # 預設為 1m ~ 5m（可改為 'A{:02d}' 則是 A01 ~ A05）
@@ -15,4 +19,95 @@ TEST_POINT_RANGE = range(1, 11) # 站點編號範圍 -> 1m~10m
 TEST_ROUNDS = 5  # 測試趟數（想要跑幾次 1~10 全部來回就改這邊）
 
 # 一般版本使用: TEST_ROUNDS
-# 輪盤版本使用: TEST_POINT_RANGE = TEST_POINT_PATTERN (無視 TEST_ROUNDS 使用角度代替趟數)
\ No newline at end of file
+# 輪盤版本使用: TEST_POINT_RANGE = TEST_POINT_PATTERN (無視 TEST_ROUNDS 使用角度代替趟數；
+#              每個角度要跑多趟請在測試計畫檔設定 "rounds")
+
+# 掃描順序（sweep_engine.py，外層 → 內層，外層變動最少）：None = 依切換成本自動排列
+# （輪盤旋轉最慢 → 角度在最外層，趟數固定在測試點外層）；例：["round", "angle", "point"] = 每趟走完所有角度
+SWEEP_ORDER = None
+
+# 每站時間（兩種模式共用；測試計畫檔的 timing 可覆寫，見 campaign_plan.py）
+TEST_DURATION = 80             # 按下空白鍵後等待測試完成的時間（秒；WAIT_TEST_DONE 時為最長等待時間）
+SETTLE_SEC = 3                 # 抵達後等待車身回穩
+MIN_DWELL_SEC = 0              # 每站最短停留時間（原本固定補足 150 秒，管線化後設 0 = 測試完立即離站）
+
+# 路徑規劃：True = 蛇行走訪（每趟/每個角度反向，輪盤於小智所在端點原地旋轉）
+#           False = 原始順序（每趟都從第一個測試點開始，輪盤旋轉前先回到 1m）
+ROUTE_SERPENTINE = True
+
+# 輪盤設定（絕對角度，依序測試；相對移動由 TurntableController 自動換算）
+TURNTABLE_ANGLES = [0, 45, 90, -45, -90]
+TURNTABLE_ANGLE_NAMES = ["正前方", "左45°", "左90°", "右45°", "右90°"]
+TURNTABLE_WRAP_LIMIT = 180     # 絕對角度限制 ±180°，避免線材纏繞
+
+# 截圖設定
+CAPTURE_MODE = "window"                   # "window" = 只截 Primax 視窗（必須設定 PRIMAX_WINDOW_TITLE，未設定時測試不會開始）；
+                                          # "region" = 使用 CAPTURE_REGION；"full" = 全螢幕（舊版做法，擷取與存檔成本最高）
+PRIMAX_WINDOW_TITLE = os.environ.get("U3_PRIMAX_WINDOW_TITLE")  # 測試工具視窗的標題關鍵字，以 pygetwindow.getAllTitles() 確認實際標題後填入
+                                          # （執行中找不到視窗時該張改截全螢幕）
+CAPTURE_REGION = None                     # (left, top, width, height)，CAPTURE_MODE = "region" 時使用
+PNG_COMPRESS_LEVEL = 6                    # PNG 壓縮等級 0~9（越高檔案越小、編碼越慢）
+THUMBNAIL_SIZE = None                     # 例如 (480, 270)：另存縮圖到 thumbnails 子資料夾；None = 不存縮圖
+
+# 結果判讀（result_analyzer.py）：座標相對於截圖左上角（CAPTURE_MODE = "window" 時即為視窗內座標）
+RESULT_TEMPLATE_DIR = "Result_Templates"  # 字形模板資料夾（python result_analyzer.py --build-templates 建立）
+RESULT_VALUE_REGION = None                # ReportRate 數值區域 (left, top, width, height)；None = 不判讀（必須設定才會啟用）
+RESULT_STATUS_REGION = None               # PASS/FAIL 顏色區域；None = 以門檻值判定
+RESULT_THRESHOLD = 100                    # 與 Sikuli 設定的 ReportRate Threshold 相同
+
+# 測試紀錄索引（run_index.py，SQLite 存於 ../LOG/run_index.sqlite3）
+DUT_NAME = "U3"                           # 受測裝置名稱，寫入紀錄供跨批次查詢
+
+# 多 DUT 同站測試（dut_slots.py）：每個 slot 各有 HC-12 / 繼電器、接收器與 Primax 視窗，
+# 抵達後所有 slot 同時握手與測試，單一 slot 失敗不影響其他 slot
+#   name：裝置名稱（寫入紀錄與截圖檔名）、com_port：HC-12 串口、window_title：該 slot 的 Primax 視窗（可省略）
+# 空列表 = 單一 DUT（DUT_NAME + COM_PORT，與原本相同）；可用環境變數 U3_DUT_SLOTS（JSON）覆寫
+DUT_SLOTS = json.loads(os.environ.get("U3_DUT_SLOTS", "[]"))
+# 例：[{"name": "U3-A", "com_port": "COM3", "window_title": "Primax Mouse Test A"},
+#      {"name": "U3-B", "com_port": "COM7", "window_title": "Primax Mouse Test B"}]
+
+# HC-12 握手（serial_util.HC12Serial.handshake）：單次逾時依歷史延遲（../LOG/hc12_stats.json）自動調整，
+# 逾時即提早重送；HC12_MIN_TIMEOUT = HC12_HANDSHAKE_TIMEOUT 時等同舊版固定逾時
+HC12_HANDSHAKE_TIMEOUT = 15               # 單次逾時上限（尚無歷史資料時即使用此值）
+HC12_MIN_TIMEOUT = 5                      # 單次逾時下限（Test.ino 收到指令後約 2.7 秒才回覆）
+HC12_MAX_ATTEMPTS = 4                     # 最多傳送次數
+HC12_RETRY_GAP_SEC = 0                    # 重送前的間隔（逾時已足以讓封包清空）
+HC12_HANDSHAKE_BUDGET = 31                # 整個握手的時間上限（舊版 2 次 × 15 秒 + 1 秒間隔）
+
+# 測試結束同步：Test.ino 滾輪停止後送出 Test_Done:<ms>，收到即截圖並前往下一站
+# （固定的 test_duration 僅作為逾時上限；舊版韌體只送 Relay_End 亦可使用，但無法計算時鐘漂移）
+WAIT_TEST_DONE = True
+TEST_DONE_GRACE_SEC = 2                   # 收到 Test_Done 後等待測試軟體更新畫面的秒數
+
+# 畫面偵測（screen_watcher.py）：輪詢 Primax 視窗小區域的像素雜湊，測試結果顯示（畫面停止變化）即截圖
+SCREEN_WATCH = True
+SCREEN_WATCH_REGION = None                # 結果顯示區 (left, top, width, height)，相對於 Primax 視窗
+                                          # （PRIMAX_WINDOW_TITLE = None 時為螢幕座標）；None = 整個視窗 / 全螢幕
+SCREEN_WATCH_POLL_SEC = 0.5               # 輪詢間隔
+SCREEN_WATCH_MIN_SEC = 55                 # Sikuli 設定測試 1 分鐘，之前的畫面停頓不視為結束
+SCREEN_WATCH_STABLE_SEC = 3               # 畫面維持不變多久視為結果已顯示
+SCREEN_WATCH_FREEZE_SEC = 20              # 按下空白鍵後畫面始終不變 → 測試軟體可能無回應（改用固定計時）
+
+# 小智抵達期限（campaign_watchdog.TravelEstimator）：預期行駛時間 = ARRIVAL_BASE_SEC + ARRIVAL_SEC_PER_METER × 距離
+# （距離為測試點編號差），並依本次實測自動修正；超過 預期 × ARRIVAL_DEADLINE_FACTOR（至少 ARRIVAL_MIN_SEC）
+# 未抵達即重送指令，重送 ARRIVAL_MAX_RESENDS 次仍未抵達則跳過此站
+ARRIVAL_BASE_SEC = 10
+ARRIVAL_SEC_PER_METER = 3
+ARRIVAL_DEADLINE_FACTOR = 2.0
+ARRIVAL_MIN_SEC = 30
+ARRIVAL_MAX_RESENDS = 2
+
+# WebSocket 斷線自動重新連線（指數退避，重新連線後重送尚未抵達的送餐指令）
+WS_RECONNECT_INITIAL_SEC = 1
+WS_RECONNECT_MAX_SEC = 30
+
+# 看門狗（campaign_watchdog.CampaignWatchdog）：超過 WATCHDOG_STALL_SEC 秒沒有任何進度
+# （抵達 / 握手 / 測試結束 / 站點結束）即依序執行恢復動作，有新進度後從第一個動作重新開始；0 = 停用
+# 動作：resend 重送送餐指令、reconnect 重新連線小智、skip_station 跳過目前站點、abort 中止測試（可 --resume）
+WATCHDOG_STALL_SEC = 300
+WATCHDOG_POLICY = ["resend", "reconnect", "skip_station", "abort"]
+
+# 進度與預計完成時間（progress_model.py）：以本次與最近 PROGRESS_HISTORY_CAMPAIGNS 次同類型測試的實測時間估計，
+# 每站更新 LOG、cmd 視窗標題與 ../LOG/<測試類型>_status.json；ETA 區間的信賴水準為 PROGRESS_CONFIDENCE
+PROGRESS_HISTORY_CAMPAIGNS = 20           # 0 = 只用本次測試的實測
+PROGRESS_CONFIDENCE = 0.9
@@ -0,0 +1,87 @@
+# =============================================
+# 🔹 多 DUT 設定模組 - dut_slots.py
+# 功能：依 config.DUT_SLOTS 開啟每個受測裝置的 HC-12 串口、Primax 視窗與畫面偵測器，
+#       交給 StationScheduler 於同一站同時測試（未設定時為單一 DUT，與原本相同）
+# =============================================
+
+import pygetwindow as gw
+from serial_util import HC12Serial, HandshakeStats
+from screen_watcher import create_screen_watcher
+
+
+class DutSlot:
+    """
+    單一受測裝置（slot）
+    - name：裝置名稱（None = 單一 DUT 模式，LOG / 檔名不加前綴）
+    - hc12：此裝置的 HC12Serial（各自的 Arduino 與繼電器）
+    - window_title：此裝置的 Primax 視窗（None = 不切換視窗，直接按鍵）
+    - screen_watcher：此視窗的畫面偵測器（None = 不偵測）
+    """
+
+    def __init__(self, name, hc12, window_title=None, screen_watcher=None, log_func=print):
+        self.name = name
+        self.hc12 = hc12
+        self.window_title = window_title
+        self.screen_watcher = screen_watcher
+        self.pending_captures = []  # 此 slot 尚未完成的截圖（下一站按空白鍵前需完成）
+        self.log = log_func
+
+    def activate_window(self):
+        """按鍵前切換到此 slot 的 Primax 視窗；找不到時回傳 False（仍照常按鍵）"""
+        if not self.window_title:
+            return True
+        try:
+            windows = gw.getWindowsWithTitle(self.window_title)
+        except Exception as e:
+            self.log(f"[DUT] ⚠️ {self.name} 尋找視窗失敗: {e}")
+            return False
+        if not windows:
+            self.log(f"[DUT] ⚠️ 找不到 {self.name} 的視窗 '{self.window_title}'")
+            return False
+        windows[0].activate()
+        return True
+
+
+def _prefixed(log_func, name):
+    """在每行 LOG 前加上 slot 名稱，同時測試時仍可分辨來源"""
+    def log(msg, *args, **kwargs):
+        log_func(f"[{name}] {msg}", *args, **kwargs)
+    return log
+
+
+def open_slots(log_func=print, slots=None):
+    """
+    依設定開啟所有 slot，回傳 DutSlot 列表
+    slots：slot 設定列表（None = config.DUT_SLOTS；空列表 = 單一 DUT，使用 COM_PORT）
+    """
+    from config import DUT_SLOTS, COM_PORT
+    slots = DUT_SLOTS if slots is None else slots
+    if not slots:
+        return [DutSlot(None, HC12Serial(port=COM_PORT, log_func=log_func),
+                        screen_watcher=create_screen_watcher(log_func=log_func), log_func=log_func)]
+
+    names = [slot["name"] for slot in slots]
+    if len(set(names)) != len(names):
+        raise ValueError(f"DUT_SLOTS 名稱重複: {names}")
+    stats = HandshakeStats(log_func=log_func)  # 共用同一份統計檔（各 port 分開記錄），避免互相覆寫
+    opened = []
+    for slot in slots:
+        slot_log = _prefixed(log_func, slot["name"])
+        window_title = slot.get("window_title")
+        hc12 = HC12Serial(port=slot["com_port"], log_func=slot_log, stats=stats)
+        opened.append(DutSlot(slot["name"], hc12, window_title,
+                              create_screen_watcher(log_func=slot_log, window_title=window_title), log_func=slot_log))
+    log_func(f"[DUT] ✅ 多 DUT 模式：{', '.join(names)}")
+    return opened
+
+
+def dut_label(slots):
+    """寫入測試紀錄的 DUT 名稱：單一 DUT 為 config.DUT_NAME，多 DUT 以逗號串接"""
+    from config import DUT_NAME
+    names = [slot.name for slot in slots if slot.name]
+    return ",".join(names) if names else DUT_NAME
+
+
+def close_slots(slots):
+    for slot in slots:
+        slot.hc12.close()
@@ -0,0 +1,264 @@
+# =============================================
+# 🔹 歷史 LOG 分析工具 - log_analyzer.py
+# 功能：逐行串流讀取 init_log 產生的 YYYY-MM-DD_<類型>_LOG_N.txt（可多檔平行處理），
+#       取出每站 HC-12 通訊耗時、重試 / 跳過次數與測試總耗時，
+#       依 測試點 × 角度 彙總百分位數，輸出 CSV 或 JSON，作為調整逾時設定的依據
+#   python log_analyzer.py ../LOG                         # 分析資料夾內所有 LOG
+#   python log_analyzer.py ../LOG --since 2025-07-01 --format json -o summary.json
+#   python log_analyzer.py a.txt b.txt --group-by point --stations stations.csv
+# =============================================
+
+import os
+import re
+import sys
+import csv
+import json
+import glob
+import argparse
+import multiprocessing
+from stats_util import percentile
+
+# 新版 LOG 每行前綴 "HH:MM:SS.mmm "，舊版沒有
+_TIMESTAMP = re.compile(r"^\d{2}:\d{2}:\d{2}\.\d{3} ")
+_FILENAME = re.compile(r"(\d{4}-\d{2}-\d{2})_(.+)_LOG_(\d+)\.txt$")
+
+_DISPATCH = re.compile(r"\[Main\] 🚀 指派送餐機前往 (\S+?)\.\.\.")
+_ROUND = re.compile(r"🔁 第 (\d+) 趟測試開始")
+_ANGLE_ROUND = re.compile(r"🔄 === 第(\d+)趟: (.+?) ===")
+_ANGLE_TARGET = re.compile(r"輪盤轉向 (-?\d+)°")
+_ATTEMPT = re.compile(r"\[HC-12\] 嘗試 (\d+)/(\d+)")
+_ATTEMPT_FAILED = re.compile(r"\[HC-12\] ❌ 第 (\d+) 次嘗試失敗")
+_HANDSHAKE = re.compile(r"\[DEBUG\] HC-12 通訊總耗時: ([\d.]+) 秒")
+_SKIPPED = re.compile(r"❌ (\S+) (通訊失敗|前置動作失敗|無法抵達|看門狗中止)，跳過此測試點")
+_COMPLETED = re.compile(r"\[Main\] ✅ (\S+) 測試完成，總耗時: ([\d.]+) 秒")
+
+STATION_FIELDS = ["file", "date", "test_type", "round", "angle", "point", "attempts", "retries",
+                  "handshake_sec", "skipped", "skip_reason", "total_sec"]
+
+
+def angle_from_name(name):
+    """舊版輪盤 LOG 只有角度名稱：正前方 → 0、左45° → 45、右90° → -90"""
+    if "正前方" in name:
+        return 0
+    match = re.search(r"([左右])(\d+)°", name)
+    if match:
+        return int(match.group(2)) * (1 if match.group(1) == "左" else -1)
+    return None
+
+
+def parse_file(path):
+    """
+    逐行解析單一 LOG 檔（不整檔讀入），回傳每站紀錄列表
+    站點以「指派送餐機前往」開始，以「測試完成」或「跳過此測試點」結束
+    """
+    name = os.path.basename(path)
+    match = _FILENAME.search(name)
+    date, test_type = (match.group(1), match.group(2)) if match else (None, None)
+    stations = []
+    current = None
+    round_index, angle = None, None
+
+    def close(station):
+        if station is not None and (station["total_sec"] is not None or station["skipped"]):
+            stations.append(station)
+
+    with open(path, encoding="utf-8", errors="replace") as f:
+        for line in f:
+            line = _TIMESTAMP.sub("", line.rstrip("\n"), count=1)
+            if not line:
+                continue
+
+            m = _DISPATCH.search(line)
+            if m:
+                close(current)
+                current = {"file": name, "date": date, "test_type": test_type, "round": round_index,
+                           "angle": angle, "point": m.group(1), "attempts": 0, "retries": 0,
+                           "handshake_sec": None, "skipped": False, "skip_reason": None, "total_sec": None}
+                continue
+
+            m = _ROUND.search(line)
+            if m:
+                round_index = int(m.group(1))
+                continue
+            m = _ANGLE_ROUND.search(line)
+            if m:
+                round_index, angle = int(m.group(1)), angle_from_name(m.group(2))
+                continue
+            m = _ANGLE_TARGET.search(line)
+            if m:
+                angle = int(m.group(1))
+                continue
+
+            if current is None:
+                continue
+            m = _ATTEMPT.search(line)
+            if m:
+                current["attempts"] = int(m.group(1))
+                continue
+            if _ATTEMPT_FAILED.search(line):
+                current["retries"] += 1
+                continue
+            m = _HANDSHAKE.search(line)
+            if m:
+                current["handshake_sec"] = float(m.group(1))
+                continue
+            m = _SKIPPED.search(line)
+            if m:
+                current["skipped"], current["skip_reason"] = True, m.group(2)
+                close(current)
+                current = None
+                continue
+            m = _COMPLETED.search(line)
+            if m:
+                current["total_sec"] = float(m.group(2))
+                close(current)
+                current = None
+    close(current)
+    return stations
+
+
+def expand_paths(paths):
+    """檔案 / 資料夾 / 萬用字元（Windows CMD 不會自動展開）→ LOG 檔列表"""
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files += glob.glob(os.path.join(path, "*_LOG_*.txt"))
+        elif any(ch in path for ch in "*?["):
+            files += glob.glob(path)
+        else:
+            files.append(path)
+    return sorted(set(files))
+
+
+def _in_range(path, since, until):
+    match = _FILENAME.search(os.path.basename(path))
+    if not match:
+        return since is None and until is None
+    date = match.group(1)
+    return (since is None or date >= since) and (until is None or date < until)
+
+
+def iter_stations(files, jobs=None):
+    """平行解析多個檔案（每個行程一次處理一檔），依完成順序產生每站紀錄"""
+    jobs = jobs or min(len(files), os.cpu_count() or 1)
+    if jobs <= 1 or len(files) <= 1:
+        for path in files:
+            yield from parse_file(path)
+        return
+    with multiprocessing.Pool(jobs) as pool:
+        for stations in pool.imap_unordered(parse_file, files):
+            yield from stations
+
+
+GROUP_KEYS = {
+    "point-angle": ("point", "angle"),
+    "point": ("point",),
+    "angle": ("angle",),
+    "file": ("file",),
+}
+
+SUMMARY_FIELDS = ["stations", "skipped", "skip_rate", "retries", "retry_rate",
+                  "handshake_p50", "handshake_p90", "handshake_p95", "handshake_p99", "handshake_max",
+                  "total_p50", "total_p90", "total_max"]
+
+
+def aggregate(stations, group_by="point-angle"):
+    """依群組彙總，回傳列表（每列含群組鍵與 SUMMARY_FIELDS）"""
+    keys = GROUP_KEYS[group_by]
+    groups = {}
+    for station in stations:
+        key = tuple(station[k] for k in keys)
+        group = groups.setdefault(key, {"stations": 0, "skipped": 0, "retries": 0, "handshake": [], "total": []})
+        group["stations"] += 1
+        group["skipped"] += station["skipped"]
+        group["retries"] += station["retries"]
+        if station["handshake_sec"] is not None:
+            group["handshake"].append(station["handshake_sec"])
+        if station["total_sec"] is not None:
+            group["total"].append(station["total_sec"])
+
+    def sort_key(item):
+        return tuple((value is None, _point_order(value) if k == "point" else value)
+                     for k, value in zip(keys, item[0]))
+
+    rows = []
+    for key, group in sorted(groups.items(), key=sort_key):
+        handshake, total = sorted(group["handshake"]), sorted(group["total"])
+        row = dict(zip(keys, key))
+        row.update({
+            "stations": group["stations"],
+            "skipped": group["skipped"],
+            "skip_rate": group["skipped"] / group["stations"],
+            "retries": group["retries"],
+            "retry_rate": group["retries"] / group["stations"],
+            "handshake_p50": percentile(handshake, 50),
+            "handshake_p90": percentile(handshake, 90),
+            "handshake_p95": percentile(handshake, 95),
+            "handshake_p99": percentile(handshake, 99),
+            "handshake_max": handshake[-1] if handshake else None,
+            "total_p50": percentile(total, 50),
+            "total_p90": percentile(total, 90),
+            "total_max": total[-1] if total else None,
+        })
+        rows.append(row)
+    return rows
+
+
+def _point_order(point):
+    """'10m' 排在 '9m' 之後"""
+    match = re.search(r"(\d+)", str(point))
+    return (int(match.group(1)) if match else 0, str(point))
+
+
+def _round(value):
+    return round(value, 3) if isinstance(value, float) else value
+
+
+def write_csv(rows, fields, stream):
+    writer = csv.DictWriter(stream, fieldnames=fields, extrasaction="ignore", lineterminator="\n")
+    writer.writeheader()
+    for row in rows:
+        writer.writerow({k: _round(v) for k, v in row.items()})
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description="U3 歷史 LOG 分析（HC-12 通訊耗時 / 重試 / 跳過 / 站點耗時）")
+    parser.add_argument("paths", nargs="+", help="LOG 檔、資料夾或萬用字元")
+    parser.add_argument("--since", help="起始日期（依檔名），例如 2025-07-01")
+    parser.add_argument("--until", help="結束日期（不含）")
+    parser.add_argument("--group-by", choices=sorted(GROUP_KEYS), default="point-angle")
+    parser.add_argument("--format", choices=["csv", "json"], default="csv")
+    parser.add_argument("-o", "--output", help="輸出檔（預設印到畫面）")
+    parser.add_argument("--stations", help="另存每站明細 CSV")
+    parser.add_argument("--jobs", type=int, help="平行行程數（預設 CPU 核心數）")
+    args = parser.parse_args(argv)
+
+    files = [f for f in expand_paths(args.paths) if _in_range(f, args.since, args.until)]
+    if not files:
+        print("❌ 找不到符合條件的 LOG 檔", file=sys.stderr)
+        return 1
+
+    stations = list(iter_stations(files, args.jobs))
+    rows = aggregate(stations, args.group_by)
+    print(f"📄 {len(files)} 個 LOG 檔，{len(stations)} 個站點", file=sys.stderr)
+
+    if args.stations:
+        with open(args.stations, "w", newline="", encoding="utf-8-sig") as f:
+            write_csv(stations, STATION_FIELDS, f)
+
+    output = open(args.output, "w", newline="", encoding="utf-8-sig" if args.format == "csv" else "utf-8") \
+        if args.output else sys.stdout
+    try:
+        if args.format == "json":
+            json.dump([{k: _round(v) for k, v in row.items()} for row in rows], output, ensure_ascii=False, indent=2)
+            output.write("\n")
+        else:
+            write_csv(rows, list(GROUP_KEYS[args.group_by]) + SUMMARY_FIELDS, output)
+    finally:
+        if output is not sys.stdout:
+            output.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
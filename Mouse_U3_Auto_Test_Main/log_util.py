@@ -1,24 +1,233 @@
 # ============================================
 # 📌 LOG 控制模組 - log_util.py（自動避開重複命名）
 # 功能：建立 LOG 檔並避免覆蓋，輸出 CMD 與檔案同步紀錄
+#       呼叫端只負責排入佇列，由背景執行緒批次寫入：
+#       - 文字 LOG（每行附時間）
+#       - JSONL 結構化紀錄（單調時間、元件標籤、等級）
 # ============================================
 
 import os
+import re
+import sys
+import json
+import time
+import queue
+import atexit
 import datetime
+import threading
 
-def init_log(test_type="Mouse_Test", base_path="."):
+_TAG_PATTERN = re.compile(r"^\s*\[([^\]]+)\]")
+
+
+def classify(msg):
+    """由訊息內容推斷 (等級, 元件)：'[HC-12] ❌ ...' → ('ERROR', 'HC-12')"""
+    match = _TAG_PATTERN.match(msg)
+    component = match.group(1) if match else "Main"
+    if component == "DEBUG" or "ℹ️" in msg:
+        level = "DEBUG"
+    elif "❌" in msg:
+        level = "ERROR"
+    elif "⚠️" in msg or "⏰" in msg:
+        level = "WARNING"
+    else:
+        level = "INFO"
+    return level, component
+
+
+def default_log_dir(base_path=None):
+    """
+    LOG 資料夾：主程式上層的 LOG（base_path 未指定 = 本檔所在資料夾）
+    可用環境變數 U3_LOG_DIR 覆寫（例如基準測試寫入暫存資料夾，不影響實機的測試紀錄與進度學習）
+    """
+    if os.environ.get("U3_LOG_DIR"):
+        return os.path.abspath(os.environ["U3_LOG_DIR"])
+    base_path = base_path or os.path.dirname(os.path.abspath(__file__))
+    return os.path.abspath(os.path.join(base_path, "..", "LOG"))
+
+
+class LogWriter:
+    """
+    背景 LOG 寫入器
+    - emit()/write_raw() 只把紀錄放進佇列，不做任何 I/O
+    - 背景執行緒印到 CMD，並在累積超過 flush_bytes 或距上次寫入超過 flush_interval 秒時批次寫檔
+    - flush() 會等待佇列內容全部落地；close() 寫完後關閉檔案
+    - close() 之後的紀錄（背景截圖 / 判讀回呼、代理程式結束訊息）改為同步附加寫入，不會遺失
+    """
+
+    def __init__(self, text_path, jsonl_path, flush_bytes=64 * 1024, flush_interval=0.5, console=True):
+        self.text_path = text_path
+        self.jsonl_path = jsonl_path
+        self.flush_bytes = flush_bytes
+        self.flush_interval = flush_interval
+        self.console = console
+        self.start_mono = time.monotonic()
+        self.queue = queue.SimpleQueue()
+        self.text_file = open(text_path, "w", encoding="utf-8")
+        self.jsonl_file = open(jsonl_path, "w", encoding="utf-8")
+        self.closed = False
+        self.lock = threading.Lock()  # close() 與 emit() 互斥：紀錄不是排在關閉標記之前，就是改為同步寫入
+        self.thread = threading.Thread(target=self._run, name="LogWriter", daemon=True)
+        self.thread.start()
+
+    # === 呼叫端（任何執行緒）===
+    def emit(self, msg, level=None, component=None):
+        auto_level, auto_component = classify(msg)
+        self._put(("record", time.monotonic(), time.time(), level or auto_level, component or auto_component, msg))
+
+    def write_raw(self, text):
+        """原樣寫入文字 LOG（不印到 CMD、不進 JSONL），相容舊的 log_file.write"""
+        self._put(("raw", text))
+
+    def _put(self, item):
+        with self.lock:
+            if not self.closed:
+                self.queue.put(item)
+                return
+        self._write_late(item)
+
+    def _write_late(self, item):
+        """已關閉：直接附加寫入檔案並印到 CMD"""
+        if item[0] == "raw":
+            text, json_line, console_line = item[1], None, None
+        else:
+            text, json_line, console_line = self._format(*item[1:])
+        try:
+            with open(self.text_path, "a", encoding="utf-8") as f:
+                f.write(text)
+            if json_line:
+                with open(self.jsonl_path, "a", encoding="utf-8") as f:
+                    f.write(json_line)
+        except OSError:
+            pass
+        if console_line and self.console:
+            sys.stdout.write(console_line)
+            sys.stdout.flush()
+
+    def _format(self, mono, wall, level, component, msg):
+        """一筆紀錄 → (文字 LOG 行, JSONL 行, CMD 行)"""
+        stamp = datetime.datetime.fromtimestamp(wall)
+        text = f"{stamp:%H:%M:%S}.{stamp.microsecond // 1000:03d} {msg}\n"
+        json_line = json.dumps({
+            "ts": stamp.isoformat(timespec="milliseconds"),
+            "mono": round(mono - self.start_mono, 6),
+            "level": level,
+            "component": component,
+            "msg": msg,
+        }, ensure_ascii=False) + "\n"
+        return text, json_line, f"{msg}\n"
+
+    def flush(self, timeout=5):
+        """等待目前佇列內容寫入檔案；已關閉時立即返回（之後的紀錄為同步寫入）"""
+        with self.lock:
+            if self.closed:
+                return
+            done = threading.Event()
+            self.queue.put(("flush", done))
+        done.wait(timeout)
+
+    def close(self, timeout=5):
+        with self.lock:
+            if self.closed:
+                return
+            self.closed = True
+            done = threading.Event()
+            self.queue.put(("close", done))
+        done.wait(timeout)
+        self.thread.join(timeout)
+
+    # === 背景執行緒 ===
+    def _run(self):
+        text_buffer, json_buffer, console_buffer = [], [], []
+        buffered_bytes = 0
+        last_flush = time.monotonic()
+
+        def write_out():
+            nonlocal buffered_bytes, last_flush
+            if console_buffer:
+                sys.stdout.write("".join(console_buffer))
+                sys.stdout.flush()
+                console_buffer.clear()
+            if text_buffer:
+                self.text_file.write("".join(text_buffer))
+                self.text_file.flush()
+                text_buffer.clear()
+            if json_buffer:
+                self.jsonl_file.write("".join(json_buffer))
+                self.jsonl_file.flush()
+                json_buffer.clear()
+            buffered_bytes = 0
+            last_flush = time.monotonic()
+
+        while True:
+            try:
+                item = self.queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                item = None
+
+            if item is not None:
+                kind = item[0]
+                if kind == "record":
+                    text, json_line, console_line = self._format(*item[1:])
+                    text_buffer.append(text)
+                    json_buffer.append(json_line)
+                    if self.console:
+                        console_buffer.append(console_line)
+                    buffered_bytes += len(text) + 64
+                elif kind == "raw":
+                    text_buffer.append(item[1])
+                    buffered_bytes += len(item[1])
+                elif kind in ("flush", "close"):
+                    write_out()
+                    if kind == "close":
+                        self.text_file.close()
+                        self.jsonl_file.close()
+                        item[1].set()
+                        return
+                    item[1].set()
+                    continue
+
+            # 主控台即時輸出，檔案依大小/時間批次寫入
+            if console_buffer and (item is None or self.queue.empty()):
+                sys.stdout.write("".join(console_buffer))
+                sys.stdout.flush()
+                console_buffer.clear()
+            if buffered_bytes >= self.flush_bytes or (time.monotonic() - last_flush) >= self.flush_interval:
+                write_out()
+
+
+class LogFile:
+    """相容舊介面的 log_file 物件（write / flush / close），實際寫入交給 LogWriter"""
+
+    def __init__(self, writer):
+        self.writer = writer
+        self.path = writer.text_path
+        self.jsonl_path = writer.jsonl_path
+
+    def write(self, text):
+        self.writer.write_raw(text)
+
+    def flush(self):
+        self.writer.flush()
+
+    def close(self):
+        self.writer.close()
+
+
+def init_log(test_type="Mouse_Test", base_path=".", console=True):
     """
     初始化 LOG 紀錄系統，根據今日日期與測試類型自動產生不重複的 LOG 檔案。
     傳回兩個物件：
-    - log_file：檔案寫入控制物件
-    - log_print(msg)：自訂的印出函式，會同時印出到畫面與 log 檔
+    - log_file：檔案寫入控制物件（write / flush / close）
+    - log_print(msg, level=None, component=None)：排入背景寫入器，
+      同時印出到畫面、寫入文字 LOG 與 JSONL（等級/元件未指定時由訊息自動判斷）
+    console=False 時只寫檔不印到畫面（例如基準測試）
     """
 
     # 取得今天日期（格式：2025-05-21），作為 LOG 檔名的一部分
     today = datetime.datetime.now().strftime("%Y-%m-%d")
 
     # 設定 LOG 存放目錄（預設為主程式上層的 LOG 資料夾）
-    log_dir = os.path.abspath(os.path.join(base_path, "../LOG"))
+    log_dir = default_log_dir(base_path)
     os.makedirs(log_dir, exist_ok=True)  # 如果資料夾不存在則自動建立
 
     # 建立遞增命名邏輯（避免重複覆蓋）
@@ -30,17 +239,19 @@ def init_log(test_type="Mouse_Test", base_path="."):
             break  # 找到第一個尚未被使用的檔名
         index += 1  # 若已存在，往下編號直到不衝突為止
 
-    # 開啟 log 檔案進行寫入（UTF-8 格式）
-    log_file = open(log_path, "w", encoding="utf-8")
+    # 啟動背景寫入器（文字 LOG + 同名 .jsonl）
+    jsonl_path = os.path.splitext(log_path)[0] + ".jsonl"
+    writer = LogWriter(log_path, jsonl_path, console=console)
+    atexit.register(writer.close)  # 程式結束前確保全部寫入
+    log_file = LogFile(writer)
 
     # 寫入開頭標記與測試類型資訊
     log_file.write(f"[LOG START] {datetime.datetime.now()}\n")
     log_file.write(f"=== 測試類型：{test_type} ===\n\n")
 
-    # 建立 log_print 函式：同時輸出到終端與檔案
-    def log_print(msg):
-        print(msg)               # 印在 CMD 螢幕
-        print(msg, file=log_file)  # 寫入 LOG 檔
+    # 建立 log_print 函式：只負責排入佇列
+    def log_print(msg, level=None, component=None):
+        writer.emit(str(msg), level, component)
 
     # 回傳 log 檔案物件 與 印出函式
     return log_file, log_print
@@ -1,82 +1,318 @@
 # ============================================
 # 📌 螢幕截圖模組 - mouse_test_screenshot.py（彈性版）
 # 功能：支援多趟測試分別儲存，向下相容未來轉盤系統
+#       截圖管線：擷取畫面進記憶體後，PNG 編碼與寫檔交給背景執行緒池
+#       可只截取 Primax 視窗 / 指定區域，並調整壓縮等級與縮圖
 # ============================================
 
+import io
 import os
+import time
 import datetime
+import threading
+import concurrent.futures
 import pyautogui
+import pygetwindow as gw
+from trace_util import get_tracer
+from config import CAPTURE_MODE, PRIMAX_WINDOW_TITLE, CAPTURE_REGION, PNG_COMPRESS_LEVEL, THUMBNAIL_SIZE
 
-def capture_and_save(filename_prefix="Mouse_Test", round_index=1, point=None, log_func=print, angle=None):
+
+def default_result_dir():
+    """截圖與判讀結果的根資料夾：主程式上層的 Result_Screen_Shot（可用環境變數 U3_RESULT_DIR 覆寫）"""
+    if os.environ.get("U3_RESULT_DIR"):
+        return os.path.abspath(os.environ["U3_RESULT_DIR"])
+    return os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "Result_Screen_Shot"))
+
+
+def find_window_region(title, log_func=print):
+    """
+    以標題關鍵字尋找視窗，回傳裁切範圍 (left, top, width, height)
+    視窗不存在或已最小化時回傳 None（改截全螢幕）
+    """
+    try:
+        windows = [w for w in gw.getWindowsWithTitle(title) if w.width > 0 and w.height > 0]
+    except Exception as e:
+        log_func(f"[Screenshot] ⚠️ 尋找視窗失敗: {e}")
+        return None
+    windows = [w for w in windows if not w.isMinimized]
+    if not windows:
+        log_func(f"[Screenshot] ⚠️ 找不到視窗 '{title}'，改截全螢幕")
+        return None
+
+    # 最大化視窗的座標可能略超出螢幕（例如 -8），裁切到螢幕範圍內
+    win = windows[0]
+    screen_width, screen_height = pyautogui.size()
+    left, top = max(win.left, 0), max(win.top, 0)
+    right, bottom = min(win.left + win.width, screen_width), min(win.top + win.height, screen_height)
+    if right <= left or bottom <= top:
+        return None
+    return (left, top, right - left, bottom - top)
+
+
+class CapturePipeline:
+    """
+    非阻塞截圖管線
+    - 擷取：單一執行緒依序擷取畫面到記憶體（保持擷取順序、越快越好）
+    - 編碼/寫檔：執行緒池進行 PNG 編碼與寫入磁碟
+    submit() 回傳 concurrent.futures.Future（結果為檔案路徑，失敗為 None），
+    future.grabbed 為「畫面已擷取」的 Future（之後即可重置測試畫面）
+    """
+
+    def __init__(self, encode_workers=2, mode="full", window_title=None, region=None,
+                 compress_level=6, thumbnail_size=None):
+        self.mode = mode                      # "window" / "region" / "full"
+        self.window_title = window_title
+        self.region = region
+        self.compress_level = compress_level
+        self.thumbnail_size = thumbnail_size
+        self.grab_executor = concurrent.futures.ThreadPoolExecutor(max_workers=1, thread_name_prefix="CaptureGrab")
+        self.encode_executor = concurrent.futures.ThreadPoolExecutor(max_workers=encode_workers, thread_name_prefix="CaptureEncode")
+        self.lock = threading.Lock()
+        self.pending = 0  # 尚未寫入完成的截圖數
+        self.stage_times = {"grab": [], "encode": [], "write": [], "analyze": []}  # 各階段耗時（秒）
+        self.analyzers = []  # 寫檔後呼叫 analyzer(image, filepath, meta)，例如 ReportRateAnalyzer
+
+    @property
+    def queue_depth(self):
+        """目前排隊或處理中的截圖數量"""
+        with self.lock:
+            return self.pending
+
+    def capture_region(self, log_func=print, window_title=None):
+        """
+        依截圖模式決定擷取範圍（None = 全螢幕）
+        window_title 指定視窗時（多 DUT 各自的 Primax，計畫檔 / config 明確設定）不論模式一律截該視窗
+        """
+        if window_title or (self.mode == "window" and self.window_title):
+            return find_window_region(window_title or self.window_title, log_func)
+        if self.mode == "region" and self.region:
+            return tuple(self.region)
+        return None
+
+    def validate(self, slot_titles=()):
+        """
+        開始測試前檢查截圖設定，不完整時拋出 ValueError（避免整輪測試都截全螢幕）
+        slot_titles：多 DUT 各 slot 的視窗標題（全部都有設定時不需要 PRIMAX_WINDOW_TITLE）
+        """
+        if self.mode == "window":
+            if self.window_title or (slot_titles and all(slot_titles)):
+                return
+            try:
+                titles = [title for title in gw.getAllTitles() if title]
+            except Exception:
+                titles = []
+            raise ValueError('CAPTURE_MODE = "window" 需設定 PRIMAX_WINDOW_TITLE（或環境變數 U3_PRIMAX_WINDOW_TITLE），'
+                             f'目前的視窗: {titles}；要截全螢幕請改為 CAPTURE_MODE = "full"')
+        if self.mode == "region" and not self.region:
+            raise ValueError('CAPTURE_MODE = "region" 需設定 CAPTURE_REGION (left, top, width, height)')
+        if self.mode not in ("window", "region", "full"):
+            raise ValueError(f"不支援的 CAPTURE_MODE: {self.mode!r}")
+
+    def _record(self, stage, elapsed):
+        with self.lock:
+            self.stage_times[stage].append(elapsed)
+
+    def stage_timings(self):
+        """各階段統計：{stage: {"count", "avg_ms", "max_ms"}}"""
+        with self.lock:
+            summary = {}
+            for stage, times in self.stage_times.items():
+                if times:
+                    summary[stage] = {
+                        "count": len(times),
+                        "avg_ms": sum(times) / len(times) * 1000,
+                        "max_ms": max(times) * 1000,
+                    }
+            return summary
+
+    def log_stats(self, log_func=print):
+        for stage, stat in self.stage_timings().items():
+            log_func(f"[Screenshot] ⏱️ {stage}: {stat['count']} 次，平均 {stat['avg_ms']:.0f} ms，最長 {stat['max_ms']:.0f} ms")
+
+    def add_analyzer(self, analyzer):
+        """加入截圖後的判讀回呼（在編碼執行緒中執行）"""
+        with self.lock:
+            self.analyzers = self.analyzers + [analyzer]
+
+    def remove_analyzer(self, analyzer):
+        """移除判讀回呼（每次測試結束時移除，同一程序執行多筆測試時不會重複判讀）"""
+        with self.lock:
+            self.analyzers = [a for a in self.analyzers if a is not analyzer]
+
+    def submit(self, filepath, log_func=print, meta=None, window_title=None):
+        """排入一張截圖，立即回傳 Future（不阻塞呼叫端）；meta 會傳給判讀回呼"""
+        result = concurrent.futures.Future()
+        result.grabbed = concurrent.futures.Future()
+        with self.lock:
+            self.pending += 1
+        self.grab_executor.submit(self._grab, filepath, result, log_func, meta, window_title)
+        return result
+
+    def _finish(self, result, value):
+        with self.lock:
+            self.pending -= 1
+        if not result.grabbed.done():
+            result.grabbed.set_result(False)
+        result.set_result(value)
+
+    def _grab(self, filepath, result, log_func, meta, window_title=None):
+        with get_tracer().span("grab", track=threading.current_thread().name, file=os.path.basename(filepath)):
+            try:
+                start = time.perf_counter()
+                log_func("[Screenshot] 開始截圖...")
+                region = self.capture_region(log_func, window_title)
+                image = pyautogui.screenshot(region=region) if region else pyautogui.screenshot()
+                log_func(f"[Screenshot] 擷取範圍: {region if region else '全螢幕'}")
+                self._record("grab", time.perf_counter() - start)
+                result.grabbed.set_result(True)
+                self.encode_executor.submit(self._encode_and_write, image, filepath, result, log_func, meta)
+            except Exception as e:
+                import traceback
+                log_func(f"[Screenshot] ❌ 截圖失敗: {e}")
+                log_func(f"[Screenshot] 錯誤詳情: {traceback.format_exc()}")
+                self._finish(result, None)
+
+    def _encode_and_write(self, image, filepath, result, log_func, meta):
+        with get_tracer().span("encode_write", track=threading.current_thread().name, file=os.path.basename(filepath)):
+            try:
+                start = time.perf_counter()
+                buffer = io.BytesIO()
+                image.save(buffer, format="PNG", compress_level=self.compress_level)
+                data = buffer.getvalue()
+                self._record("encode", time.perf_counter() - start)
+
+                start = time.perf_counter()
+                with open(filepath, "wb") as f:
+                    f.write(data)
+                if self.thumbnail_size:
+                    self._save_thumbnail(image, filepath)
+                self._record("write", time.perf_counter() - start)
+                log_func("[Screenshot] 截圖完成")
+
+                # 驗證檔案
+                try:
+                    file_size = os.path.getsize(filepath)
+                    log_func(f"[Python Screenshot] 🖼️ Saved to: {filepath}")
+                    log_func(f"[Screenshot] 檔案大小: {file_size:,} bytes")
+                except OSError:
+                    log_func(f"[Python Screenshot] 🖼️ Saved to: {filepath}")
+
+                # 判讀結果（使用記憶體中的影像，不必重新讀檔）
+                for analyzer in self.analyzers:
+                    start = time.perf_counter()
+                    try:
+                        analyzer(image, filepath, meta)
+                    except Exception as e:
+                        log_func(f"[Screenshot] ⚠️ 結果判讀失敗: {e}")
+                    self._record("analyze", time.perf_counter() - start)
+                self._finish(result, filepath)
+            except Exception as e:
+                import traceback
+                log_func(f"[Screenshot] ❌ 截圖存檔失敗: {e}")
+                log_func(f"[Screenshot] 錯誤詳情: {traceback.format_exc()}")
+                self._finish(result, None)
+
+    def _save_thumbnail(self, image, filepath):
+        """縮圖存到同資料夾下的 thumbnails/，檔名與原圖相同"""
+        thumb_dir = os.path.join(os.path.dirname(filepath), "thumbnails")
+        os.makedirs(thumb_dir, exist_ok=True)
+        thumb = image.copy()
+        thumb.thumbnail(tuple(self.thumbnail_size))
+        thumb.save(os.path.join(thumb_dir, os.path.basename(filepath)), format="PNG", compress_level=self.compress_level)
+
+    def shutdown(self, wait=True):
+        self.grab_executor.shutdown(wait=wait)
+        self.encode_executor.shutdown(wait=wait)
+
+
+_pipeline = None
+
+def get_capture_pipeline():
+    """取得共用的截圖管線（第一次使用時建立）"""
+    global _pipeline
+    if _pipeline is None:
+        _pipeline = CapturePipeline(mode=CAPTURE_MODE, window_title=PRIMAX_WINDOW_TITLE, region=CAPTURE_REGION,
+                                    compress_level=PNG_COMPRESS_LEVEL, thumbnail_size=THUMBNAIL_SIZE)
+    return _pipeline
+
+
+def build_result_path(filename_prefix="Mouse_Test", round_index=1, point=None, log_func=print, angle=None, dut=None):
     """
-    彈性截圖系統：
+    依趟數或角度建立結果資料夾並回傳截圖檔案路徑：
     - round_index: 測試趟數 (1, 2, 3...) 或未來的角度 (0, 45, 90, 135, 180)
     - point: 測試點名稱 (1m, 2m, 3m...)
     - angle: 可選參數，未來轉盤系統使用
+    - dut: 多 DUT 同站測試時的裝置名稱（加在檔名測試點之前）
     
     資料夾命名邏輯：
     - 現在：20250619_Mouse_Test_Result_1, Result_2, Result_3...
     - 未來：20250619_Mouse_Test_Angle_0, Angle_45, Angle_90...
     """
+    # 產生時間戳記
+    now = datetime.datetime.now()
+    today = now.strftime("%Y%m%d")
+    timestamp = now.strftime("%H%M%S")
+    
+    # 設定基礎路徑
+    base_result_dir = default_result_dir()
+    
+    # 🔧 彈性資料夾命名系統
+    if angle is not None:
+        # 未來轉盤系統：以角度命名
+        folder_suffix = f"Angle_{angle}"
+        log_func(f"[Screenshot] 轉盤模式 - 角度: {angle}度")
+    else:
+        # 現在多趟系統：以趟數命名
+        folder_suffix = f"Result_{round_index}"
+        log_func(f"[Screenshot] 多趟模式 - 第 {round_index} 趟")
+    
+    # 建立資料夾
+    folder_name = f"{today}_{filename_prefix}_{folder_suffix}"
+    result_folder_path = os.path.join(base_result_dir, folder_name)
+    
+    log_func(f"[Screenshot] 目標資料夾: {result_folder_path}")
+    os.makedirs(result_folder_path, exist_ok=True)
+    
+    # 🔧 檔案命名系統（多 DUT 時測試點前加上裝置名稱：..._U3-A_1m_R1_143052.png）
+    point_tag = f"{dut}_{point}" if dut else point
+    if angle is not None:
+        # 轉盤系統檔名：20250619_Mouse_Test_1m_90deg_143052.png（每個角度多趟時加上趟次：..._90deg_R2_143052.png）
+        round_tag = f"_R{round_index}" if round_index is not None else ""
+        filename = f"{today}_{filename_prefix}_{point_tag}_{angle}deg{round_tag}_{timestamp}.png"
+    else:
+        # 多趟系統檔名：20250619_Mouse_Test_1m_R1_143052.png
+        filename = f"{today}_{filename_prefix}_{point_tag}_R{round_index}_{timestamp}.png"
+    
+    log_func(f"[Screenshot] 檔案名稱: {filename}")
+    return os.path.join(result_folder_path, filename)
+
+
+def submit_capture(filename_prefix="Mouse_Test", round_index=1, point=None, log_func=print, angle=None,
+                   dut=None, window_title=None):
+    """
+    非阻塞截圖：立即回傳 Future（結果為檔案路徑，失敗為 None）
+    給 asyncio 主程式使用，可搭配 asyncio.wrap_future 等待
+    dut / window_title：多 DUT 時由 StationScheduler 帶入（檔名加上裝置名稱、截取該裝置的 Primax 視窗）
+    """
     try:
-        # 產生時間戳記
-        now = datetime.datetime.now()
-        today = now.strftime("%Y%m%d")
-        timestamp = now.strftime("%H%M%S")
-        
-        # 設定基礎路徑
-        current_dir = os.path.dirname(os.path.abspath(__file__))
-        parent_dir = os.path.abspath(os.path.join(current_dir, ".."))
-        base_result_dir = os.path.join(parent_dir, "Result_Screen_Shot")
-        
-        # 🔧 彈性資料夾命名系統
-        if angle is not None:
-            # 未來轉盤系統：以角度命名
-            folder_suffix = f"Angle_{angle}"
-            log_func(f"[Screenshot] 轉盤模式 - 角度: {angle}度")
-        else:
-            # 現在多趟系統：以趟數命名
-            folder_suffix = f"Result_{round_index}"
-            log_func(f"[Screenshot] 多趟模式 - 第 {round_index} 趟")
-        
-        # 建立資料夾
-        folder_name = f"{today}_{filename_prefix}_{folder_suffix}"
-        result_folder_path = os.path.join(base_result_dir, folder_name)
-        
-        log_func(f"[Screenshot] 目標資料夾: {result_folder_path}")
-        os.makedirs(result_folder_path, exist_ok=True)
-        
-        # 🔧 檔案命名系統
-        if angle is not None:
-            # 轉盤系統檔名：20250619_Mouse_Test_1m_90deg_143052.png
-            filename = f"{today}_{filename_prefix}_{point}_{angle}deg_{timestamp}.png"
-        else:
-            # 多趟系統檔名：20250619_Mouse_Test_1m_R1_143052.png
-            filename = f"{today}_{filename_prefix}_{point}_R{round_index}_{timestamp}.png"
-        
-        filepath = os.path.join(result_folder_path, filename)
-        log_func(f"[Screenshot] 檔案名稱: {filename}")
-        
-        # 執行截圖
-        log_func("[Screenshot] 開始截圖...")
-        pyautogui.screenshot(filepath)
-        log_func("[Screenshot] 截圖完成")
-        
-        # 驗證檔案
-        try:
-            file_size = os.path.getsize(filepath)
-            log_func(f"[Python Screenshot] 🖼️ Saved to: {filepath}")
-            log_func(f"[Screenshot] 檔案大小: {file_size:,} bytes")
-        except:
-            log_func(f"[Python Screenshot] 🖼️ Saved to: {filepath}")
-        
-        return filepath  # 回傳檔案路徑供後續使用
-        
+        filepath = build_result_path(filename_prefix, round_index, point, log_func, angle, dut)
     except Exception as e:
-        import traceback
-        log_func(f"[Screenshot] ❌ 截圖失敗: {e}")
-        log_func(f"[Screenshot] 錯誤詳情: {traceback.format_exc()}")
-        return None
+        log_func(f"[Screenshot] ❌ 建立資料夾失敗: {e}")
+        failed = concurrent.futures.Future()
+        failed.grabbed = failed
+        failed.set_result(None)
+        return failed
+    meta = {"test_type": filename_prefix, "round": round_index, "angle": angle, "point": point, "dut": dut}
+    return get_capture_pipeline().submit(filepath, log_func=log_func, meta=meta, window_title=window_title)
+
+
+def capture_and_save(filename_prefix="Mouse_Test", round_index=1, point=None, log_func=print, angle=None):
+    """
+    彈性截圖系統（同步介面）：
+    建立於截圖管線之上，等待寫檔完成後回傳檔案路徑（失敗回傳 None）
+    參數與資料夾/檔案命名規則同 build_result_path
+    """
+    return submit_capture(filename_prefix, round_index, point, log_func, angle).result()
 
 # 🔧 未來轉盤系統的輔助函式
 def capture_with_angle(filename_prefix="Mouse_Test", angle=0, point=None, log_func=print):
@@ -0,0 +1,399 @@
+# =============================================
+# 🔹 進度與完成時間估計 - progress_model.py
+# 功能：以本次與過去測試（run_index）的實測時間學習各階段耗時
+#       （每段行駛依起點 → 終點分開、握手、測試、回穩 / 停留、輪盤等待、截圖），
+#       每站開始 / 結束時更新剩餘站數與預計完成時間（含信賴區間）：
+#   - LOG 與 cmd 視窗標題：[Progress] 📈 23/50 站 (46%)｜剩 27 站 約 0:41:10｜ETA 03:12 (02:58 ~ 03:31)
+#   - 狀態檔 ../LOG/<測試類型>_status.json：其他工具可定時讀取（先寫暫存檔再取代，不會讀到寫一半的檔案）
+#   python progress_model.py                 # 顯示所有測試的目前狀態
+#   python progress_model.py --watch 30      # 每 30 秒更新一次
+# =============================================
+
+import os
+import sys
+import glob
+import json
+import math
+import time
+import argparse
+import datetime
+import statistics
+import collections
+from clock_util import get_clock
+from route_planner import point_position
+from campaign_watchdog import TravelEstimator
+from campaign_plan import format_duration
+from log_util import default_log_dir
+
+PHASE_NAMES = {"handshake": "握手", "test": "測試", "other": "回穩/停留", "rotation": "輪盤等待",
+               "gap": "站間", "capture": "截圖"}
+
+
+def default_status_path(test_type):
+    """../LOG/<測試類型>_status.json（每種測試一份，測試結束後保留最後狀態）"""
+    return os.path.join(default_log_dir(), f"{test_type}_status.json")
+
+
+class PhaseSamples:
+    """
+    單一階段的實測秒數
+    - 本次測試累積 min_current 筆後只用本次的實測，之前與過去測試的紀錄合併計算
+    - 沒有任何實測時使用 prior（計畫的預估值），變動量假設為 prior × spread
+    - 平均值的不確定性最多以 max_effective 筆計算（過去測試的環境不盡相同，筆數多不代表平均一定準）
+    """
+
+    max_effective = 10
+
+    def __init__(self, prior, spread=0.2, min_current=3, history=200):
+        self.prior = prior
+        self.spread = spread
+        self.min_current = min_current
+        self.history = collections.deque(maxlen=history)
+        self.current = collections.deque(maxlen=history)
+
+    def add(self, value, current=True):
+        if value is not None and value >= 0:
+            (self.current if current else self.history).append(value)
+
+    def _pool(self):
+        return self.current if len(self.current) >= self.min_current else list(self.history) + list(self.current)
+
+    @property
+    def n(self):
+        return len(self._pool())
+
+    def mean(self):
+        pool = self._pool()
+        return statistics.fmean(pool) if pool else self.prior
+
+    def variance(self):
+        pool = self._pool()
+        if len(pool) >= 2:
+            return statistics.variance(pool)
+        return (self.mean() * self.spread) ** 2
+
+    def total(self, count):
+        """
+        count 次的合計，回傳 (平均, 變異數)：
+        每次的隨機變動（count × σ²）加上平均值本身的不確定性（count² × σ² / n，樣本少時較大）
+        """
+        if not count:
+            return 0.0, 0.0
+        var = self.variance()
+        mean_var = var / min(self.n, self.max_effective) if self.n else var
+        return self.mean() * count, count * var + count * count * mean_var
+
+    def summary(self):
+        return {"mean": round(self.mean(), 2), "stdev": round(math.sqrt(self.variance()), 2), "n": self.n}
+
+
+class ProgressModel:
+    """
+    測試進度模型
+    - start(tasks)：本次要執行的站點（ExecutionPlan.remaining 的結果）
+    - begin(task)：站點開始；station_listener()：給 StationScheduler.add_listener，站點結束時學習並更新
+    - estimate()：剩餘時間 (平均, 下限, 上限)，信賴區間依 confidence（常態近似）
+    """
+
+    def __init__(self, plan, test_type, status_path=None, confidence=0.9, clock=None, log_func=print):
+        self.plan = plan
+        self.test_type = test_type
+        self.status_path = status_path
+        self.z = statistics.NormalDist().inv_cdf((1 + confidence) / 2)
+        self.confidence = confidence
+        self.clock = clock or get_clock()
+        self.log = log_func
+        est, timing = plan.estimate, plan.timing
+        self.travel_model = TravelEstimator(base_sec=est["travel_base_sec"], sec_per_meter=est["travel_sec_per_meter"]).model
+        test_sec = min(est["test_sec"], timing["test_duration"])
+        rotations = plan.transitions["rotation"]
+        self.phases = {
+            "handshake": PhaseSamples(est["handshake_sec"]),
+            "test": PhaseSamples(test_sec),
+            "other": PhaseSamples(timing["settle_sec"] + max(timing["min_dwell_sec"] - test_sec, 0)),
+            "rotation": PhaseSamples(plan.phases["rotation"] / rotations if rotations else 0),
+            "gap": PhaseSamples(0),             # 上一站結束到下一站開始（截圖排程、Sikuli 等站點外的時間）
+            "capture": PhaseSamples(2),
+        }
+        self.travel = {}                        # (起點, 終點) → PhaseSamples
+        self.travel_ratio = PhaseSamples(1.0)   # 實測 / 距離模型（沒有實測的路段用此修正）
+        self.position, self.angle = 0, None     # 小智位置（測試點編號，出餐點 = 0）與輪盤角度
+        self.campaign_id = None
+        self.tasks = []
+        self.current = None                     # 執行中的站點
+        self.last_seq = 0                       # 最後一個已開始的站點序號
+        self.last_station = None                # 多 DUT 時同一站只學習一次
+        self.started = None
+        self.last_end = None                    # 上一站結束的時間（測試時鐘）
+        self.initial_estimate = None
+        self.state = "pending"
+
+    # === 學習 ===
+    def _add_travel(self, start, end, elapsed, current=True):
+        if elapsed is None:
+            return
+        if (start, end) not in self.travel:
+            self.travel[(start, end)] = PhaseSamples(self.travel_model(start, end))
+        self.travel[(start, end)].add(elapsed, current)
+        self.travel_ratio.add(elapsed / self.travel_model(start, end), current)
+
+    def observe(self, record, current=True):
+        """
+        學習一站的實測時間（record：StationScheduler 的站點紀錄，或 run_index 換算後的同格式 dict）
+        回傳是否為新的站點（多 DUT 時每個 slot 各呼叫一次，只學習第一次）
+        """
+        key = (record.get("point"), record.get("started_at"), record.get("total_sec"))
+        if key == self.last_station:
+            return False
+        self.last_station = key
+        timings = record.get("timings") or {}
+        end = point_position(record.get("point"))
+        travel = timings.get("travel")
+        self._add_travel(self.position, end, travel, current)
+        self.position = end
+        angle = record.get("angle")
+        prerequisite = timings.get("prerequisite") or 0
+        if angle is not None and angle != self.angle:
+            self.phases["rotation"].add(prerequisite, current)
+            self.angle = angle
+        handshake, test, total = timings.get("handshake"), timings.get("test"), record.get("total_sec")
+        self.phases["handshake"].add(handshake, current)
+        self.phases["test"].add(test, current)
+        if None not in (travel, handshake, test, total):
+            self.phases["other"].add(max(total - travel - handshake - test - prerequisite, 0), current)
+        if current and total is not None:
+            now = self.clock.time()
+            self.phases["gap"].add(now - total - self.last_end)
+            self.last_end = now
+        return True
+
+    def learn_history(self, rows, max_gap_sec=600):
+        """
+        以 run_index 的站點紀錄學習（依測試紀錄、序號排列；每筆測試紀錄從出餐點開始）
+        站間時間由相鄰站點的開始時間推算（實際時間，時間倍率模擬時略過；超過 max_gap_sec 視為中斷續跑）
+        """
+        campaign = previous = None
+        for row in rows:
+            if row["campaign_id"] != campaign:
+                campaign, previous = row["campaign_id"], None
+                self.position, self.angle, self.last_station = 0, None, None
+            record = {"point": row["point"], "started_at": row["started_at"], "angle": row["angle"],
+                      "total_sec": row["total_sec"],
+                      "timings": {"travel": row["travel_sec"], "handshake": row["handshake_sec"],
+                                  "test": row["test_sec"]}}
+            if not self.observe(record, current=False):
+                continue
+            self.phases["capture"].add(row["capture_sec"], current=False)
+            started = datetime.datetime.fromisoformat(row["started_at"])
+            if previous is not None and previous[1] is not None and not self.clock.scaled:
+                gap = (started - previous[0]).total_seconds() - previous[1]
+                if gap <= max_gap_sec:
+                    self.phases["gap"].add(max(gap, 0), current=False)
+            previous = (started, row["total_sec"])
+        self.position, self.angle, self.last_station = 0, None, None
+        return len(rows)
+
+    # === 估計 ===
+    def _travel_total(self, pair, count):
+        samples = self.travel.get(pair)
+        if samples is not None and samples.n:
+            return samples.total(count)
+        model = self.travel_model(*pair)
+        mean, var = self.travel_ratio.total(count)
+        return mean * model, var * model * model
+
+    def remaining_tasks(self):
+        """尚未完成的站點（執行中的站點算在內）"""
+        if self.current is not None:
+            return [task for task in self.tasks if task.seq >= self.current.seq]
+        return [task for task in self.tasks if task.seq > self.last_seq]
+
+    def estimate(self, tasks=None):
+        """剩餘時間（秒，測試時鐘）：回傳 (平均, 下限, 上限, 各階段平均)"""
+        tasks = self.remaining_tasks() if tasks is None else tasks
+        pairs = collections.Counter()
+        rotations = 0
+        position = self.position
+        for task in tasks:
+            pairs[(position, task.position)] += 1
+            position = task.position
+            if task.rotate_to is not None and task.rotate_to != self.angle:
+                rotations += 1
+        pairs[(position, 0)] += 1               # 返航
+        parts = {"travel": [sum(values) for values in zip(*(self._travel_total(pair, count)
+                                                             for pair, count in pairs.items()))]}
+        for name in ("handshake", "test", "other", "gap"):
+            parts[name] = list(self.phases[name].total(len(tasks)))
+        parts["rotation"] = list(self.phases["rotation"].total(rotations))
+        parts["capture"] = list(self.phases["capture"].total(1 if tasks else 0))  # 最後一站的截圖（其餘與行駛重疊）
+        mean = sum(part[0] for part in parts.values())
+        spread = self.z * math.sqrt(sum(part[1] for part in parts.values()))
+        return mean, max(mean - spread, 0), mean + spread, {name: part[0] for name, part in parts.items()}
+
+    # === 測試流程呼叫 ===
+    def start(self, campaign_id, tasks):
+        self.campaign_id = campaign_id
+        self.tasks = list(tasks)
+        self.started = self.last_end = self.clock.time()
+        self.state = "running"
+        self.initial_estimate = self.estimate()[0]
+        self.update(log=True)
+
+    def begin(self, task):
+        self.current = task
+        self.last_seq = task.seq
+        self.update()
+
+    def station_listener(self):
+        """給 StationScheduler.add_listener 使用：學習此站的實測時間並更新 ETA，截圖完成後學習截圖耗時"""
+        def on_station(station):
+            if not self.observe(station):
+                return
+            if self.current is not None and self.current.point == station.get("point"):
+                self.current = None
+            capture_task = station.get("capture_task")
+            if capture_task is not None:
+                capture_started = station.get("capture_started", self.clock.time())
+                capture_task.add_done_callback(
+                    lambda task: task.cancelled() or self.phases["capture"].add(self.clock.time() - capture_started))
+            self.update(log=True)
+        return on_station
+
+    def finish(self, state="completed"):
+        if self.state != "running":
+            return
+        self.state = state
+        if state == "completed":
+            self.current = None
+            self.last_seq = self.tasks[-1].seq if self.tasks else 0
+            elapsed = self.clock.time() - self.started
+            if self.initial_estimate:
+                error = (elapsed - self.initial_estimate) / self.initial_estimate * 100
+                self.log(f"[Progress] 🏁 實際 {format_duration(elapsed)}，開始時預估 "
+                         f"{format_duration(self.initial_estimate)}（誤差 {error:+.0f}%）")
+            averages = "、".join(f"{PHASE_NAMES[name]} {samples.mean():.1f} 秒" for name, samples in self.phases.items()
+                                 if samples.n)
+            self.log(f"[Progress] 📋 每站實測平均：{averages}；行駛為距離模型的 {self.travel_ratio.mean():.2f} 倍")
+        self.update()
+
+    # === 輸出 ===
+    def snapshot(self):
+        """目前狀態（寫入狀態檔的內容；時間為實際時間，已換算時間倍率）"""
+        remaining = self.remaining_tasks()
+        mean, low, high, parts = self.estimate(remaining) if remaining and self.state == "running" else (0, 0, 0, {})
+        now = datetime.datetime.now()
+
+        def at(seconds):
+            return (now + datetime.timedelta(seconds=self.clock.to_real(seconds))).isoformat(timespec="seconds")
+
+        total = len(self.plan.tasks)
+        current = self.current._asdict() if self.current is not None else None
+        return {
+            "test_type": self.test_type, "campaign_id": self.campaign_id, "plan": self.plan.name,
+            "state": self.state, "pid": os.getpid(), "updated_at": now.isoformat(timespec="seconds"),
+            "stations_total": total, "stations_done": total - len(remaining), "stations_left": len(remaining),
+            "current": current and {k: current[k] for k in ("seq", "round_index", "angle", "point")},
+            "elapsed_sec": round(self.clock.time() - self.started, 1) if self.started is not None else 0,
+            "remaining_sec": round(mean, 1), "remaining_low_sec": round(low, 1), "remaining_high_sec": round(high, 1),
+            "confidence": self.confidence, "eta": at(mean), "eta_low": at(low), "eta_high": at(high),
+            "remaining_phases": {name: round(value, 1) for name, value in parts.items()},
+            "phases": {name: samples.summary() for name, samples in self.phases.items()},
+            "travel_ratio": self.travel_ratio.summary(),
+        }
+
+    def update(self, log=False):
+        status = self.snapshot()
+        line = format_status(status)
+        if log:
+            self.log(f"[Progress] {line}")
+        _set_console_title(f"U3 {line}")
+        self.save(status)
+
+    def save(self, status):
+        """先寫暫存檔再取代，讀取端不會讀到寫一半的檔案"""
+        if self.status_path is None:
+            return
+        os.makedirs(os.path.dirname(self.status_path), exist_ok=True)
+        tmp = self.status_path + ".tmp"
+        try:
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(status, f, ensure_ascii=False, indent=1)
+            os.replace(tmp, self.status_path)
+        except OSError as e:
+            self.log(f"[Progress] ⚠️ 狀態檔寫入失敗: {e}")
+
+
+STATE_NAMES = {"pending": "準備中", "running": "執行中", "completed": "已完成",
+               "interrupted": "已中斷", "failed": "失敗"}
+
+
+def _clock_text(iso, today):
+    moment = datetime.datetime.fromisoformat(iso)
+    return f"{moment:%H:%M}" if moment.date() == today else f"{moment:%m/%d %H:%M}"
+
+
+def format_status(status):
+    """狀態精簡成一行（LOG、cmd 視窗標題與 python progress_model.py 共用）"""
+    done, total = status["stations_done"], status["stations_total"]
+    percent = done / total * 100 if total else 100
+    head = f"📈 {done}/{total} 站 ({percent:.0f}%)"
+    if status["state"] != "running":
+        return f"{head}｜{STATE_NAMES.get(status['state'], status['state'])}，耗時 {format_duration(status['elapsed_sec'])}"
+    today = datetime.date.today()
+    current = status.get("current")
+    where = f"｜進行中 {current['point']}" if current else ""
+    return (f"{head}｜剩 {status['stations_left']} 站 約 {format_duration(status['remaining_sec'])}{where}｜"
+            f"ETA {_clock_text(status['eta'], today)} "
+            f"({_clock_text(status['eta_low'], today)} ~ {_clock_text(status['eta_high'], today)})")
+
+
+def _set_console_title(text):
+    """Windows：cmd 視窗標題顯示目前進度（工作列即可看到 ETA）"""
+    if os.name == "nt":
+        try:
+            import ctypes
+            ctypes.windll.kernel32.SetConsoleTitleW(text)
+        except Exception:
+            pass
+
+
+def create_progress_model(plan, test_type, run_index=None, log_func=print):
+    """依 config 建立進度模型，並以 run_index 中最近幾次同類型測試的紀錄學習各階段耗時"""
+    from config import PROGRESS_HISTORY_CAMPAIGNS, PROGRESS_CONFIDENCE
+    model = ProgressModel(plan, test_type, status_path=default_status_path(test_type),
+                          confidence=PROGRESS_CONFIDENCE, log_func=log_func)
+    if run_index is not None and PROGRESS_HISTORY_CAMPAIGNS:
+        rows = model.learn_history(run_index.station_history(test_type, PROGRESS_HISTORY_CAMPAIGNS))
+        if rows:
+            log_func(f"[Progress] 📚 以過去 {rows} 站的實測時間估計（最近 {PROGRESS_HISTORY_CAMPAIGNS} 次測試）")
+    return model
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description="顯示 U3 測試進度與預計完成時間（讀取 ../LOG/*_status.json）")
+    parser.add_argument("paths", nargs="*", help="狀態檔；省略 = 所有測試類型")
+    parser.add_argument("--watch", type=float, help="每 N 秒更新一次")
+    parser.add_argument("--json", action="store_true", help="輸出完整狀態 (JSON)")
+    args = parser.parse_args(argv)
+    while True:
+        paths = args.paths or sorted(glob.glob(default_status_path("*")))
+        if not paths:
+            print("[Progress] 尚無狀態檔")
+        for path in paths:
+            try:
+                with open(path, encoding="utf-8") as f:
+                    status = json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"[Progress] ⚠️ 無法讀取 {path}: {e}")
+                continue
+            if args.json:
+                print(json.dumps(status, ensure_ascii=False, indent=1))
+            else:
+                print(f"{status['test_type']} #{status['campaign_id']} {format_status(status)}（更新於 {status['updated_at']}）")
+        if not args.watch:
+            return 0
+        time.sleep(args.watch)
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,324 @@
+# =============================================
+# 🔹 結果判讀模組 - result_analyzer.py
+# 功能：從 Primax 測試結果截圖讀出 ReportRate 數值與 PASS/FAIL
+#       以快取的字形模板做 NumPy 向量化比對（不使用 OCR 服務），
+#       每站寫入一筆紀錄，測試結束即得到結果表
+# =============================================
+
+import os
+import csv
+import sys
+import time
+import datetime
+import threading
+
+try:
+    import numpy as np
+except ImportError:  # 未安裝 numpy 時停用判讀，不影響截圖
+    np = None
+
+# 模板快取：{模板資料夾: (字元列表, 模板陣列)}
+_template_cache = {}
+_template_lock = threading.Lock()
+
+GLYPH_SIZE = (16, 10)  # 字形統一縮放尺寸 (高, 寬)
+DOT_MAX_RATIO = 0.35   # 高與寬都不超過行高此比例的字形視為小數點（縮放後會與 '1' 一樣成為實心方塊，不做模板比對）
+
+
+def _to_array(image):
+    """PIL.Image 或檔案路徑 → RGB uint8 陣列"""
+    if isinstance(image, str):
+        from PIL import Image
+        with Image.open(image) as img:
+            return np.asarray(img.convert("RGB"))
+    return np.asarray(image.convert("RGB"))
+
+
+def _crop(pixels, region):
+    if not region:
+        return pixels
+    left, top, width, height = region
+    return pixels[top:top + height, left:left + width]
+
+
+def _binarize(pixels):
+    """灰階後以平均值二值化，少數的一方視為文字"""
+    gray = pixels[..., :3].astype(np.float32) @ np.array([0.299, 0.587, 0.114], dtype=np.float32)
+    ink = gray < gray.mean()
+    if ink.mean() > 0.5:
+        ink = ~ink  # 深色背景、淺色文字
+    return ink
+
+
+def _resize(mask, size):
+    """最近鄰縮放（純 NumPy 索引）"""
+    height, width = size
+    rows = (np.arange(height) * mask.shape[0] / height).astype(int)
+    cols = (np.arange(width) * mask.shape[1] / width).astype(int)
+    return mask[rows][:, cols]
+
+
+def split_glyphs(ink):
+    """依欄投影切出每個字元（裁到字元本身的上下範圍，未縮放）"""
+    columns = ink.any(axis=0)
+    glyphs = []
+    start = None
+    for x, has_ink in enumerate(np.append(columns, False)):
+        if has_ink and start is None:
+            start = x
+        elif not has_ink and start is not None:
+            glyph = ink[:, start:x]
+            rows = np.flatnonzero(glyph.any(axis=1))
+            glyphs.append(glyph[rows[0]:rows[-1] + 1])
+            start = None
+    return glyphs
+
+
+def segment_glyphs(ink):
+    """依欄投影切出每個字元，回傳已縮放到 GLYPH_SIZE 的遮罩列表"""
+    return [_resize(glyph, GLYPH_SIZE) for glyph in split_glyphs(ink)]
+
+
+def dot_flags(glyphs):
+    """每個字形是否為小數點（依與最高字形的比例判斷）"""
+    line_height = max(glyph.shape[0] for glyph in glyphs)
+    limit = line_height * DOT_MAX_RATIO
+    return [glyph.shape[0] <= limit and glyph.shape[1] <= limit for glyph in glyphs]
+
+
+def parse_value(text):
+    """辨識文字 → 數值（含小數點時為 float）；有無法辨識的字元或格式不正確時回傳 None"""
+    number = "".join(c for c in text if c.isdigit() or c == ".")
+    if not number or "?" in text:
+        return None
+    try:
+        return float(number) if "." in number else int(number)
+    except ValueError:  # 例如 "1.2.3"
+        return None
+
+
+def load_templates(template_dir):
+    """
+    讀取模板資料夾（檔名即字元，例如 0.png ~ 9.png），結果快取
+    回傳 (字元列表, shape = (N, 高, 寬) 的布林陣列)；資料夾不存在時回傳 None
+    """
+    with _template_lock:
+        if template_dir in _template_cache:
+            return _template_cache[template_dir]
+        if not os.path.isdir(template_dir):
+            return None
+        labels, masks = [], []
+        for name in sorted(os.listdir(template_dir)):
+            label, ext = os.path.splitext(name)
+            if ext.lower() != ".png":
+                continue
+            # 模板固定為白底黑字，直接以 128 為門檻（字形可能佔過半像素，不做極性判斷）
+            pixels = _to_array(os.path.join(template_dir, name))
+            labels.append(label)
+            masks.append(_resize(pixels.mean(axis=-1) < 128, GLYPH_SIZE))
+        templates = (labels, np.stack(masks)) if masks else None
+        _template_cache[template_dir] = templates
+        return templates
+
+
+def build_templates(sample_path, text, template_dir, region=None):
+    """
+    由一張已知數值的截圖建立字形模板
+    text: 該區域顯示的文字（例如 "1000" 或 "999.5"），字元數需與切出的字形數相同
+    小數點依大小判斷，不建立模板
+    """
+    from PIL import Image
+    glyphs = split_glyphs(_binarize(_crop(_to_array(sample_path), region)))
+    if len(glyphs) != len(text):
+        raise ValueError(f"切出 {len(glyphs)} 個字形，但文字 '{text}' 有 {len(text)} 個字元")
+    dots = dot_flags(glyphs)
+    if dots != [char == "." for char in text]:
+        raise ValueError(f"小數點位置與文字 '{text}' 不符")
+    os.makedirs(template_dir, exist_ok=True)
+    for char, glyph, dot in zip(text, glyphs, dots):
+        if dot:
+            continue
+        mask = _resize(glyph, GLYPH_SIZE)
+        Image.fromarray((~mask * 255).astype(np.uint8)).save(os.path.join(template_dir, f"{char}.png"))
+    with _template_lock:
+        _template_cache.pop(template_dir, None)
+    return len(glyphs)
+
+
+class ReportRateAnalyzer:
+    """
+    ReportRate 判讀器（可直接掛在截圖管線上：analyzer(image, filepath, meta)）
+    - value_region：數值區域（相對於截圖左上角）
+    - status_region：PASS/FAIL 顏色區域；未設定時以 threshold 判定
+    每站結果附加到 CSV，並保留在 records 供測試結束時列表
+    """
+
+    def __init__(self, template_dir, value_region=None, status_region=None, threshold=100,
+                 pass_color=(0, 255, 0), fail_color=(255, 0, 0), color_tolerance=60,
+                 max_mismatch=0.25, csv_path=None, log_func=print):
+        self.template_dir = template_dir
+        self.value_region = value_region
+        self.status_region = status_region
+        self.threshold = threshold
+        self.pass_color = pass_color
+        self.fail_color = fail_color
+        self.color_tolerance = color_tolerance
+        self.max_mismatch = max_mismatch    # 字形不相符比例上限，超過視為無法辨識
+        self.csv_path = csv_path
+        self.log = log_func
+        self.lock = threading.Lock()
+        self.records = []
+        self.listeners = []  # 每筆紀錄產生後呼叫 listener(record)，例如寫入 RunIndex
+
+    def add_listener(self, listener):
+        self.listeners.append(listener)
+
+    @property
+    def available(self):
+        return np is not None and load_templates(self.template_dir) is not None
+
+    def read_value(self, pixels):
+        """回傳 (數值或 None, 辨識出的文字)"""
+        templates = load_templates(self.template_dir)
+        if templates is None:
+            return None, ""
+        labels, masks = templates
+        glyphs = split_glyphs(_binarize(_crop(pixels, self.value_region)))
+        if not glyphs:
+            return None, ""
+        dots = dot_flags(glyphs)
+        chars = ["."] * len(glyphs)
+        others = [_resize(glyph, GLYPH_SIZE) for glyph, dot in zip(glyphs, dots) if not dot]
+        if others:
+            # (字形數, 模板數) 的不相符比例，一次算完
+            stacked = np.stack(others)
+            mismatch = (stacked[:, None] != masks[None]).mean(axis=(2, 3))
+            best = mismatch.argmin(axis=1)
+            matched = iter(labels[i] if mismatch[g, i] <= self.max_mismatch else "?" for g, i in enumerate(best))
+            chars = [next(matched) if not dot else "." for dot in dots]
+        text = "".join(chars)
+        return parse_value(text), text
+
+    def read_status(self, pixels, value):
+        """以顏色比例判定 PASS/FAIL；未設定顏色區域時以門檻值判定"""
+        if self.status_region:
+            area = _crop(pixels, self.status_region).astype(np.int16)
+            pass_ratio = (np.abs(area - self.pass_color).max(axis=-1) <= self.color_tolerance).mean()
+            fail_ratio = (np.abs(area - self.fail_color).max(axis=-1) <= self.color_tolerance).mean()
+            if max(pass_ratio, fail_ratio) >= 0.05:
+                return "PASS" if pass_ratio > fail_ratio else "FAIL"
+        if value is not None:
+            return "PASS" if value >= self.threshold else "FAIL"
+        return "UNKNOWN"
+
+    def analyze(self, image):
+        """判讀單張截圖（PIL.Image 或路徑），回傳 dict"""
+        start = time.perf_counter()
+        pixels = _to_array(image)
+        value, text = self.read_value(pixels)
+        status = self.read_status(pixels, value)
+        return {"report_rate": value, "raw_text": text, "status": status,
+                "analyze_ms": round((time.perf_counter() - start) * 1000, 1)}
+
+    def __call__(self, image, filepath, meta=None):
+        """截圖管線回呼：判讀 → 記錄 → 寫入 CSV"""
+        if np is None:
+            return None
+        result = self.analyze(image)
+        record = dict(meta or {})
+        record.update(result)
+        record["screenshot"] = filepath
+        record["time"] = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        with self.lock:
+            self.records.append(record)
+            if self.csv_path:
+                self._append_csv(record)
+        for listener in self.listeners:
+            listener(record)
+        self.log(f"[Analyzer] 📊 {record.get('point')}: ReportRate={result['report_rate']} "
+                 f"({result['status']}，{result['analyze_ms']} ms)")
+        return record
+
+    def _append_csv(self, record):
+        fields = ["time", "test_type", "round", "angle", "point", "report_rate", "status", "raw_text",
+                  "analyze_ms", "screenshot", "dut"]
+        new_file = not os.path.exists(self.csv_path)
+        with open(self.csv_path, "a", newline="", encoding="utf-8-sig") as f:
+            writer = csv.DictWriter(f, fieldnames=fields, extrasaction="ignore")
+            if new_file:
+                writer.writeheader()
+            writer.writerow(record)
+
+    def log_summary(self, log_func=None):
+        """測試結束時列出結果表"""
+        log_func = log_func or self.log
+        if not self.records:
+            return
+        log_func("[Analyzer] 📋 結果總表")
+        for record in self.records:
+            tag = f"{record.get('angle')}°" if record.get("angle") is not None else f"R{record.get('round')}"
+            if record.get("dut"):
+                tag = f"{record['dut']} {tag}"
+            log_func(f"[Analyzer]   {tag:>6} {record.get('point', ''):>4}  {str(record['report_rate']):>6}  {record['status']}")
+        if self.csv_path:
+            log_func(f"[Analyzer] 📄 結果已寫入: {self.csv_path}")
+
+
+def create_station_analyzer(test_type, log_func=print):
+    """
+    依 config 建立主程式用的判讀器，結果寫入
+    Result_Screen_Shot/<日期>_<test_type>_Results.csv；缺少 numpy、數值區域或模板時回傳 None
+    """
+    from config import RESULT_TEMPLATE_DIR, RESULT_VALUE_REGION, RESULT_STATUS_REGION, RESULT_THRESHOLD
+    base_dir = os.path.dirname(os.path.abspath(__file__))
+    template_dir = os.path.join(base_dir, RESULT_TEMPLATE_DIR)
+    if np is None:
+        log_func("[Analyzer] ⚠️ 未安裝 numpy，略過結果判讀")
+        return None
+    if not RESULT_VALUE_REGION:
+        # 整張截圖會切出所有文字，判讀出的數值沒有意義
+        log_func("[Analyzer] ⚠️ 未設定 RESULT_VALUE_REGION（ReportRate 數值區域），略過結果判讀")
+        return None
+    if load_templates(template_dir) is None:
+        log_func(f"[Analyzer] ⚠️ 找不到字形模板 ({template_dir})，略過結果判讀")
+        return None
+    # 與截圖相同的根資料夾（mouse_test_screenshot.default_result_dir，此處不匯入 pyautogui）
+    result_dir = os.path.abspath(os.environ.get("U3_RESULT_DIR") or os.path.join(base_dir, "..", "Result_Screen_Shot"))
+    os.makedirs(result_dir, exist_ok=True)
+    today = datetime.datetime.now().strftime("%Y%m%d")
+    csv_path = os.path.join(result_dir, f"{today}_{test_type}_Results.csv")
+    log_func(f"[Analyzer] ✅ 結果判讀啟用，紀錄檔: {csv_path}")
+    return ReportRateAnalyzer(template_dir, RESULT_VALUE_REGION, RESULT_STATUS_REGION, RESULT_THRESHOLD,
+                              csv_path=csv_path, log_func=log_func)
+
+
+def main(argv):
+    """
+    命令列：
+      python result_analyzer.py <截圖.png> [...]                 判讀既有截圖
+      python result_analyzer.py --build-templates <截圖.png> <文字>  由已知數值截圖建立模板
+    """
+    from config import RESULT_TEMPLATE_DIR, RESULT_VALUE_REGION, RESULT_STATUS_REGION, RESULT_THRESHOLD
+    template_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), RESULT_TEMPLATE_DIR)
+    if np is None:
+        print("❌ 需要安裝 numpy: pip install numpy")
+        return 1
+    if len(argv) >= 3 and argv[0] == "--build-templates":
+        count = build_templates(argv[1], argv[2], template_dir, RESULT_VALUE_REGION)
+        print(f"✅ 已建立 {count} 個字形模板於 {template_dir}")
+        return 0
+    if not RESULT_VALUE_REGION:
+        print("❌ 請先於 config.py 設定 RESULT_VALUE_REGION（ReportRate 數值區域）")
+        return 1
+    analyzer = ReportRateAnalyzer(template_dir, RESULT_VALUE_REGION, RESULT_STATUS_REGION, RESULT_THRESHOLD)
+    if not analyzer.available:
+        print(f"❌ 找不到字形模板: {template_dir}（請先執行 --build-templates）")
+        return 1
+    for path in argv:
+        result = analyzer.analyze(path)
+        print(f"{os.path.basename(path)}\t{result['report_rate']}\t{result['status']}\t{result['analyze_ms']} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
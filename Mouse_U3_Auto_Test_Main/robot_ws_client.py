@@ -1,14 +1,16 @@
 # =============================================
 # 🔹 小智指令集 - robot_ws_client.py
 # 功能：主程式與小智間的溝通橋樑 將指令轉成.JSON與解析回傳.JSON
+#       連線非預期中斷時自動重新連線（指數退避），並重送尚未抵達的送餐指令
 # =============================================
 
 import asyncio
 import json
 import websockets
+from clock_util import get_clock
 
 class RobotWebSocketClient:
-    def __init__(self,log_func=print):
+    def __init__(self,log_func=print, backoff_initial=1, backoff_max=30):
         # 將print輸出字串 能夠以CMD呈現 並存至LOG檔內
         self.log = log_func
         # 儲存 websocket 連線物件
@@ -17,33 +19,72 @@ class RobotWebSocketClient:
         self.receive_callback = None
         # 監聽 WebSocket 訊息的 asyncio 背景任務
         self.listen_task = None
+        # 重新連線設定：第一次等待 backoff_initial 秒，每次失敗加倍，最長 backoff_max 秒
+        self.backoff_initial = backoff_initial
+        self.backoff_max = backoff_max
+        self.uri = None
+        self.closing = False            # disconnect() 主動斷線時不重新連線
+        self.reconnect_task = None
+        self.reconnects = 0             # 斷線後成功恢復的次數
+        # 尚未抵達的送餐指令（重新連線後重送）
+        self.outstanding = None
 
     async def connect(self, ip="localhost", port=8000):
         """
         建立 WebSocket 連線並啟動監聽任務
         預設連線到本機 localhost:8000
         """
-        uri = f"ws://{ip}:{port}/ws"    
-        self.websocket = await websockets.connect(uri)
-        # 啟動背景任務來持續接收訊息
-        self.listen_task = asyncio.create_task(self._listen())
-        self.log(f"✅ Connected to WebSocket at {uri}")
+        self.uri = f"ws://{ip}:{port}/ws"
+        self.closing = False
+        await self._open()
+        self.log(f"✅ Connected to WebSocket at {self.uri}")
+
+    async def _open(self):
+        self.websocket = await websockets.connect(self.uri)
+        # 啟動背景任務來持續接收訊息（重新連線後即重新訂閱狀態訊息）
+        self.listen_task = asyncio.create_task(self._listen(self.websocket))
 
     async def disconnect(self):
         """
         中斷 WebSocket 連線並結束監聽任務
         """
+        self.closing = True
+        if self.reconnect_task is not None and not self.reconnect_task.done():
+            self.reconnect_task.cancel()
         if self.websocket:
             await self.websocket.close()
             self.log("🛑 Disconnected from WebSocket")
 
+    async def reconnect(self):
+        """
+        強制重新連線（看門狗使用：連線看似正常但收不到狀態訊息時）
+        關閉目前連線後由監聽任務依退避規則重新連線並重送送餐指令
+        """
+        if self.reconnect_task is not None and not self.reconnect_task.done():
+            return
+        if self.websocket is None:
+            self.reconnect_task = asyncio.create_task(self._reconnect())
+            return
+        self.log("[WS] 🔄 強制重新連線小智")
+        await self.websocket.close()
+
     async def send_delivery_command(self, table_name):
         """
         發送前往指定桌號的送餐指令
         範例: "A01" 或 "A01,A02"
         """
+        self.outstanding = table_name
         await self._send("/route_ctrl_event", {"deliver_to_tables": table_name})
 
+    async def resend_outstanding(self):
+        """
+        重送尚未抵達的送餐指令（沒有時不動作）
+        """
+        if self.outstanding is None:
+            return
+        self.log(f"[WS] 🔁 重送送餐指令: {self.outstanding}")
+        await self._send("/route_ctrl_event", {"deliver_to_tables": self.outstanding})
+
     async def send_continue(self):
         """
         當抵達其中一桌時，發送此指令讓機器人繼續前往下一桌
@@ -54,12 +95,14 @@ class RobotWebSocketClient:
         """
         要求機器人返回出餐點（初始位置）
         """
+        self.outstanding = None
         await self._send("/route_ctrl_event", {"event": "return"})
 
     async def send_stop(self):
         """
         要求機器人緊急停止（類似 UI 上的停止按鈕）
         """
+        self.outstanding = None
         await self._send("/ui_event", {"event": "stop_hardware"})
 
     def set_message_handler(self, callback):
@@ -73,27 +116,60 @@ class RobotWebSocketClient:
         """
         實際執行送出資料到 WebSocket 的方法
         會組合成 dict 格式再轉為 JSON 字串
+        斷線中送不出的送餐指令保留在 outstanding，重新連線後重送
         """
         if self.websocket:
             msg = {"topic": topic, "data": data}
-            await self.websocket.send(json.dumps(msg))
+            try:
+                await self.websocket.send(json.dumps(msg))
+            except websockets.ConnectionClosed:
+                self.log(f"[WS] ⚠️ 連線中斷，指令未送出: {data}")
 
-    async def _listen(self):
+    async def _listen(self, websocket):
         """
         背景監聽 WebSocket 訊息
         一收到 "/route_ctrl_event" 的主題就會解析並交由 callback 處理
+        連線結束且非主動斷線時啟動重新連線
         """
         try:
-            async for message in self.websocket:
+            async for message in websocket:
                 try:
                     msg_obj = json.loads(message)  # 將 JSON 字串轉為物件
                     if msg_obj.get("topic") == "/route_ctrl_event":
                         data = msg_obj.get("data")
                         # 有些資料本身還是 JSON 字串，要再解一次
                         parsed = json.loads(data) if isinstance(data, str) else data
+                        if parsed.get("status") == "arrived" and parsed.get("target") == self.outstanding:
+                            self.outstanding = None
                         if self.receive_callback:
                             await self.receive_callback(parsed)
                 except Exception as e:
-                    print("Error parsing message:", e)
+                    self.log(f"[WS] ⚠️ Error parsing message: {e}")
         except Exception as e:
-            print("Connection closed or error occurred:", e)
+            self.log(f"[WS] ⚠️ Connection closed or error occurred: {e}")
+        else:
+            if not self.closing:
+                self.log("[WS] ⚠️ 小智關閉連線")
+        if not self.closing and websocket is self.websocket:
+            self.reconnect_task = asyncio.create_task(self._reconnect())
+
+    async def _reconnect(self):
+        """
+        以指數退避重新連線，成功後重送尚未抵達的送餐指令
+        """
+        delay = self.backoff_initial
+        attempt = 0
+        while not self.closing:
+            attempt += 1
+            self.log(f"[WS] 🔄 {delay:g} 秒後重新連線小智（第 {attempt} 次）...")
+            await get_clock().sleep(delay)
+            try:
+                await self._open()
+            except (OSError, asyncio.TimeoutError, websockets.WebSocketException) as e:
+                self.log(f"[WS] ❌ 重新連線失敗: {e}")
+                delay = min(delay * 2, self.backoff_max)
+                continue
+            self.reconnects += 1
+            self.log(f"[WS] ✅ 已重新連線 {self.uri}（累計恢復 {self.reconnects} 次）")
+            await self.resend_outstanding()
+            return
@@ -0,0 +1,82 @@
+# =============================================
+# 🔹 路徑規劃模組 - route_planner.py
+# 功能：把「趟數/角度 × 測試點」展開成實際走訪順序，
+#       蛇行（每趟反向）減少回程空跑，並計算與原始順序的移動距離
+# =============================================
+
+import re
+import collections
+
+# round_index: 第幾趟（從 0 開始）
+# angle: 輪盤實際角度（多趟模式為 None）
+# point: 測試點名稱（1m, 2m...）
+# position: 測試點編號（TEST_POINT_RANGE 中的數值，用於計算距離）
+Station = collections.namedtuple("Station", ["round_index", "angle", "point", "position"])
+
+
+def point_position(name):
+    """由測試點名稱取出位置編號：'7m' → 7、'A03' → 3；出餐點（origin）等無數字的名稱視為 0"""
+    match = re.search(r"(\d+)", str(name))
+    return int(match.group(1)) if match else 0
+
+
+def _ordered_points(point_numbers, reverse):
+    return list(reversed(point_numbers)) if reverse else list(point_numbers)
+
+
+def plan_sweep_route(axes, pattern="{:d}m", serpentine=True):
+    """
+    依掃描順序展開站點（趟數 / 角度 / 測試點任意組合）
+    axes: [(軸名稱, 值列表), ...]，外層 → 內層；軸名稱 "round"（值為 0, 1, ...）/ "angle" / "point"（測試點編號）
+    serpentine=True 時角度 / 測試點每掃過一次即反向：測試點蛇行省去空跑，角度來回減少旋轉量（趟數一律依序）
+    """
+    sweeps = [0] * len(axes)
+    stations = []
+
+    def walk(level, values):
+        if level == len(axes):
+            number = values["point"]
+            stations.append(Station(values.get("round", 0), values.get("angle"), pattern.format(number), number))
+            return
+        name, items = axes[level]
+        reverse = serpentine and name != "round" and sweeps[level] % 2 == 1
+        sweeps[level] += 1
+        for item in _ordered_points(items, reverse):
+            walk(level + 1, dict(values, **{name: item}))
+
+    walk(0, {})
+    return stations
+
+
+def route_distance(stations, start_position=0, rotate_at_first=False):
+    """
+    計算走訪順序的總移動距離（單位：測試點編號差，預設 1m 間距即為公尺）
+    start_position: 小智出發位置（出餐點視為 0）
+    rotate_at_first: 原始輪盤流程每次旋轉前都先回到第一個測試點
+    最後會加上返回出發點的距離
+    """
+    distance = 0
+    position = start_position
+    previous_angle = None
+    for station in stations:
+        if rotate_at_first and previous_angle is not None and station.angle != previous_angle:
+            # 舊流程：換角度前先開回 1m（第一個測試點）再旋轉
+            first_position = min(s.position for s in stations)
+            distance += abs(first_position - position)
+            position = first_position
+        distance += abs(station.position - position)
+        position = station.position
+        previous_angle = station.angle
+    distance += abs(position - start_position)
+    return distance
+
+
+def log_route_summary(planned, naive, log_func=print, rotate_at_first=False):
+    """印出規劃路徑與原始順序的移動距離比較"""
+    planned_distance = route_distance(planned)
+    naive_distance = route_distance(naive, rotate_at_first=rotate_at_first)
+    saved = naive_distance - planned_distance
+    ratio = (saved / naive_distance * 100) if naive_distance else 0
+    log_func(f"[Route] 🗺️ 共 {len(planned)} 個站點")
+    log_func(f"[Route] 📏 規劃路徑移動距離: {planned_distance} (原始順序: {naive_distance}，節省 {saved} / {ratio:.0f}%)")
+    return planned_distance, naive_distance
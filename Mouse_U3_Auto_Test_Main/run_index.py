@@ -0,0 +1,313 @@
+# =============================================
+# 🔹 測試紀錄索引 - run_index.py
+# 功能：以 SQLite 記錄每次測試（campaign）、每個站點嘗試（含各階段耗時、
+#       HC-12 重試次數、截圖路徑）與判讀結果，並提供命令列查詢
+#       例：python run_index.py stations --point 7m --angle -45 --since 2025-07-01
+# =============================================
+
+import os
+import sys
+import json
+import socket
+import sqlite3
+import argparse
+import datetime
+import threading
+from clock_util import get_clock
+from log_util import default_log_dir
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS campaigns (
+    id          INTEGER PRIMARY KEY AUTOINCREMENT,
+    started_at  TEXT NOT NULL,
+    finished_at TEXT,
+    test_type   TEXT NOT NULL,
+    dut         TEXT,
+    host        TEXT,
+    log_path    TEXT,
+    status      TEXT NOT NULL DEFAULT 'running',
+    config_json TEXT
+);
+CREATE TABLE IF NOT EXISTS stations (
+    id                 INTEGER PRIMARY KEY AUTOINCREMENT,
+    campaign_id        INTEGER NOT NULL REFERENCES campaigns(id),
+    seq                INTEGER NOT NULL,
+    started_at         TEXT NOT NULL,
+    round              INTEGER,
+    angle              INTEGER,
+    point              TEXT NOT NULL,
+    dut                TEXT,
+    success            INTEGER NOT NULL,
+    handshake_attempts INTEGER,
+    travel_sec         REAL,
+    settle_sec         REAL,
+    handshake_sec      REAL,
+    test_sec           REAL,
+    capture_sec        REAL,
+    padding_sec        REAL,
+    total_sec          REAL,
+    screenshot_path    TEXT
+);
+CREATE TABLE IF NOT EXISTS results (
+    id              INTEGER PRIMARY KEY AUTOINCREMENT,
+    campaign_id     INTEGER NOT NULL REFERENCES campaigns(id),
+    screenshot_path TEXT,
+    created_at      TEXT NOT NULL,
+    point           TEXT,
+    angle           INTEGER,
+    round           INTEGER,
+    report_rate     INTEGER,
+    status          TEXT,
+    raw_text        TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_campaigns_started ON campaigns(started_at);
+CREATE INDEX IF NOT EXISTS idx_campaigns_dut ON campaigns(dut);
+CREATE INDEX IF NOT EXISTS idx_stations_point_angle ON stations(point, angle);
+CREATE INDEX IF NOT EXISTS idx_stations_started ON stations(started_at);
+CREATE INDEX IF NOT EXISTS idx_stations_dut ON stations(dut);
+CREATE INDEX IF NOT EXISTS idx_stations_campaign ON stations(campaign_id);
+CREATE INDEX IF NOT EXISTS idx_results_screenshot ON results(screenshot_path);
+"""
+
+
+def _now():
+    return datetime.datetime.now().isoformat(timespec="seconds")
+
+
+def default_db_path():
+    """預設放在上層 LOG 資料夾：../LOG/run_index.sqlite3（U3_LOG_DIR 可覆寫資料夾）"""
+    log_dir = default_log_dir()
+    os.makedirs(log_dir, exist_ok=True)
+    return os.path.join(log_dir, "run_index.sqlite3")
+
+
+class RunIndex:
+    """
+    測試紀錄資料庫（可跨執行緒使用：截圖判讀在背景執行緒寫入結果）
+    """
+
+    def __init__(self, db_path=None):
+        self.db_path = db_path or default_db_path()
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        with self.lock:
+            self.conn.executescript(_SCHEMA)
+            self.conn.commit()
+        self.seq = {}  # campaign_id → 下一個站點序號
+
+    def _execute(self, sql, params=()):
+        with self.lock:
+            cursor = self.conn.execute(sql, params)
+            self.conn.commit()
+            return cursor.lastrowid
+
+    def _query(self, sql, params=()):
+        with self.lock:
+            return [dict(row) for row in self.conn.execute(sql, params)]
+
+    # === 寫入 ===
+    def start_campaign(self, test_type, dut=None, log_path=None, config=None):
+        campaign_id = self._execute(
+            "INSERT INTO campaigns (started_at, test_type, dut, host, log_path, config_json) VALUES (?, ?, ?, ?, ?, ?)",
+            (_now(), test_type, dut, socket.gethostname(), log_path,
+             json.dumps(config, ensure_ascii=False, default=str) if config else None))
+        self.seq[campaign_id] = 1
+        return campaign_id
+
+    def finish_campaign(self, campaign_id, status="completed"):
+        self._execute("UPDATE campaigns SET finished_at = ?, status = ? WHERE id = ?", (_now(), status, campaign_id))
+
+    def resume_campaign(self, campaign_id, log_path=None):
+        """中斷後續跑：沿用同一筆 campaign（LOG 路徑以 ; 串接），站點序號接續"""
+        self._execute("""UPDATE campaigns SET finished_at = NULL, status = 'running',
+                         log_path = CASE WHEN log_path IS NULL THEN ? ELSE log_path || ';' || ? END
+                         WHERE id = ?""", (log_path, log_path, campaign_id))
+        rows = self._query("SELECT MAX(seq) AS seq FROM stations WHERE campaign_id = ?", (campaign_id,))
+        self.seq[campaign_id] = (rows[0]["seq"] or 0) + 1
+
+    def campaign_totals(self, campaign_id):
+        """整筆 campaign（含所有續跑）的站點數 / 成功數 / 總耗時（續跑重新測試的站點只算一次，任一次成功即算成功）"""
+        rows = self._query("""SELECT COUNT(*) AS stations, COALESCE(SUM(ok), 0) AS succeeded,
+                                     COALESCE(SUM(sec), 0) AS total_sec
+                              FROM (SELECT MAX(success) AS ok, SUM(total_sec) AS sec FROM stations
+                                    WHERE campaign_id = ? GROUP BY round, angle, point, dut)""", (campaign_id,))
+        return rows[0]
+
+    def record_station(self, campaign_id, station):
+        """
+        station: StationScheduler.run_station 的回傳值
+        (point / success / timings / handshake_attempts，加上 tags 的 round / angle / dut)
+        """
+        timings = station.get("timings", {})
+        seq = self.seq.get(campaign_id, 1)
+        self.seq[campaign_id] = seq + 1
+        return self._execute(
+            """INSERT INTO stations (campaign_id, seq, started_at, round, angle, point, dut, success,
+               handshake_attempts, travel_sec, settle_sec, handshake_sec, test_sec, padding_sec, total_sec)
+               VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+            (campaign_id, seq, station.get("started_at") or _now(), station.get("round"), station.get("angle"),
+             station["point"], station.get("dut"), int(bool(station.get("success"))),
+             station.get("handshake_attempts"), timings.get("travel"), timings.get("settle"),
+             timings.get("handshake"), timings.get("test"), timings.get("padding"), station.get("total_sec")))
+
+    def update_capture(self, station_id, screenshot_path, capture_sec):
+        self._execute("UPDATE stations SET screenshot_path = ?, capture_sec = ? WHERE id = ?",
+                      (screenshot_path, capture_sec, station_id))
+
+    def record_result(self, campaign_id, record):
+        """record: ReportRateAnalyzer 產生的紀錄（含 screenshot / point / angle / round）"""
+        return self._execute(
+            """INSERT INTO results (campaign_id, screenshot_path, created_at, point, angle, round,
+               report_rate, status, raw_text) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+            (campaign_id, record.get("screenshot"), _now(), record.get("point"), record.get("angle"),
+             record.get("round"), record.get("report_rate"), record.get("status"), record.get("raw_text")))
+
+    def station_listener(self, campaign_id):
+        """給 StationScheduler.add_listener 使用：記錄站點，截圖完成後補上路徑與耗時"""
+        def on_station(station):
+            station_id = self.record_station(campaign_id, station)
+            capture_task = station.get("capture_task")
+            if capture_task is not None:
+                clock = get_clock()  # capture_started 由 StationScheduler 的時鐘記錄
+                capture_started = station.get("capture_started", clock.time())
+                capture_task.add_done_callback(
+                    lambda task: self.update_capture(
+                        station_id, None if task.cancelled() else task.result(), clock.time() - capture_started))
+        return on_station
+
+    # === 查詢 ===
+    def query_campaigns(self, since=None, until=None, dut=None, test_type=None):
+        sql, params = "SELECT * FROM campaigns WHERE 1=1", []
+        if since:
+            sql += " AND started_at >= ?"
+            params.append(since)
+        if until:
+            sql += " AND started_at < ?"
+            params.append(until)
+        if dut:
+            sql += " AND dut = ?"
+            params.append(dut)
+        if test_type:
+            sql += " AND test_type = ?"
+            params.append(test_type)
+        return self._query(sql + " ORDER BY started_at", params)
+
+    def query_stations(self, point=None, angle=None, dut=None, since=None, until=None, campaign_id=None):
+        """站點紀錄（附上判讀結果）"""
+        sql = """SELECT s.*, c.test_type, r.report_rate, r.status AS result_status
+                 FROM stations s
+                 JOIN campaigns c ON c.id = s.campaign_id
+                 LEFT JOIN results r ON r.screenshot_path = s.screenshot_path
+                 WHERE 1=1"""
+        params = []
+        if point:
+            sql += " AND s.point = ?"
+            params.append(point)
+        if angle is not None:
+            sql += " AND s.angle = ?"
+            params.append(angle)
+        if dut:
+            sql += " AND s.dut = ?"
+            params.append(dut)
+        if since:
+            sql += " AND s.started_at >= ?"
+            params.append(since)
+        if until:
+            sql += " AND s.started_at < ?"
+            params.append(until)
+        if campaign_id:
+            sql += " AND s.campaign_id = ?"
+            params.append(campaign_id)
+        return self._query(sql + " ORDER BY s.started_at", params)
+
+    def station_history(self, test_type, campaigns=20):
+        """最近 campaigns 次同類型測試的站點紀錄（依測試紀錄、序號排列，progress_model 用來學習各階段耗時）"""
+        return self._query("""SELECT * FROM stations WHERE campaign_id IN
+                                  (SELECT id FROM campaigns WHERE test_type = ? ORDER BY id DESC LIMIT ?)
+                              ORDER BY campaign_id, seq""", (test_type, campaigns))
+
+    def summarize(self, since=None, until=None, dut=None):
+        """依 測試點 × 角度 彙總：站數、成功率、平均通訊/總耗時、平均 ReportRate、PASS 數"""
+        sql = """SELECT s.point, s.angle, COUNT(*) AS stations, AVG(s.success) AS success_rate,
+                        AVG(s.handshake_sec) AS avg_handshake_sec, AVG(s.total_sec) AS avg_total_sec,
+                        AVG(r.report_rate) AS avg_report_rate,
+                        SUM(CASE WHEN r.status = 'PASS' THEN 1 ELSE 0 END) AS passed
+                 FROM stations s
+                 LEFT JOIN results r ON r.screenshot_path = s.screenshot_path
+                 WHERE 1=1"""
+        params = []
+        if since:
+            sql += " AND s.started_at >= ?"
+            params.append(since)
+        if until:
+            sql += " AND s.started_at < ?"
+            params.append(until)
+        if dut:
+            sql += " AND s.dut = ?"
+            params.append(dut)
+        return self._query(sql + " GROUP BY s.point, s.angle ORDER BY s.angle, s.point", params)
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+
+def _print_rows(rows, columns):
+    if not rows:
+        print("（無資料）")
+        return
+    widths = [max(len(col), *(len(_fmt(row.get(col))) for row in rows)) for col in columns]
+    print("  ".join(col.ljust(w) for col, w in zip(columns, widths)))
+    for row in rows:
+        print("  ".join(_fmt(row.get(col)).ljust(w) for col, w in zip(columns, widths)))
+
+
+def _fmt(value):
+    if value is None:
+        return "-"
+    if isinstance(value, float):
+        return f"{value:.2f}"
+    return str(value)
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description="U3 測試紀錄查詢")
+    parser.add_argument("--db", help="資料庫路徑（預設 ../LOG/run_index.sqlite3）")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    for name in ("campaigns", "stations", "summary"):
+        p = sub.add_parser(name)
+        p.add_argument("--since", help="起始日期，例如 2025-07-01")
+        p.add_argument("--until", help="結束日期（不含）")
+        p.add_argument("--dut", help="DUT 名稱")
+        if name == "stations":
+            p.add_argument("--point", help="測試點，例如 7m")
+            p.add_argument("--angle", type=int, help="輪盤角度，例如 -45")
+            p.add_argument("--campaign", type=int, help="campaign 編號")
+        p.add_argument("--json", action="store_true", help="以 JSON 輸出")
+
+    args = parser.parse_args(argv)
+    index = RunIndex(args.db)
+    if args.command == "campaigns":
+        rows = index.query_campaigns(args.since, args.until, args.dut)
+        columns = ["id", "started_at", "finished_at", "test_type", "dut", "status", "log_path"]
+    elif args.command == "stations":
+        rows = index.query_stations(args.point, args.angle, args.dut, args.since, args.until, args.campaign)
+        columns = ["campaign_id", "seq", "started_at", "round", "angle", "point", "dut", "success",
+                   "handshake_attempts", "handshake_sec", "total_sec", "report_rate", "result_status"]
+    else:
+        rows = index.summarize(args.since, args.until, args.dut)
+        columns = ["point", "angle", "stations", "success_rate", "avg_handshake_sec", "avg_total_sec",
+                   "avg_report_rate", "passed"]
+
+    if args.json:
+        print(json.dumps(rows, ensure_ascii=False, indent=2))
+    else:
+        _print_rows(rows, columns)
+    index.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,100 @@
+# =============================================
+# 🔹 測試畫面偵測模組 - screen_watcher.py
+# 功能：按下空白鍵後輪詢 Primax 視窗的小區域，以縮小 + 量化後的像素雜湊判斷畫面是否變化，
+#       測試進行中畫面持續更新，停止變化（結果已顯示）即觸發截圖；
+#       畫面始終沒有變化則判定測試軟體無回應，交由固定計時作為後備
+# =============================================
+
+import asyncio
+import hashlib
+import collections
+import pyautogui
+from clock_util import get_clock
+from trace_util import get_tracer
+from mouse_test_screenshot import find_window_region
+
+# state："finished" = 畫面更新後已穩定；"frozen" = 畫面從未變化；"timeout" = 超過等待上限仍在變化
+WatchResult = collections.namedtuple("WatchResult", ["state", "elapsed", "changes", "polls"])
+
+
+def region_hash(image, size=(32, 32), levels=16):
+    """縮小成灰階 size 並量化為 levels 階後雜湊（忽略反鋸齒 / 壓縮造成的細微差異）"""
+    small = image.convert("L").resize(size)
+    step = 256 // levels
+    return hashlib.blake2b(small.point(lambda v: v // step).tobytes(), digest_size=8).hexdigest()
+
+
+class ScreenWatcher:
+    """
+    測試畫面偵測
+    - region：相對於 Primax 視窗的偵測範圍 (left, top, width, height)，None = 整個視窗
+    - min_sec：測試至少進行的秒數（Sikuli 設定 1 分鐘），之前的畫面停頓不視為結束
+    - stable_sec：畫面變化後維持不變多久視為結果已顯示
+    - freeze_sec：按下空白鍵後畫面始終沒有變化多久視為測試軟體無回應
+    """
+
+    def __init__(self, window_title=None, region=None, poll_sec=0.5, min_sec=55, stable_sec=3, freeze_sec=20,
+                 log_func=print):
+        self.window_title = window_title
+        self.region = region
+        self.poll_sec = poll_sec
+        self.min_sec = min_sec
+        self.stable_sec = stable_sec
+        self.freeze_sec = freeze_sec
+        self.log = log_func
+        self.clock = get_clock()
+
+    def resolve_region(self):
+        """換算為螢幕座標；找不到視窗時回傳設定值本身（None = 全螢幕）"""
+        window = find_window_region(self.window_title, self.log) if self.window_title else None
+        if window is None:
+            return tuple(self.region) if self.region else None
+        if not self.region:
+            return window
+        left, top, width, height = self.region
+        return (window[0] + left, window[1] + top, width, height)
+
+    def sample(self, region):
+        image = pyautogui.screenshot(region=region) if region else pyautogui.screenshot()
+        return region_hash(image)
+
+    async def watch(self, timeout=80):
+        """輪詢到畫面穩定 / 判定無回應 / 逾時為止，回傳 WatchResult"""
+        with get_tracer().span("screen_watch", track="screen") as span:
+            start = self.clock.time()
+            region = self.resolve_region()
+            last_hash = await asyncio.to_thread(self.sample, region)
+            last_change, changes, polls = start, 0, 1
+
+            while True:
+                await self.clock.sleep(self.poll_sec)
+                current = await asyncio.to_thread(self.sample, region)
+                now = self.clock.time()
+                polls += 1
+                if current != last_hash:
+                    last_hash, last_change = current, now
+                    changes += 1
+
+                elapsed = now - start
+                if changes and elapsed >= self.min_sec and now - last_change >= self.stable_sec:
+                    state = "finished"
+                elif not changes and elapsed >= self.freeze_sec:
+                    state = "frozen"
+                elif elapsed >= timeout:
+                    state = "timeout"
+                else:
+                    continue
+                span.set(state=state, changes=changes, polls=polls)
+                return WatchResult(state, elapsed, changes, polls)
+
+
+def create_screen_watcher(log_func=print, window_title=None):
+    """依 config 建立主程式用的畫面偵測器；SCREEN_WATCH = False 時回傳 None（window_title：多 DUT 各自的視窗）"""
+    from config import (SCREEN_WATCH, PRIMAX_WINDOW_TITLE, SCREEN_WATCH_REGION, SCREEN_WATCH_POLL_SEC,
+                        SCREEN_WATCH_MIN_SEC, SCREEN_WATCH_STABLE_SEC, SCREEN_WATCH_FREEZE_SEC)
+    if not SCREEN_WATCH:
+        return None
+    log_func(f"[Screen] ✅ 畫面偵測啟用，區域: {SCREEN_WATCH_REGION or '整個視窗'}")
+    return ScreenWatcher(window_title or PRIMAX_WINDOW_TITLE, SCREEN_WATCH_REGION, poll_sec=SCREEN_WATCH_POLL_SEC,
+                         min_sec=SCREEN_WATCH_MIN_SEC, stable_sec=SCREEN_WATCH_STABLE_SEC,
+                         freeze_sec=SCREEN_WATCH_FREEZE_SEC, log_func=log_func)
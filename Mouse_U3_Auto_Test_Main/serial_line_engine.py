@@ -0,0 +1,246 @@
+# =============================================
+# 🔹 串口行協定引擎 - serial_line_engine.py
+# 功能：每個 COM Port 只開一個背景讀取執行緒，將收到的每一行分派給
+#       多個等待者（完全相符 / 包含字串 / 正規表示式）與訂閱者
+#       HC12Serial、TurntableController 與兩個除錯工具皆共用此引擎
+# =============================================
+
+import re
+import time
+import asyncio
+import threading
+import collections
+import serial
+from clock_util import get_clock
+
+# 每個 port 共用一個引擎（同一個 port 不會有兩條讀取執行緒）
+_engines = {}
+_engines_lock = threading.Lock()
+_port_locks = {}  # 每個 port 的開啟鎖：初始化等待期間不阻塞其他 port
+
+
+def exact(text):
+    """完全相符（HC-12 的 'Test_Start'）"""
+    return lambda line: line == text
+
+
+def contains(text):
+    """包含子字串（輪盤的 '旋轉完成'）"""
+    return lambda line: text in line
+
+
+def regex(pattern):
+    """正規表示式搜尋"""
+    compiled = re.compile(pattern) if isinstance(pattern, str) else pattern
+    return lambda line: compiled.search(line) is not None
+
+
+def any_line(line):
+    """任何一行都符合"""
+    return True
+
+
+def to_predicate(pattern):
+    """字串 → 完全相符；re.Pattern → 搜尋；函式 → 直接使用"""
+    if isinstance(pattern, str):
+        return exact(pattern)
+    if isinstance(pattern, re.Pattern):
+        return regex(pattern)
+    if callable(pattern):
+        return pattern
+    raise TypeError(f"不支援的比對條件: {pattern!r}")
+
+
+def open_line_engine(port, baudrate=9600, timeout=1, init_delay=2, log_func=print):
+    """
+    取得（必要時開啟）指定 port 的共用引擎，引用次數 +1
+    開啟失敗時拋出 serial.SerialException，由呼叫端沿用原本的錯誤處理
+    """
+    with _engines_lock:
+        port_lock = _port_locks.setdefault(port, threading.Lock())
+    with port_lock:  # 同一 port 依序開啟（後來者等待初始化完成後共用），不同 port 可同時初始化
+        with _engines_lock:
+            engine = _engines.get(port)
+            if engine is not None and engine.is_open:
+                engine.refs += 1
+                return engine
+        engine = SerialLineEngine(port, baudrate, timeout, log_func)
+        engine.open(init_delay)
+        with _engines_lock:
+            _engines[port] = engine
+            engine.refs += 1
+        return engine
+
+
+class _Waiter:
+    def __init__(self, predicate, resolve):
+        self.predicate = predicate
+        self.resolve = resolve
+
+
+class SerialLineEngine:
+    """
+    單一串口的行協定引擎
+    - 背景執行緒阻塞讀取，湊滿一行後記錄抵達時間並分派
+    - wait_for() / wait_for_blocking()：可同時存在多個等待者
+    - subscribe()：每一行都會通知（例如 LOG 或除錯畫面）
+    """
+
+    def __init__(self, port, baudrate=9600, timeout=1, log_func=print, history_size=200):
+        self.port = port
+        self.baudrate = baudrate
+        self.timeout = timeout
+        self.log = log_func
+        self.ser = None
+        self.refs = 0
+        self.lock = threading.Lock()
+        self.waiters = []
+        self.subscribers = []
+        self.history = collections.deque(maxlen=history_size)  # (抵達時間, 行內容)
+        self.stop_event = threading.Event()
+        self.reader_thread = None
+
+    @property
+    def is_open(self):
+        return self.ser is not None and self.ser.is_open
+
+    def open(self, init_delay=2):
+        """開啟串口並啟動讀取執行緒（init_delay：等待模組/Arduino 重置）"""
+        self.ser = serial.Serial(port=self.port, baudrate=self.baudrate, timeout=self.timeout)
+        self.stop_event.clear()
+        self.reader_thread = threading.Thread(target=self._reader_loop, name=f"LineReader-{self.port}", daemon=True)
+        self.reader_thread.start()
+        get_clock().sleep_blocking(init_delay)
+
+    def write(self, text):
+        """寫入字串，回傳寫入時間（可作為 wait_for 的 since）"""
+        sent_time = time.time()
+        self.ser.write(text.encode("utf-8"))
+        return sent_time
+
+    # === 讀取與分派 ===
+    def _reader_loop(self):
+        buffer = b""
+        while not self.stop_event.is_set():
+            try:
+                chunk = self.ser.read(self.ser.in_waiting or 1)
+            except Exception as e:
+                if not self.stop_event.is_set():
+                    self.log(f"[Serial] ⚠️ {self.port} 讀取錯誤: {e}")
+                break
+            if not chunk:
+                continue
+            buffer += chunk
+            while b"\n" in buffer:
+                raw, buffer = buffer.split(b"\n", 1)
+                try:
+                    line = raw.decode("utf-8").strip()
+                except UnicodeDecodeError as e:
+                    self.log(f"[Serial] ⚠️ {self.port} 解碼錯誤: {e}")
+                    continue
+                if line:
+                    self._dispatch(line, time.time())
+
+    def _dispatch(self, line, arrival_time):
+        with self.lock:
+            self.history.append((arrival_time, line))
+            matched = [w for w in self.waiters if w.predicate(line)]
+            for waiter in matched:
+                self.waiters.remove(waiter)
+            subscribers = list(self.subscribers)
+        for waiter in matched:
+            waiter.resolve(line)
+        for callback, loop in subscribers:
+            if loop is None:
+                callback(line, arrival_time)
+            else:
+                loop.call_soon_threadsafe(callback, line, arrival_time)
+
+    def _register(self, predicate, resolve, since):
+        """先檢查 since 之後的歷史資料，沒有才登記為等待者；回傳已符合的行或 None"""
+        with self.lock:
+            if since is not None:
+                for arrival_time, line in self.history:
+                    if arrival_time >= since and predicate(line):
+                        return line, None
+            waiter = _Waiter(predicate, resolve)
+            self.waiters.append(waiter)
+            return None, waiter
+
+    def _unregister(self, waiter):
+        with self.lock:
+            if waiter in self.waiters:
+                self.waiters.remove(waiter)
+
+    # === 等待 API ===
+    async def wait_for(self, pattern, timeout=30, since=None):
+        """
+        非同步等待符合條件的一行，回傳該行；逾時回傳 None
+        since：只接受此時間之後抵達的行（含已在歷史中的），None 表示只看新資料
+        timeout 以流程秒數計，實際等待時間依 clock_util 的倍率縮放
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+
+        def resolve(line):
+            loop.call_soon_threadsafe(lambda: future.done() or future.set_result(line))
+
+        line, waiter = self._register(to_predicate(pattern), resolve, since)
+        if waiter is None:
+            return line
+        try:
+            return await asyncio.wait_for(future, get_clock().to_real(timeout))
+        except asyncio.TimeoutError:
+            return None
+        finally:
+            self._unregister(waiter)
+
+    def wait_for_blocking(self, pattern, timeout=30, since=None):
+        """同步版 wait_for（給不使用 asyncio 的除錯工具）"""
+        done = threading.Event()
+        result = []
+
+        def resolve(line):
+            result.append(line)
+            done.set()
+
+        line, waiter = self._register(to_predicate(pattern), resolve, since)
+        if waiter is None:
+            return line
+        done.wait(get_clock().to_real(timeout))
+        self._unregister(waiter)
+        return result[0] if result else None
+
+    def subscribe(self, callback):
+        """
+        訂閱每一行：callback(line, arrival_time)
+        在 event loop 內訂閱時回呼會排入該 loop，否則在讀取執行緒中呼叫
+        回傳取消訂閱的函式
+        """
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            loop = None
+        entry = (callback, loop)
+        with self.lock:
+            self.subscribers.append(entry)
+
+        def unsubscribe():
+            with self.lock:
+                if entry in self.subscribers:
+                    self.subscribers.remove(entry)
+        return unsubscribe
+
+    def close(self):
+        """引用次數 -1，歸零時停止讀取並關閉串口"""
+        with _engines_lock:
+            self.refs = max(self.refs - 1, 0)
+            if self.refs > 0:
+                return
+            if _engines.get(self.port) is self:
+                del _engines[self.port]
+        self.stop_event.set()
+        if self.reader_thread is not None:
+            self.reader_thread.join(timeout=self.timeout + 1)
+        if self.ser and self.ser.is_open:
+            self.ser.close()
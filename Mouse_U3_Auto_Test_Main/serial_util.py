@@ -1,80 +1,233 @@
 # ============================================
-# 🔹 HC-12 互對通訊模組（修復版）- serial_util.py 
-# 功能：傳送 Robot_Arrived → 等待 Test_Start → 關閉
+# 🔹 HC-12 互對通訊模組（修復版）- serial_util.py
+# 功能：傳送 Robot_Arrived → 等待 Test_Start → 等待 Test_Done → 關閉
+#       讀取交由 serial_line_engine 的背景執行緒，訊息抵達立即喚醒等待者
+#       handshake()：依歷史延遲決定單次逾時，逾時即提早重送，統計存於 ../LOG/hc12_stats.json
 # ============================================
 
+import os
+import re
+import json
+import collections
 import serial
-import time
-import asyncio
+from serial_line_engine import open_line_engine, exact
+from clock_util import get_clock
+from trace_util import get_tracer
+from stats_util import percentile
+from log_util import default_log_dir
+
+
+def default_stats_path():
+    """預設放在上層 LOG 資料夾：../LOG/hc12_stats.json（可用環境變數 U3_HC12_STATS 覆寫檔案、U3_LOG_DIR 覆寫資料夾）"""
+    if os.environ.get("U3_HC12_STATS"):
+        return os.environ["U3_HC12_STATS"]
+    return os.path.join(default_log_dir(), "hc12_stats.json")
+
+
+HandshakeResult = collections.namedtuple("HandshakeResult", ["success", "elapsed", "attempts"])
+
+# 測試結束訊息：新版 Test.ino 送出 "Test_Done:<ms>"，舊版只送 "Relay_End"（無計時）
+TEST_DONE = re.compile(r"^(?:Test_Done(?::(\d+))?|Relay_End)$")
+TestDoneResult = collections.namedtuple("TestDoneResult", ["done", "arduino_sec", "pc_sec", "drift_sec"])
+
+
+class HandshakeStats:
+    """
+    HC-12 握手延遲統計（Robot_Arrived 傳送 → 收到 Test_Start）
+    - 每個 port × 測試點各保留最近 window 筆，另有同 port 全部站點的合併資料（"*"）
+    - timeout_for()：高百分位 × 安全係數，限制在 [min_timeout, max_timeout]；
+      測試點資料不足時改用合併資料，再不足則使用 max_timeout（與舊版固定逾時相同）
+    - 只記錄第一次傳送即成功的延遲：重送後收到的回覆無法判斷是回應哪一次傳送
+    - 存成 JSON，下次測試直接沿用
+    """
+
+    ALL = "*"
+
+    def __init__(self, path=None, window=50, pct=99, margin=1.5, min_samples=5, log_func=print):
+        self.path = path or default_stats_path()
+        self.window = window
+        self.pct = pct
+        self.margin = margin
+        self.min_samples = min_samples
+        self.log = log_func
+        self.ports = {}  # {port: {station: deque([秒, ...])}}
+        self.load()
+
+    def load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            self.log(f"[HC-12] ⚠️ 無法讀取握手統計 {self.path}: {e}")
+            return
+        for port, stations in data.get("ports", {}).items():
+            for station, samples in stations.items():
+                self._samples(port, station).extend(float(s) for s in samples)
+
+    def save(self):
+        """寫入暫存檔後再取代，避免中斷時留下損毀的檔案"""
+        data = {"version": 1, "ports": {port: {station: list(samples) for station, samples in stations.items()}
+                                        for port, stations in self.ports.items()}}
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            tmp_path = self.path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False, indent=1)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            self.log(f"[HC-12] ⚠️ 無法儲存握手統計 {self.path}: {e}")
+
+    def _samples(self, port, station):
+        stations = self.ports.setdefault(port, {})
+        if station not in stations:
+            stations[station] = collections.deque(maxlen=self.window)
+        return stations[station]
+
+    def record(self, port, station, latency):
+        self._samples(port, self.ALL).append(round(latency, 3))
+        if station is not None:
+            self._samples(port, str(station)).append(round(latency, 3))
+
+    def timeout_for(self, port, station, min_timeout, max_timeout):
+        """回傳 (單次逾時秒數, 使用的樣本數)；樣本數 0 代表沿用 max_timeout"""
+        stations = self.ports.get(port, {})
+        for key in (str(station), self.ALL):
+            samples = stations.get(key)
+            if samples and len(samples) >= self.min_samples:
+                learned = percentile(sorted(samples), self.pct) * self.margin
+                return min(max(learned, min_timeout), max_timeout), len(samples)
+        return max_timeout, 0
+
 
 class HC12Serial:
-    def __init__(self, port, baudrate=9600, timeout=1, log_func=print):
+    def __init__(self, port, baudrate=9600, timeout=1, log_func=print, stats=None):
         self.log = log_func
         """
         初始化 HC-12 串口連線
+        stats：HandshakeStats（None = 讀取預設的 ../LOG/hc12_stats.json）
         """
+        self.port = port
+        self.last_send_time = None  # 只接受最後一次傳送之後抵達的訊息
+        self.test_started_at = None  # 收到 Test_Start 的時間（計算與 Arduino 的時鐘漂移）
+        self.stats = stats or HandshakeStats(log_func=log_func)
         try:
-            self.ser = serial.Serial(port=port, baudrate=baudrate, timeout=timeout)
+            self.engine = open_line_engine(port, baudrate, timeout, init_delay=2, log_func=log_func)  # 給 HC-12 初始化時間
             self.log(f"[HC-12] ✅ 已開啟串口: {port}")
-            time.sleep(2)  # 給 HC-12 初始化時間
         except serial.SerialException as e:
             self.log(f"[HC-12] ❌ 串口開啟失敗: {e}")
-            self.ser = None
+            self.engine = None
+
+    @property
+    def is_open(self):
+        return self.engine is not None and self.engine.is_open
 
     def send(self, msg):
         """
         傳送任意訊息（與 Debug.py 格式一致，不加換行符）
         """
-        if self.ser and self.ser.is_open:
-            # 清空接收緩衝區，避免舊資料干擾
-            self.ser.reset_input_buffer()
-            
-            # 使用與 Debug.py 相同的格式
-            raw_data = msg.encode("utf-8")
-            self.ser.write(raw_data)
+        if self.is_open:
+            # 傳送前抵達的舊資料以時間戳記過濾，避免舊資料干擾
+            self.last_send_time = self.engine.write(msg)
             self.log(f"[HC-12] ✅ 傳送: {msg}")
         else:
             self.log("[HC-12] ❌ 串口尚未開啟")
 
-    async def wait_for(self, expected, timeout=30):
+    async def wait_for(self, expected, timeout=30, since=None):
         """
         等待特定訊息出現（含 timeout 防止卡死）
-        改進版：更穩定的資料讀取
+        事件驅動版：訊息一進入引擎立即喚醒，不再 100 ms 輪詢
+        since：接受此時間之後抵達的訊息（None = 最後一次傳送之後）
         """
-        if not self.ser or not self.ser.is_open:
+        if not self.is_open:
             self.log("[HC-12] ❌ 串口尚未開啟，無法等待訊息")
             return False
 
         self.log(f"[HC-12] 🔍 等待訊息: '{expected}' (timeout: {timeout}秒)")
-        start_time = time.time()
-        
-        while True:
-            current_time = time.time()
-            if current_time - start_time > timeout:
-                self.log(f"[HC-12] ⏰ 等待 '{expected}' 超時 ({timeout}秒)")
-                return False
-
-            if self.ser.in_waiting > 0:
-                try:
-                    # 使用與 Debug.py 相同的讀取方式
-                    msg = self.ser.readline().decode('utf-8').strip()
-                    if msg:
-                        self.log(f"[HC-12] 📩 收到: '{msg}'")
-                        if msg == expected:
-                            self.log(f"[HC-12] ✅ 成功匹配訊息: '{expected}'")
-                            return True
-                        else:
-                            self.log(f"[HC-12] ℹ️ 訊息不匹配，繼續等待...")
-                except UnicodeDecodeError as e:
-                    self.log(f"[HC-12] ⚠️ 解碼錯誤: {e}")
-                except Exception as e:
-                    self.log(f"[HC-12] ⚠️ 讀取錯誤: {e}")
-            
-            await asyncio.sleep(0.1)  # 減少 CPU 使用率
+
+        # 比對條件在讀取執行緒中（持有引擎鎖）執行，不可有副作用；收到的訊息於返回後記錄一次
+        msg = await self.engine.wait_for(exact(expected), timeout=timeout,
+                                       since=since or self.last_send_time)
+        if msg is None:
+            self.log(f"[HC-12] ⏰ 等待 '{expected}' 超時 ({timeout}秒)")
+            return False
+        self.log(f"[HC-12] 📩 收到: '{msg}'")
+        self.log(f"[HC-12] ✅ 成功匹配訊息: '{expected}'")
+        return True
+
+    async def handshake(self, station=None, command="Robot_Arrived", expected="Test_Start",
+                        max_attempts=4, min_timeout=5, max_timeout=15, budget_sec=31, retry_gap_sec=0):
+        """
+        送出 command 並等待 expected，回傳 HandshakeResult(success, elapsed, attempts)
+        - 單次逾時由 HandshakeStats 依此 port × 測試點的歷史延遲決定（min_timeout ~ max_timeout）
+        - 逾時即重送，但仍接受回應先前任何一次傳送的回覆（晚到的封包不會被丟棄）
+        - 最多 max_attempts 次，總耗時不超過 budget_sec
+        """
+        clock = get_clock()
+        tracer = get_tracer()
+        start = clock.time()
+        first_send_time = None
+        attempts = 0
+
+        while attempts < max_attempts:
+            remaining = budget_sec - (clock.time() - start)
+            if remaining <= 0:
+                self.log(f"[HC-12] ⏰ 已達握手時間上限 ({budget_sec} 秒)，停止重送")
+                break
+            attempts += 1
+            timeout, samples = self.stats.timeout_for(self.port, station, min_timeout, max_timeout)
+            timeout = min(timeout, remaining)
+            source = f"依 {samples} 筆歷史" if samples else "預設"
+            self.log(f"[HC-12] 嘗試 {attempts}/{max_attempts}: 發送 {command} (逾時 {timeout:.1f} 秒，{source})")
+            with tracer.span("hc12_attempt", attempt=attempts, timeout=round(timeout, 2)) as span:
+                sent_at = clock.time()
+                self.send(command)
+                first_send_time = first_send_time or self.last_send_time
+                received = await self.wait_for(expected, timeout=timeout, since=first_send_time)
+                span.set(ok=received)
+
+            if received:
+                self.test_started_at = clock.time()
+                if attempts == 1:
+                    self.stats.record(self.port, station, clock.time() - sent_at)
+                    self.stats.save()
+                return HandshakeResult(True, clock.time() - start, attempts)
+
+            self.log(f"[HC-12] ❌ 第 {attempts} 次嘗試失敗")
+            if retry_gap_sec > 0 and attempts < max_attempts:
+                with tracer.span("retry_gap"):
+                    await clock.sleep(min(retry_gap_sec, max(budget_sec - (clock.time() - start), 0)))
+
+        return HandshakeResult(False, clock.time() - start, attempts)
+
+    async def wait_test_done(self, timeout=80):
+        """
+        等待 Arduino 的測試結束訊息（Test_Done:<ms> 或舊版 Relay_End），逾時回傳 done=False
+        收到 Test_Done:<ms> 時比較 Arduino 計時與 PC 計時（自收到 Test_Start 起），記錄時鐘漂移
+        """
+        if not self.is_open:
+            return TestDoneResult(False, None, None, None)
+        clock = get_clock()
+        line = await self.engine.wait_for(TEST_DONE, timeout=timeout, since=self.last_send_time)
+        if line is None:
+            self.log(f"[HC-12] ⏰ 等待 Test_Done 超時 ({timeout}秒)")
+            return TestDoneResult(False, None, None, None)
+        self.log(f"[HC-12] 📩 收到: '{line}'")
+
+        pc_sec = clock.time() - self.test_started_at if self.test_started_at is not None else None
+        match = TEST_DONE.match(line)
+        if match.group(1) is None or pc_sec is None:
+            return TestDoneResult(True, None, pc_sec, None)
+        arduino_sec = int(match.group(1)) / 1000
+        drift_sec = pc_sec - arduino_sec
+        self.log(f"[HC-12] ⏱️ Arduino 計時 {arduino_sec:.3f} 秒 / PC 計時 {pc_sec:.3f} 秒，"
+                 f"漂移 {drift_sec * 1000:+.0f} ms ({drift_sec / max(arduino_sec, 0.001) * 1e6:+.0f} ppm)")
+        return TestDoneResult(True, arduino_sec, pc_sec, drift_sec)
 
     def close(self):
-        if self.ser and self.ser.is_open:
-            self.ser.close()
+        if self.is_open:
+            self.engine.close()
             self.log("[HC-12] 串口已關閉")
         else:
-            self.log("[HC-12] ❗️串口未開啟或已關閉")
\ No newline at end of file
+            self.log("[HC-12] ❗️串口未開啟或已關閉")
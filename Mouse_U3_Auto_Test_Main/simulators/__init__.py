@@ -0,0 +1,9 @@
+# =============================================
+# 🔹 硬體模擬套件 - simulators
+# 功能：在一般 Linux 主機上模擬小智 WebSocket、HC-12 + Arduino 與輪盤，
+#       讓主程式不需實體硬體即可完整執行（python -m simulators）
+# =============================================
+
+from simulators.robot_server import FakeRobotServer, point_position
+from simulators.fake_serial import PtySerialDevice, FakeHC12, FakeTurntable
+from simulators.fake_gui import install as install_fake_gui
@@ -0,0 +1,129 @@
+# =============================================
+# 🔹 模擬執行入口 - python -m simulators
+# 功能：啟動模擬小智 / HC-12 / 輪盤，透過環境變數把 config 指向模擬裝置，
+#       再以原本的主程式執行完整測試流程
+#   python -m simulators                       # 輪盤版主程式
+#   python -m simulators --mode rounds         # 多趟版主程式
+#   python -m simulators --devices-only        # 只啟動模擬器（手動執行主程式 / 除錯工具）
+#   python -m simulators --time-scale 100      # 100 倍速重播（裝置與主程式共用同一個時鐘）
+#   python -m simulators --ws-drop 0.2 --robot-ignore 0.1   # 模擬 Wi-Fi 斷線 / 小智忽略指令
+#   python -m simulators --mode agent -- --coordinator 127.0.0.1:8765 --name sim-A
+#                                              # 模擬機台代理（-- 之後的參數交給 bench_agent.py）
+# =============================================
+
+import os
+import json
+import tempfile
+import sys
+import time
+import runpy
+import argparse
+
+from simulators import FakeRobotServer, FakeHC12, FakeTurntable, install_fake_gui
+from simulators.fake_gui import FakeWindow, PRIMAX_TITLE, SCREEN_SIZE
+
+SCRIPTS = {
+    "rounds": "U3_Mouse_Auto_Test_Main.py",
+    "turntable": "U3_Mouse_Auto_Test_Main_Turntable.py",
+    "agent": "bench_agent.py",
+}
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(prog="python -m simulators", description="U3 硬體模擬執行")
+    parser.add_argument("--mode", choices=sorted(SCRIPTS), default="turntable", help="要執行的主程式")
+    parser.add_argument("--devices-only", action="store_true", help="只啟動模擬器，不執行主程式")
+    parser.add_argument("--ws-port", type=int, default=0, help="模擬小智埠號（0 = 自動選擇）")
+    parser.add_argument("--travel-base", type=float, default=2.0, help="每次行駛固定秒數")
+    parser.add_argument("--travel-per-meter", type=float, default=1.5, help="每公尺行駛秒數")
+    parser.add_argument("--ws-drop", type=float, default=0.0, help="收到送餐指令後中斷 WebSocket 的機率 0~1")
+    parser.add_argument("--robot-ignore", type=float, default=0.0, help="小智忽略送餐指令的機率 0~1")
+    parser.add_argument("--hc12-loss", type=float, default=0.0, help="HC-12 指令遺失機率 0~1")
+    parser.add_argument("--hc12-delay", type=float, default=2.7, help="Robot_Arrived → Test_Start 秒數")
+    parser.add_argument("--hc12-jitter", type=float, default=0.3, help="回覆延遲的隨機變動 ±秒")
+    parser.add_argument("--relay-sec", type=float, default=70, help="滾輪作動秒數（之後送出 Test_Done）")
+    parser.add_argument("--drift-ppm", type=float, default=0, help="Arduino 計時誤差 (ppm)")
+    parser.add_argument("--deg-per-sec", type=float, default=18, help="輪盤旋轉速度")
+    parser.add_argument("--seed", type=int, help="隨機種子（重現相同的遺失序列）")
+    parser.add_argument("--time-scale", type=float, help="時間倍率（覆寫 U3_TIME_SCALE，例如 100 = 百倍速）")
+    parser.add_argument("--real-gui", action="store_true", help="使用真正的 pyautogui / pygetwindow")
+    parser.add_argument("--duts", type=int, default=1, help="同站測試的 DUT 數（每個 DUT 一組模擬 HC-12 與 Primax 視窗）")
+    parser.add_argument("--primax-test-sec", type=float, default=60,
+                        help="模擬 Primax 測試畫面更新秒數（0 = 模擬測試軟體無回應）")
+    return parser.parse_args(argv)
+
+
+def dut_window_title(index):
+    return f"{PRIMAX_TITLE} - DUT{index + 1}"
+
+
+def start_devices(args, log_func=print):
+    """啟動模擬裝置並設定 config 使用的環境變數，回傳 (robot, [hc12, ...], turntable)"""
+    robot = FakeRobotServer(port=args.ws_port, base_sec=args.travel_base,
+                            sec_per_meter=args.travel_per_meter, drop_rate=args.ws_drop,
+                            ignore_rate=args.robot_ignore, seed=args.seed, log_func=log_func).start_in_thread()
+    hc12s = [FakeHC12(loss=args.hc12_loss, reply_delay=args.hc12_delay, jitter=args.hc12_jitter,
+                      relay_sec=args.relay_sec, drift_ppm=args.drift_ppm,
+                      seed=None if args.seed is None else args.seed + index, log_func=log_func).start()
+             for index in range(max(args.duts, 1))]
+    hc12 = hc12s[0]
+    turntable = FakeTurntable(deg_per_sec=args.deg_per_sec, log_func=log_func).start()
+    os.environ.update({
+        "U3_WS_IP": robot.host,
+        "U3_WS_PORT": str(robot.port),
+        "U3_COM_PORT": hc12.port,
+        "U3_TURNTABLE_COM_PORT": turntable.port,
+        "U3_HC12_STATS": os.path.join(tempfile.gettempdir(), "u3_sim_hc12_stats.json"),  # 不污染實機統計
+        "U3_PRIMAX_WINDOW_TITLE": PRIMAX_TITLE,
+    })
+    if len(hc12s) > 1:
+        os.environ["U3_DUT_SLOTS"] = json.dumps([
+            {"name": f"DUT{index + 1}", "com_port": device.port, "window_title": dut_window_title(index)}
+            for index, device in enumerate(hc12s)])
+    return robot, hc12s, turntable
+
+
+def main(argv):
+    # "--" 之後的參數原封不動交給主程式（例如 bench_agent.py 的 --coordinator）
+    script_argv = argv[argv.index("--") + 1:] if "--" in argv else []
+    args = parse_args(argv[:argv.index("--")] if "--" in argv else argv)
+    if args.time_scale:
+        os.environ["U3_TIME_SCALE"] = str(args.time_scale)  # 須在第一次 get_clock() 之前設定
+    robot, hc12s, turntable = start_devices(args)
+    print(f"[Sim] 🌐 U3_WS_IP={robot.host} U3_WS_PORT={robot.port}")
+    print(f"[Sim] 🌐 U3_COM_PORT={' '.join(d.port for d in hc12s)} U3_TURNTABLE_COM_PORT={turntable.port}")
+
+    try:
+        if args.devices_only:
+            print("[Sim] ⏳ 模擬器執行中，按 Ctrl+C 結束")
+            while True:
+                time.sleep(1)
+
+        if not args.real_gui:
+            # 多 DUT 時每個 slot 一個 Primax 視窗，左右並排不重疊
+            windows = [FakeWindow(dut_window_title(i), left=i * SCREEN_SIZE[0] // len(hc12s), top=100,
+                                  width=SCREEN_SIZE[0] // len(hc12s), height=800)
+                       for i in range(len(hc12s))] if len(hc12s) > 1 else None
+            replaced = install_fake_gui(primax_test_sec=args.primax_test_sec, windows=windows)
+            if replaced:
+                print(f"[Sim] 🖥️ 使用模擬 GUI 模組: {', '.join(replaced)}")
+
+        base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        sys.path.insert(0, base_dir)
+        script = os.path.join(base_dir, SCRIPTS[args.mode])
+        sys.argv = [script] + script_argv
+        runpy.run_path(script, run_name="__main__")
+    except KeyboardInterrupt:
+        pass
+    finally:
+        print(f"[Sim] 📊 小智指令 {robot.commands} 筆（斷線 {robot.dropped} 次，忽略 {robot.ignored} 筆），HC-12 收到 {sum(d.received for d in hc12s)} 筆 "
+              f"(遺失 {sum(d.dropped for d in hc12s)})，輪盤位置 {turntable.position}°")
+        robot.stop()
+        for device in hc12s:
+            device.close()
+        turntable.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
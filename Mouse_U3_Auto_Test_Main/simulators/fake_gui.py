@@ -0,0 +1,109 @@
+# =============================================
+# 🔹 模擬 GUI 模組 - simulators/fake_gui.py
+# 功能：在沒有桌面環境的 Linux 上以假的 pyautogui / pygetwindow 取代，
+#       讓主程式可完整執行：按鍵只記錄、截圖產生模擬畫面、視窗查詢回傳
+#       一個模擬的 Primax 測試視窗（按下空白鍵後畫面持續變化 primax_test_sec 秒，之後顯示結果）
+# =============================================
+
+import sys
+import types
+from clock_util import get_clock
+
+SCREEN_SIZE = (1920, 1080)
+PRIMAX_TITLE = "Primax Mouse Test v1.8"
+PRIMAX_TEST_SEC = 60  # Sikuli 將 ReportRate 測試設定為 1 分鐘
+
+
+class FakeWindow:
+    def __init__(self, title, left=200, top=100, width=1280, height=800):
+        self.title = title
+        self.left, self.top, self.width, self.height = left, top, width, height
+        self.isActive = False
+        self.isMinimized = False
+
+    def activate(self):
+        self.isActive = True
+
+    def restore(self):
+        self.isMinimized = False
+
+    def maximize(self):
+        self.left, self.top = 0, 0
+        self.width, self.height = SCREEN_SIZE
+
+
+def build_pyautogui(log_func=print, primax_test_sec=PRIMAX_TEST_SEC):
+    """primax_test_sec <= 0 模擬測試軟體無回應（按下空白鍵後畫面不變）"""
+    module = types.ModuleType("pyautogui")
+    module.FAILSAFE = True
+    module.pressed = []  # 方便檢查按鍵紀錄
+    module.test_started = None
+
+    def press(key, *args, **kwargs):
+        module.pressed.append(key)
+        if key == "space" and primax_test_sec > 0:
+            module.test_started = get_clock().monotonic()
+        log_func(f"[SimGUI] ⌨️ press({key!r})")
+
+    def screen_color():
+        """測試中每 0.5 秒換一次灰階（模擬即時數值），結束後固定為結果畫面"""
+        if module.test_started is None:
+            return (255, 255, 255)
+        elapsed = get_clock().monotonic() - module.test_started
+        if elapsed >= primax_test_sec:
+            return (200, 255, 200)
+        level = 80 + int(elapsed * 2) % 8 * 20
+        return (level, level, level)
+
+    def size():
+        return SCREEN_SIZE
+
+    def screenshot(imageFilename=None, region=None):
+        from PIL import Image
+        width, height = (region[2], region[3]) if region else SCREEN_SIZE
+        image = Image.new("RGB", (width, height), screen_color())
+        if imageFilename:
+            image.save(imageFilename)
+        return image
+
+    module.press = press
+    module.size = size
+    module.screenshot = screenshot
+    return module
+
+
+def build_pygetwindow(windows=None):
+    module = types.ModuleType("pygetwindow")
+    module.windows = windows if windows is not None else [FakeWindow(PRIMAX_TITLE)]
+
+    def getWindowsWithTitle(title):
+        return [w for w in module.windows if title.lower() in w.title.lower()]
+
+    def getAllTitles():
+        return [w.title for w in module.windows]
+
+    module.getWindowsWithTitle = getWindowsWithTitle
+    module.getAllTitles = getAllTitles
+    module.Window = FakeWindow
+    return module
+
+
+def install(force=False, log_func=print, primax_test_sec=PRIMAX_TEST_SEC, windows=None):
+    """
+    將假的 pyautogui / pygetwindow 放入 sys.modules
+    force=False 時只在真正的模組無法匯入（例如沒有 DISPLAY）時替換
+    windows：模擬的視窗列表（None = 單一 Primax 視窗）
+    回傳實際替換的模組名稱列表
+    """
+    installed = []
+    for name, builder in (("pyautogui", lambda: build_pyautogui(log_func, primax_test_sec)),
+                          ("pygetwindow", lambda: build_pygetwindow(windows))):
+        if not force:
+            try:
+                __import__(name)
+                continue
+            except Exception:  # pyautogui 在無桌面環境匯入時會拋出非 ImportError 的例外
+                sys.modules.pop(name, None)
+        sys.modules[name] = builder()
+        installed.append(name)
+    return installed
@@ -0,0 +1,176 @@
+# =============================================
+# 🔹 模擬串口裝置 - simulators/fake_serial.py
+# 功能：以 pty 建立虛擬串口（僅 Linux / macOS），模擬
+#       - HC-12 + Arduino（Test.ino）：收到 Robot_Arrived 回 Test_Start，滾輪結束回 Test_Done:<ms>，
+#         可設定遺失率與延遲
+#       - 輪盤 Arduino（45.ino）：收到 ROTATE_DEGREE:x 依角度延遲後回「旋轉完成。」
+#       主程式以 pyserial 開啟 device.port（例如 /dev/pts/5）即可，不需修改
+# =============================================
+
+import os
+import re
+import random
+import threading
+from clock_util import get_clock
+
+
+class PtySerialDevice:
+    """
+    pty 虛擬串口基底類別
+    - 背景執行緒讀取 master 端，收到資料交給 on_data()
+    - reply() 寫回 master 端（等同 Arduino 的 println）
+    """
+
+    name = "Device"
+
+    def __init__(self, log_func=print):
+        try:
+            import pty
+            import tty
+        except ImportError:
+            raise RuntimeError("模擬串口需要 pty（僅支援 Linux / macOS）")
+        self.log = log_func
+        self.master_fd, slave_fd = pty.openpty()
+        tty.setraw(slave_fd)  # 關閉回顯與換行轉換，行為與實體串口一致
+        self.port = os.ttyname(slave_fd)
+        self._slave_fd = slave_fd  # 保持開啟，避免客戶端關閉時 master 讀到 EIO
+        self.write_lock = threading.Lock()
+        self.stop_event = threading.Event()
+        self.thread = threading.Thread(target=self._reader_loop, name=f"Fake{self.name}", daemon=True)
+
+    def start(self):
+        self.thread.start()
+        self.log(f"[Sim] 🔌 {self.name} 虛擬串口: {self.port}")
+        return self
+
+    def reply(self, text):
+        """送出一行（CRLF 結尾，與 Arduino println 相同）"""
+        with self.write_lock:
+            os.write(self.master_fd, (text + "\r\n").encode("utf-8"))
+
+    def later(self, delay, func, *args):
+        """延遲執行（不阻塞讀取執行緒；延遲依時鐘倍率縮放）"""
+        timer = threading.Timer(get_clock().to_real(delay), func, args)
+        timer.daemon = True
+        timer.start()
+        return timer
+
+    def on_data(self, buffer):
+        """子類別實作：處理累積的資料，回傳尚未處理的部分"""
+        return b""
+
+    def _reader_loop(self):
+        buffer = b""
+        while not self.stop_event.is_set():
+            try:
+                chunk = os.read(self.master_fd, 1024)
+            except OSError:
+                break
+            if not chunk:
+                continue
+            buffer = self.on_data(buffer + chunk)
+
+    def close(self):
+        self.stop_event.set()
+        for fd in (self.master_fd, self._slave_fd):
+            try:
+                os.close(fd)
+            except OSError:
+                pass
+
+
+class FakeHC12(PtySerialDevice):
+    """
+    模擬 HC-12 + 滾輪 Arduino
+    loss：指令遺失機率（模擬無線干擾，主程式會逾時重試）
+    reply_delay / jitter：Robot_Arrived → Test_Start 的延遲（Test.ino 約 1.2 秒閃燈 + 1.5 秒緩衝）
+    relay_sec：繼電器作動時間，結束後送出 Test_Done:<Arduino 計時 ms>
+    drift_ppm：Arduino 石英振盪器誤差（正值 = Arduino 計時偏快，回報的 ms 較大）
+    """
+
+    name = "HC-12"
+    COMMAND = b"Robot_Arrived"
+
+    def __init__(self, loss=0.0, reply_delay=2.7, jitter=0.3, relay_sec=70, drift_ppm=0, seed=None,
+                 log_func=print):
+        super().__init__(log_func)
+        self.loss = loss
+        self.reply_delay = reply_delay
+        self.jitter = jitter
+        self.relay_sec = relay_sec
+        self.drift_ppm = drift_ppm
+        self.started_at = None
+        self.random = random.Random(seed)
+        self.busy = False         # Test.ino 在 delay() 期間不會讀取新指令
+        self.received = 0
+        self.dropped = 0
+
+    def on_data(self, buffer):
+        # Robot_Arrived 傳送時不含換行，直接搜尋指令字串
+        while self.COMMAND in buffer:
+            _, buffer = buffer.split(self.COMMAND, 1)
+            self.received += 1
+            if self.busy:
+                self.log(f"[Sim] ℹ️ HC-12 測試進行中，忽略 Robot_Arrived")
+            elif self.random.random() < self.loss:
+                self.dropped += 1
+                self.log(f"[Sim] 📡 HC-12 模擬訊號遺失 (第 {self.received} 筆)")
+            else:
+                self.busy = True
+                delay = max(self.reply_delay + self.random.uniform(-self.jitter, self.jitter), 0)
+                self.later(delay, self._start_test)
+        return buffer[-len(self.COMMAND):]
+
+    def _start_test(self):
+        self.reply("Test_Start")
+        self.started_at = get_clock().monotonic()
+        self.later(self.relay_sec, self._end_test)
+
+    def _end_test(self):
+        elapsed_ms = (get_clock().monotonic() - self.started_at) * 1000 * (1 + self.drift_ppm / 1e6)
+        self.reply(f"Test_Done:{elapsed_ms:.0f}")
+        self.busy = False
+
+
+class FakeTurntable(PtySerialDevice):
+    """
+    模擬輪盤 Arduino（45.ino）
+    deg_per_sec：旋轉速度（3 RPM = 18°/秒），旋轉時間與角度成正比
+    """
+
+    name = "Turntable"
+    PATTERN = re.compile(r"ROTATE_DEGREE:(-?\d+)")
+
+    def __init__(self, deg_per_sec=18, log_func=print):
+        super().__init__(log_func)
+        self.deg_per_sec = deg_per_sec
+        self.position = 0
+        self.lock = threading.Lock()
+
+    def start(self):
+        super().start()
+        self.reply("Arduino 已準備好。等待指令 (例如: ROTATE_DEGREE:90)...")
+        return self
+
+    def on_data(self, buffer):
+        while b"\n" in buffer:
+            raw, buffer = buffer.split(b"\n", 1)
+            line = raw.decode("utf-8", errors="replace").strip()
+            if not line:
+                continue
+            match = self.PATTERN.fullmatch(line)
+            if not line.startswith("ROTATE_DEGREE:"):
+                self.reply("未知指令。")
+            elif not match:
+                self.reply("無效的度數。請輸入一個數字。")
+            else:
+                self._rotate(int(match.group(1)))
+        return buffer
+
+    def _rotate(self, degrees):
+        # 45.ino 在旋轉期間阻塞，指令依序執行
+        with self.lock:
+            self.reply(f"正在旋轉 {degrees} 度 (共 {int(2048 / 360 * degrees)} 步)...")
+            get_clock().sleep_blocking(abs(degrees) / self.deg_per_sec)
+            self.position += degrees
+            self.reply("旋轉完成。")
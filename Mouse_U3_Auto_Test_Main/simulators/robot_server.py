@@ -0,0 +1,154 @@
+# =============================================
+# 🔹 模擬小智 WebSocket 伺服器 - simulators/robot_server.py
+# 功能：提供與實體送餐機相同的 ws://<ip>:<port>/ws 介面
+#       收到 /route_ctrl_event 的 deliver_to_tables 後，依距離延遲回傳 arrived
+#       收到 return 事件則返回出餐點；行駛時間 = base_sec + sec_per_meter × 距離
+#       可模擬 Wi-Fi 斷線（收到指令後中斷連線）與忽略指令，驗證重新連線 / 重送 / 看門狗
+# =============================================
+
+import json
+import random
+import asyncio
+import threading
+import websockets
+from clock_util import get_clock
+from route_planner import point_position
+
+ORIGIN = "origin"  # 出餐點（位置 0）
+
+
+class FakeRobotServer:
+    """
+    模擬送餐機器人
+    - 一次只執行一個行駛指令，新指令會取消尚未抵達的舊指令（與實機相同）
+    - 狀態訊息格式與實機一致：{"topic": "/route_ctrl_event", "data": "{\"status\": ..., \"target\": ...}"}
+    - drop_rate：收到送餐指令後中斷連線的機率（指令仍會執行，抵達訊息可能在斷線期間遺失）
+    - ignore_rate：忽略送餐指令的機率（不行駛也不回報）
+    """
+
+    def __init__(self, host="127.0.0.1", port=8765, base_sec=2.0, sec_per_meter=1.5, drop_rate=0.0,
+                 ignore_rate=0.0, seed=None, log_func=print):
+        self.host = host
+        self.port = port
+        self.base_sec = base_sec
+        self.sec_per_meter = sec_per_meter
+        self.drop_rate = drop_rate
+        self.ignore_rate = ignore_rate
+        self.random = random.Random(seed)
+        self.dropped = 0                        # 模擬斷線次數
+        self.ignored = 0                        # 忽略的指令數
+        self.log = log_func
+        self.position = 0
+        self.clients = set()
+        self.travel_task = None
+        self.commands = 0
+        self.loop = None
+        self.server = None
+        self.thread = None
+        self.ready = threading.Event()
+
+    def travel_sec(self, start, end):
+        if start == end:
+            return self.base_sec / 2  # 原地重新指派仍需確認定位
+        return self.base_sec + self.sec_per_meter * abs(end - start)
+
+    # === WebSocket 處理 ===
+    async def _handler(self, websocket):
+        path = getattr(getattr(websocket, "request", None), "path", "/ws")
+        if path != "/ws":
+            self.log(f"[SimRobot] ⚠️ 未知路徑 {path}，仍接受連線")
+        self.clients.add(websocket)
+        self.log("[SimRobot] 🔗 客戶端已連線")
+        try:
+            async for message in websocket:
+                try:
+                    msg = json.loads(message)
+                except json.JSONDecodeError:
+                    self.log(f"[SimRobot] ⚠️ 無法解析訊息: {message!r}")
+                    continue
+                delivery = await self._on_message(msg.get("topic"), msg.get("data") or {})
+                if delivery and self.random.random() < self.drop_rate:
+                    self.dropped += 1
+                    self.log("[SimRobot] 📶 模擬 Wi-Fi 斷線")
+                    await websocket.close()
+        except websockets.ConnectionClosed:
+            pass
+        finally:
+            self.clients.discard(websocket)
+            self.log("[SimRobot] 🛑 客戶端已離線")
+
+    async def _on_message(self, topic, data):
+        if isinstance(data, str):
+            data = json.loads(data)
+        if topic == "/route_ctrl_event" and "deliver_to_tables" in data:
+            # 多桌指令（"A01,A02"）只模擬第一桌
+            target = str(data["deliver_to_tables"]).split(",")[0].strip()
+            if self.random.random() < self.ignore_rate:
+                self.ignored += 1
+                self.log(f"[SimRobot] 🙈 模擬忽略指令: {target}")
+                return True
+            self._dispatch(target, point_position(target))
+            return True
+        elif topic == "/route_ctrl_event" and data.get("event") == "return":
+            self._dispatch(ORIGIN, 0)
+        elif topic == "/ui_event" and data.get("event") == "stop_hardware":
+            self._cancel_travel()
+            await self.broadcast("stopped", None)
+        else:
+            self.log(f"[SimRobot] ℹ️ 忽略指令: {topic} {data}")
+
+    def _cancel_travel(self):
+        if self.travel_task and not self.travel_task.done():
+            self.travel_task.cancel()
+
+    def _dispatch(self, target, position):
+        self._cancel_travel()
+        self.commands += 1
+        self.travel_task = asyncio.ensure_future(self._travel(target, position))
+
+    async def _travel(self, target, position):
+        duration = self.travel_sec(self.position, position)
+        self.log(f"[SimRobot] 🚗 {self.position} → {target}，預計 {duration:.1f} 秒")
+        await self.broadcast("moving", target)
+        await get_clock().sleep(duration)
+        self.position = position
+        await self.broadcast("arrived", target)
+
+    async def broadcast(self, status, target):
+        payload = json.dumps({"topic": "/route_ctrl_event",
+                              "data": json.dumps({"status": status, "target": target})})
+        for websocket in list(self.clients):
+            try:
+                await websocket.send(payload)
+            except websockets.ConnectionClosed:
+                self.clients.discard(websocket)
+
+    # === 啟動 / 停止 ===
+    async def serve(self):
+        """在目前事件迴圈啟動伺服器（port=0 時自動選擇可用埠號）"""
+        self.server = await websockets.serve(self._handler, self.host, self.port)
+        self.port = self.server.sockets[0].getsockname()[1]
+        self.log(f"[SimRobot] ✅ 模擬小智已啟動: ws://{self.host}:{self.port}/ws")
+        return self
+
+    def start_in_thread(self):
+        """於獨立執行緒與事件迴圈中執行（主程式可照常 asyncio.run）"""
+        def run():
+            self.loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(self.loop)
+            self.loop.run_until_complete(self.serve())
+            self.ready.set()
+            self.loop.run_forever()
+
+        self.thread = threading.Thread(target=run, name="FakeRobot", daemon=True)
+        self.thread.start()
+        self.ready.wait(10)
+        return self
+
+    def stop(self):
+        if self.loop and self.server:
+            async def shutdown():
+                self.server.close()
+                await self.server.wait_closed()
+            asyncio.run_coroutine_threadsafe(shutdown(), self.loop).result(5)
+            self.loop.call_soon_threadsafe(self.loop.stop)
@@ -0,0 +1,331 @@
+# =============================================
+# 🔹 站點排程模組 - station_scheduler.py
+# 功能：管線化執行測試站點。DUT 關鍵流程（抵達 → 回穩 → HC-12 → 測試）
+#       結束後立即派車前往下一站，截圖存檔與檔案檢查交由背景任務處理
+#       多 DUT（dut_slots）時，抵達後所有 slot 以 asyncio.gather 同時握手與測試
+#       各階段向看門狗（campaign_watchdog）回報進度，無法抵達或被看門狗中止的站點跳過
+# =============================================
+
+import asyncio
+import datetime
+import functools
+import concurrent.futures
+import pyautogui
+from clock_util import get_clock
+from trace_util import get_tracer
+from dut_slots import DutSlot
+from campaign_watchdog import ArrivalTimeout
+
+
+class StationScheduler:
+    """
+    管線化站點排程器
+    - run_station(): 只等待 DUT 必須在場的流程，截圖丟到背景執行緒
+    - drain(): 等待所有背景任務結束（測試結束前呼叫）
+    - slots：DutSlot 列表（多 DUT）；None = 以 hc12 / screen_watcher 組成單一 slot
+    - watchdog：CampaignWatchdog（各階段回報進度；abort_station() 供看門狗跳過目前站點）
+    """
+
+    def __init__(self, robot, hc12, log_func=print, test_duration=80, settle_sec=3,
+                 max_retries=2, handshake_timeout=15, retry_gap_sec=1, min_dwell_sec=0, clock=None,
+                 min_timeout=None, handshake_budget_sec=None, wait_test_done=False, test_done_grace_sec=2,
+                 screen_watcher=None, slots=None, watchdog=None):
+        self.robot = robot                      # sweep_engine.RobotAxis（提供 go_to）
+        self.clock = clock or get_clock()       # 所有等待與耗時計算經由時鐘（可縮放）
+        self.tracer = get_tracer()              # 時間軸追蹤（未啟用時為空操作）
+        self.log = log_func
+        self.slots = slots or [DutSlot(None, hc12, screen_watcher=screen_watcher, log_func=log_func)]
+        self.hc12 = self.slots[0].hc12          # HC12Serial（單一 DUT）
+        self.gui_lock = asyncio.Lock()          # 多 DUT 時切換視窗 + 按鍵需依序進行
+        self.test_duration = test_duration      # 按下空白鍵後的測試時間（等待 Test_Done 時為最長等待時間）
+        self.wait_test_done = wait_test_done    # True = 收到 Arduino 的 Test_Done 即結束測試
+        self.test_done_grace_sec = test_done_grace_sec  # 收到 Test_Done 後留給測試軟體更新畫面的時間
+        self.settle_sec = settle_sec            # 抵達後等待車身回穩
+        self.max_retries = max_retries          # HC-12 最多傳送次數
+        self.handshake_timeout = handshake_timeout  # 單次逾時上限（無歷史資料時使用）
+        self.min_timeout = handshake_timeout if min_timeout is None else min_timeout  # 單次逾時下限（= 上限即固定逾時）
+        self.retry_gap_sec = retry_gap_sec
+        if handshake_budget_sec is None:        # 預設與固定逾時的最壞情況相同
+            handshake_budget_sec = max_retries * handshake_timeout + (max_retries - 1) * retry_gap_sec
+        self.handshake_budget_sec = handshake_budget_sec
+        self.min_dwell_sec = min_dwell_sec      # 最短停留時間（0 = 不補足，測試完即離站）
+        self.background_tasks = set()           # 尚未完成的背景任務
+        self.listeners = []                     # 每站結束時呼叫 listener(result)，例如 RunIndex.station_listener
+        self.watchdog = watchdog
+        self.station_task = None                # 目前站點的任務（看門狗可中止）
+        self.station_aborted = False
+
+    def add_listener(self, listener):
+        """登記站點結束回呼（參數為 run_station 的回傳 dict；多 DUT 時每個 slot 各呼叫一次）"""
+        self.listeners.append(listener)
+
+    def progress(self, stage):
+        """向看門狗回報進度"""
+        if self.watchdog is not None:
+            self.watchdog.touch(stage)
+
+    def abort_station(self):
+        """看門狗恢復動作：中止目前站點（記錄為跳過），回傳是否有站點可中止"""
+        if self.station_task is None or self.station_task.done():
+            return False
+        self.station_aborted = True
+        self.station_task.cancel()
+        return True
+
+    @property
+    def multi_dut(self):
+        return len(self.slots) > 1
+
+    async def handshake(self, station=None, slot=None):
+        """HC-12 通訊：送出 Robot_Arrived 並等待 Test_Start（逾時依歷史延遲調整，逾時即重送）"""
+        slot = slot or self.slots[0]
+        test_success, comm_elapsed, attempts = await slot.hc12.handshake(
+            station, max_attempts=self.max_retries, min_timeout=self.min_timeout,
+            max_timeout=self.handshake_timeout, budget_sec=self.handshake_budget_sec,
+            retry_gap_sec=self.retry_gap_sec)
+        if test_success:
+            slot.log("[HC-12] ✅ 收到 Test_Start，開始測試")
+        slot.log(f"[DEBUG] HC-12 通訊總耗時: {comm_elapsed:.2f} 秒")
+        return test_success, comm_elapsed, attempts
+
+    async def run_station(self, test_point, capture, prerequisite=None, tags=None):
+        """
+        執行單一站點的 DUT 關鍵流程
+        capture: 立即回傳 Future 的截圖函式（例如 functools.partial(submit_capture, ...)）；
+                 多 DUT 時以 capture(dut=..., window_title=...) 呼叫
+        prerequisite: 可選的 awaitable（例如與行駛同時進行的輪盤旋轉），
+                      於 HC-12 通訊前等待完成；結果為 False 時跳過此站
+        tags: 附加到結果的標籤（round / angle / dut）
+        回傳 dict：point / success / timings / handshake_attempts，截圖於背景進行
+        多 DUT 時另有 slots：每個 slot 的結果（dut 為 slot 名稱，timings 含共用的行駛 / 回穩），
+        success 為任一 slot 成功
+        """
+        result = {"point": test_point, "success": False, "timings": {},
+                  "started_at": datetime.datetime.now().isoformat(timespec="seconds")}
+        result.update(tags or {})
+        if self.multi_dut:
+            result["slots"] = [dict(result, dut=slot.name, timings={}) for slot in self.slots]
+        station_start = self.clock.time()
+        try:
+            with self.tracer.span("station", point=test_point, **(tags or {})) as span:
+                self.station_aborted = False
+                self.station_task = asyncio.ensure_future(self._run_station(test_point, capture, prerequisite, result))
+                try:
+                    await self.station_task
+                except asyncio.CancelledError:
+                    if not self.station_aborted:
+                        raise
+                    self.log(f"[Main] ❌ {test_point} 看門狗中止，跳過此測試點")
+                    result["error"] = "watchdog"
+                    for record in result.get("slots", []):
+                        record.setdefault("error", "watchdog")
+                span.set(success=result["success"])
+        finally:
+            self.station_task = None
+            result["total_sec"] = self.clock.time() - station_start
+            self.progress(f"{test_point} 結束")
+        for record in result.get("slots", []):
+            record["timings"] = {**result["timings"], **record["timings"]}
+            record["total_sec"] = result["total_sec"]
+        for record in result.get("slots") or [result]:
+            for listener in self.listeners:
+                try:
+                    listener(record)
+                except Exception as e:
+                    self.log(f"[Pipeline] ⚠️ 站點紀錄失敗: {e}")
+        return result
+
+    async def _run_station(self, test_point, capture, prerequisite, result):
+        timings = result["timings"]
+        station_start = self.clock.time()
+
+        self.log(f"[Main] 🚀 指派送餐機前往 {test_point}...")
+        with self.tracer.span("travel", target=test_point) as span:
+            try:
+                await self.robot.go_to(test_point)
+            except ArrivalTimeout as e:
+                span.set(ok=False)
+                self.log(f"[Main] ❌ {test_point} 無法抵達，跳過此測試點（{e}）")
+                result["error"] = "arrival_timeout"
+                for record in result.get("slots", []):
+                    record["error"] = "arrival_timeout"
+                return
+        timings["travel"] = self.clock.time() - station_start
+        self.log(f"[Main] 🎯 抵達 {test_point}，開始測試流程")
+        self.progress(f"{test_point} 抵達")
+
+        settle_start = self.clock.time()
+        with self.tracer.span("settle"):
+            await self.clock.sleep(self.settle_sec)  # 等待車身回穩
+        timings["settle"] = self.clock.time() - settle_start
+
+        if prerequisite is not None:
+            wait_start = self.clock.time()
+            with self.tracer.span("prerequisite"):
+                ready = await asyncio.shield(prerequisite)  # 看門狗中止此站時輪盤仍轉完，位置才不會錯亂
+            timings["prerequisite"] = self.clock.time() - wait_start  # 行駛結束後仍需等待的時間
+            if ready is False:
+                self.log(f"[Main] ❌ {test_point} 前置動作失敗，跳過此測試點")
+                return
+
+        if not self.multi_dut:
+            await self._run_dut(self.slots[0], test_point, capture, result)
+            return
+
+        # 多 DUT：各 slot 同時進行，單一 slot 失敗或出錯不影響其他 slot
+        outcomes = await asyncio.gather(*(self._run_slot(slot, test_point, capture, record)
+                                          for slot, record in zip(self.slots, result["slots"])),
+                                        return_exceptions=True)
+        for slot, record, outcome in zip(self.slots, result["slots"], outcomes):
+            if isinstance(outcome, Exception):
+                slot.log(f"[Main] ❌ {test_point} 測試流程錯誤: {outcome}")
+                record["error"] = repr(outcome)
+        succeeded = [record["dut"] for record in result["slots"] if record["success"]]
+        self.log(f"[Main] 📋 {test_point} 完成 {len(succeeded)}/{len(self.slots)} 個 DUT")
+        result["success"] = bool(succeeded)
+
+    async def _run_slot(self, slot, test_point, capture, record):
+        with self.tracer.span("dut", track=f"dut:{slot.name}", dut=slot.name):
+            await self._run_dut(slot, test_point, functools.partial(capture, dut=slot.name,
+                                                                    window_title=slot.window_title), record)
+
+    async def _run_dut(self, slot, test_point, capture, result):
+        """單一 DUT 的流程：HC-12 → 按下空白鍵 → 等待測試結束 → 截圖 → 補足停留時間"""
+        timings = result["timings"]
+        log = slot.log
+
+        with self.tracer.span("handshake") as span:
+            test_success, timings["handshake"], result["handshake_attempts"] = await self.handshake(test_point, slot)
+            span.set(ok=test_success, attempts=result["handshake_attempts"])
+        self.progress(f"{test_point} 握手")
+        if not test_success:
+            log(f"[HC-12] ❌ {test_point} 通訊失敗，跳過此測試點")
+            return
+
+        # 上一站的截圖必須在按下空白鍵（重置測試畫面）前完成
+        with self.tracer.span("wait_capture"):
+            await self._wait_pending_captures(slot)
+
+        # === 只有在通訊成功後才開始測試（重新計時）===
+        async with self.gui_lock:
+            slot.activate_window()
+            test_start_time = self.clock.time()
+            pyautogui.press("space")
+        log("[Main] ✅ 已按下空白鍵啟動測試錄製")
+
+        watch_task = None
+        if slot.screen_watcher is not None:  # 與 Test_Done 同時進行：畫面結果一出現即截圖
+            watch_task = asyncio.create_task(slot.screen_watcher.watch(timeout=self.test_duration))
+
+        with self.tracer.span("test") as span:
+            if watch_task is not None:
+                await self._wait_screen(slot, watch_task, test_point, capture, result)
+            if self.wait_test_done:
+                await self._wait_test_done(slot, test_start_time, result, grace="capture_task" not in result)
+                span.set(test_done=result["test_done"])
+            elif "capture_task" not in result:
+                remaining = max(self.test_duration - (self.clock.time() - test_start_time), 0)
+                log(f"[Main] ⏱️ 等待測試完成 ({remaining:.0f} 秒)...")
+                await self.clock.sleep(remaining)
+        timings["test"] = self.clock.time() - test_start_time
+        self.progress(f"{test_point} 測試結束")
+
+        if "capture_task" not in result:
+            self._trigger_capture(slot, test_point, capture, result, "[Main] 📷 測試時間結束，背景截圖中...")
+
+        # 選擇性補足最短停留時間
+        remaining_time = max(self.min_dwell_sec - (self.clock.time() - test_start_time), 0)
+        if remaining_time > 0:
+            log(f"[Main] ⏱️ 等待剩餘停留時間: {remaining_time:.1f} 秒")
+            with self.tracer.span("padding"):
+                await self.clock.sleep(remaining_time)
+        timings["padding"] = remaining_time
+
+        log(f"[Main] ✅ {test_point} 測試完成，總耗時: {self.clock.time() - test_start_time:.1f} 秒")
+        result["success"] = True
+
+    async def _wait_screen(self, slot, watch_task, test_point, capture, result):
+        """等待畫面偵測結果；畫面已穩定即觸發截圖，無回應 / 逾時則交給後續的固定計時"""
+        try:
+            watch = await watch_task
+        except Exception as e:
+            slot.log(f"[Main] ⚠️ 畫面偵測失敗，依固定計時截圖: {e}")
+            result["screen_state"] = "error"
+            return
+        result["screen_state"] = watch.state
+        if watch.state == "finished":
+            self._trigger_capture(slot, test_point, capture, result,
+                                  f"[Main] 📷 測試畫面已完成 ({watch.elapsed:.1f} 秒，變化 {watch.changes} 次)，背景截圖中...")
+        elif watch.state == "frozen":
+            slot.log(f"[Main] ⚠️ 按下空白鍵後 {watch.elapsed:.0f} 秒畫面無變化，測試軟體可能無回應")
+        else:
+            slot.log(f"[Main] ⚠️ {watch.elapsed:.0f} 秒內畫面未穩定，依固定計時截圖")
+
+    def _trigger_capture(self, slot, test_point, capture, result, message):
+        """截圖交給截圖管線/背景執行緒，不阻塞下一站派車"""
+        slot.log(message)
+        result["capture_started"] = self.clock.time()
+        capture_task, grabbed = self._start_capture(capture)
+        name = f"{slot.name} {test_point} 截圖" if slot.name else f"{test_point} 截圖"
+        capture_task = self.run_in_background(name, capture_task, track="capture")
+        slot.pending_captures.append(grabbed or capture_task)
+        result["capture_task"] = capture_task
+
+    async def _wait_test_done(self, slot, test_start_time, result, grace=True):
+        """等待 Arduino 回報測試結束，固定測試時間僅作為逾時上限（grace：截圖前留給測試軟體更新畫面）"""
+        remaining = max(self.test_duration - (self.clock.time() - test_start_time), 0)
+        slot.log(f"[Main] ⏱️ 等待 Arduino 測試結束 (Test_Done，最長 {remaining:.0f} 秒)...")
+        done = await slot.hc12.wait_test_done(timeout=remaining)
+        result["test_done"] = done.done
+        if done.drift_sec is not None:
+            result["clock_drift_ms"] = round(done.drift_sec * 1000, 1)
+        if not done.done:
+            slot.log(f"[Main] ⚠️ 未收到 Test_Done，依固定測試時間 ({self.test_duration} 秒) 結束")
+            return
+        if grace:
+            await self.clock.sleep(min(self.test_done_grace_sec,
+                                       max(self.test_duration - (self.clock.time() - test_start_time), 0)))
+        slot.log(f"[Main] ✅ Arduino 測試結束，較固定計時提早 "
+                 f"{self.test_duration - (self.clock.time() - test_start_time):.1f} 秒")
+
+    def _start_capture(self, capture):
+        """回傳 (等待寫檔完成的 awaitable, 等待畫面擷取完成的 awaitable 或 None)"""
+        future = capture()
+        if not isinstance(future, concurrent.futures.Future):
+            return asyncio.sleep(0, future), None  # 同步函式已直接回傳結果
+        grabbed = getattr(future, "grabbed", None)
+        return asyncio.wrap_future(future), (asyncio.wrap_future(grabbed) if grabbed is not None else None)
+
+    def run_in_background(self, name, coro, track="background"):
+        """建立背景任務，完成後自動記錄結果或錯誤（track：時間軸上的列）"""
+        task = asyncio.create_task(self._guard(name, coro, track))
+        self.background_tasks.add(task)
+        task.add_done_callback(self.background_tasks.discard)
+        return task
+
+    async def _guard(self, name, coro, track="background"):
+        start_time = self.clock.time()
+        try:
+            with self.tracer.span(name, track=track):
+                result = await coro
+        except Exception as e:
+            self.log(f"[Pipeline] ❌ 背景任務失敗 ({name}): {e}")
+            return None
+        if result is None:
+            self.log(f"[Pipeline] ⚠️ 背景任務無結果 ({name})")
+        else:
+            self.log(f"[Pipeline] 📸 背景任務完成 ({name})，耗時 {self.clock.time() - start_time:.2f} 秒")
+        return result
+
+    async def _wait_pending_captures(self, slot):
+        if slot.pending_captures:
+            await asyncio.gather(*slot.pending_captures)
+            slot.pending_captures.clear()
+
+    async def drain(self):
+        """等待所有背景任務完成"""
+        if self.background_tasks:
+            self.log(f"[Pipeline] ⏳ 等待 {len(self.background_tasks)} 個背景任務完成...")
+            await asyncio.gather(*list(self.background_tasks))
+        for slot in self.slots:
+            slot.pending_captures.clear()
@@ -0,0 +1,27 @@
+# =============================================
+# 🔹 統計工具 - stats_util.py
+# 功能：百分位數與摘要統計（基準測試與 LOG 分析共用）
+# =============================================
+
+
+def percentile(values, pct):
+    """線性內插百分位數（values 不需排序）"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * pct / 100
+    low = int(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+def summarize(values, percentiles=(50, 90, 99)):
+    """回傳 {n, mean, p50, p90, p99, max}；沒有資料時回傳 None"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    stats = {"n": len(ordered), "mean": sum(ordered) / len(ordered)}
+    for pct in percentiles:
+        stats[f"p{pct}"] = percentile(ordered, pct)
+    stats["max"] = ordered[-1]
+    return stats
@@ -0,0 +1,526 @@
+# =============================================
+# 🔹 掃描測試引擎 - sweep_engine.py
+# 功能：多趟 / 輪盤主程式共用的測試流程（兩個主程式只是以不同模式啟動此引擎）
+#       測試計畫把「趟數 × 角度 × 測試點」展開為站點順序（切換成本高的軸在外層、變動最少，
+#       見 campaign_plan.default_order），引擎逐站切換有變動的軸，各軸硬體由軸驅動負責：
+#   - RobotAxis：小智（WebSocket 派車、抵達期限與重送、返航）
+#   - TurntableAxis：輪盤（角度變動時旋轉，與小智行駛同時進行；續跑還原位置；結束回到 0°）
+#   - DutAxis：受測裝置（每個 DUT 一組 HC-12 / Primax 視窗，同站所有 DUT 同時握手與測試）
+#   新的組合（例如每個角度跑多趟）只需測試計畫檔，不需新的主程式：
+#   python U3_Mouse_Auto_Test_Main_Turntable.py --plan plans/turntable_rounds.json
+# =============================================
+
+import asyncio
+import os
+import argparse
+import datetime
+import functools
+import subprocess
+import pyautogui
+import pygetwindow as gw
+from config import WS_IP, WS_PORT, DUT_NAME, WS_RECONNECT_INITIAL_SEC, WS_RECONNECT_MAX_SEC
+from robot_ws_client import RobotWebSocketClient
+from dut_slots import open_slots, close_slots, dut_label
+from station_scheduler import StationScheduler
+from campaign_plan import compile_plan, load_plan, log_plan, format_duration, PlanError, MODE_NAMES
+from mouse_test_screenshot import submit_capture, get_capture_pipeline
+from result_analyzer import create_station_analyzer
+from run_index import RunIndex
+from campaign_checkpoint import CampaignCheckpoint, default_checkpoint_path
+from campaign_watchdog import create_travel_estimator, create_watchdog
+from progress_model import create_progress_model
+from log_util import init_log
+from clock_util import get_clock
+from trace_util import get_tracer
+from turntable_controller import TurntableController
+
+pyautogui.FAILSAFE = False  # 關閉滑鼠移到角落的安全機制
+
+# === 初始參數設定 ===
+base_path = os.path.dirname(os.path.abspath(__file__))
+sikuli_open = os.path.join(base_path, "U3_Mouse_Test.sikuli")  # Sikuli 測試腳本
+sikuli_jar = os.path.join(base_path, "sikulixide-2.0.5.jar")    # Sikuli 執行器
+
+# 各模式的測試類型標記（LOG / 檢查點 / 截圖資料夾名稱，與原本兩個主程式相同）
+TEST_TYPES = {"rounds": "Mouse_Test", "turntable": "Mouse_Test_Turntable"}
+
+
+class RobotAxis:
+    """
+    小智（測試點軸）：派車並等待抵達
+    站點間的行駛由 StationScheduler 管線化進行（測試結束即派車前往下一站）
+    """
+
+    def __init__(self, log_func=print):
+        self.log = log_func
+        self.client = RobotWebSocketClient(log_func=log_func, backoff_initial=WS_RECONNECT_INITIAL_SEC,
+                                           backoff_max=WS_RECONNECT_MAX_SEC)
+        self.travel = create_travel_estimator(log_func=log_func)  # 依距離與實測行駛時間決定抵達期限
+        self.arrival_event = asyncio.Event()
+        self.current_target = None
+
+    async def handle_robot_status(self, data):
+        """處理小智傳回的狀態訊息，抵達指定站點時觸發 arrival_event"""
+        status = data.get("status")
+        target = data.get("target")
+        self.log(f"[WS] 狀態: {status}, 目標: {target}")
+
+        if status == "arrived" and target == self.current_target:
+            self.log(f"[WS] ✅ 到達 {target}")
+            self.arrival_event.set()
+
+    async def wait_for_arrival(self, target):
+        """等待到達指定目標（超過預期行駛時間的期限拋出 ArrivalTimeout）"""
+        self.current_target = target
+        self.arrival_event.clear()
+        await self.travel.wait(target, self.arrival_event)
+
+    async def go_to(self, target):
+        """派車前往指定目標並等待抵達（先設定目標再送指令，避免漏接抵達訊息；逾時重送，仍未抵達拋出 ArrivalTimeout）"""
+        self.current_target = target
+        self.arrival_event.clear()
+        await self.client.send_delivery_command(target)
+        await self.travel.wait(target, self.arrival_event, resend=functools.partial(self.client.send_delivery_command, target))
+
+    async def connect(self, ip, port):
+        self.client.set_message_handler(self.handle_robot_status)
+        await self.client.connect(ip, port)
+
+    async def disconnect(self):
+        await self.client.disconnect()
+
+    def setup(self, plan):
+        self.travel.max_resends = plan.retry["arrival_max_resends"]
+
+    async def finish(self):
+        """返回出餐點"""
+        await self.client.send_return()
+
+
+class TurntableAxis:
+    """
+    輪盤（角度軸）：站點角度與上一站不同時開始旋轉，與小智前往該站同時進行，
+    旋轉完成才開始握手（StationScheduler 的 prerequisite）；旋轉失敗時該角度其餘站點跳過
+    """
+
+    name = "angle"
+
+    def __init__(self, controller, settle_sec=3, log_func=print):
+        self.turntable = controller
+        self.settle_sec = settle_sec            # 旋轉後等待 DUT 回穩
+        self.log = log_func
+        self.tracer = get_tracer()
+        self.checkpoint = None
+        self.rotation = None                    # 目前的旋轉任務（完成並確認結果後清除）
+
+    @property
+    def position(self):
+        return self.turntable.position
+
+    def value(self, task):
+        return task.angle
+
+    async def setup(self, plan, stations, checkpoint=None, resumed=False):
+        """連接輪盤（續跑時還原位置）並列出旋轉規劃，回傳是否成功"""
+        self.turntable.wrap_limit = plan.spec["wrap_limit"]
+        self.checkpoint = checkpoint
+        self.rotation = None
+        if not self.turntable.connect():
+            self.log("[Error] ❌ 輪盤連接失敗")
+            return False
+        if resumed:
+            # 輪盤只接受相對移動、連線時視為 0°：以檢查點記錄的位置為起點，之後的移動才不會錯位
+            self.turntable.position = checkpoint.turntable_position()
+        # 絕對角度由計畫設定，相對移動（避免線材纏繞）由輪盤控制器換算
+        targets = [task.angle for previous, task in zip([None] + stations, stations)
+                   if previous is None or previous.angle != task.angle]
+        for target, relative, position in self.turntable.plan_moves(targets + [0]):
+            self.log(f"[Turntable] 📐 規劃: → {target}° (相對 {relative:+}°，絕對 {position}°)")
+        return True
+
+    async def rotate_and_settle(self, angle):
+        """輪盤轉到絕對角度後等待穩定，回傳是否成功"""
+        with self.tracer.span("rotation", track="turntable", angle=angle) as span:
+            if self.checkpoint is not None:
+                self.checkpoint.begin_rotation(self.turntable.position, angle)  # 旋轉中斷時續跑可得知位置不確定
+            success = await self.turntable.rotate_to_position(angle)
+            if self.checkpoint is not None:
+                self.checkpoint.set_turntable(self.turntable.position)
+            if success:
+                await get_clock().sleep(self.settle_sec)
+            span.set(ok=success)
+        return success
+
+    async def transition(self, task, previous):
+        """角度變動時開始旋轉；回傳此站需等待的旋轉任務（尚未完成的上一次旋轉亦同），不需等待時為 None"""
+        if previous is not None and previous.angle == task.angle:
+            return self.rotation
+        self.log(f"[Main] 🎯 輪盤轉向 {task.angle}° 同時前往 {task.point}")
+        if self.rotation is not None:  # 上一個角度的站點全數跳過時，先等上一次旋轉結束
+            await self.rotation
+        self.rotation = asyncio.create_task(self.rotate_and_settle(task.angle))
+        return self.rotation
+
+    def failed(self, task):
+        """站點結束後確認旋轉結果（看門狗中止此站時旋轉可能尚未完成，下一站繼續等待）"""
+        if self.rotation is None or not self.rotation.done():
+            return False
+        failed = self.rotation.result() is False
+        self.rotation = None
+        if failed:
+            self.log(f"[Turntable] ❌ {task.angle}° 旋轉失敗，跳過此角度")
+        return failed
+
+    async def finish(self):
+        """測試完成：輪盤返回 0°"""
+        self.log(f"\n🏁 測試完成，輪盤返回 0°")
+        await self.turntable.rotate_to_position(0)
+
+    def close(self):
+        self.turntable.close()
+
+
+class DutAxis:
+    """
+    受測裝置（DUT 軸）：單一 DUT 使用 config.COM_PORT，多 DUT 見 config.DUT_SLOTS（或計畫檔 dut_slots）
+    DUT 不需切換：抵達後所有 slot 由 StationScheduler 同時握手與測試
+    """
+
+    def __init__(self, log_func=print):
+        self.log = log_func
+        self.slots = []
+        self.slot_config = None                 # 目前開啟的 slot 設定（None = config.DUT_SLOTS）
+
+    def open(self, dut_slots=None):
+        """
+        開啟計畫指定的 DUT slot（None = config.DUT_SLOTS）
+        已開啟相同設定時沿用（每個串口初始化需 2 秒；bench_agent 連續執行多筆工作）
+        """
+        if self.slots and self.slot_config == dut_slots:
+            return
+        close_slots(self.slots)
+        self.slots = []                         # 開啟失敗時不保留已關閉的 slot
+        self.slots = open_slots(log_func=self.log, slots=dut_slots)
+        self.slot_config = dut_slots
+
+    def label(self):
+        return dut_label(self.slots)
+
+    def scheduler(self, robot, plan):
+        """管線化排程：測試結束即派車前往下一站，截圖於背景完成（時間與重試依計畫）"""
+        return StationScheduler(robot, None, log_func=self.log, slots=self.slots, **plan.scheduler_options())
+
+    def close(self):
+        close_slots(self.slots)
+        self.slots = []
+        self.log("[Main] 🔌 關閉HC-12串口")
+
+
+async def _all_ready(prerequisites):
+    return all(result is not False for result in await asyncio.gather(*prerequisites))
+
+
+class SweepEngine:
+    """
+    U3 自動化測試主控制類別（多趟 / 輪盤共用）
+    - robot：RobotAxis（測試點）；duts：DutAxis；axes：其他需切換的硬體軸（輪盤），
+      站點的軸值與上一站不同時呼叫 transition，回傳的任務於握手前等待
+    """
+
+    def __init__(self, mode, log_file, log_func, robot, duts, axes=()):
+        self.mode = mode
+        self.test_type = TEST_TYPES[mode]
+        self.log_file = log_file
+        self.log = log_func
+        self.clock = get_clock()                # 所有等待經由時鐘（模擬時可設定 U3_TIME_SCALE 加速）
+        self.tracer = get_tracer()              # 未啟用時為空操作
+        self.robot = robot
+        self.duts = duts
+        self.axes = list(axes)
+        self.run_index = None
+        self.progress = None
+        self.campaign_id = None
+        self.checkpoint = None
+
+    @property
+    def client(self):
+        return self.robot.client
+
+    async def connect(self, ip, port):
+        """連接到小智"""
+        await self.robot.connect(ip, port)
+
+    async def close(self):
+        """關閉 HC-12 並斷開小智"""
+        self.duts.close()
+        await self.robot.disconnect()
+        self.log("👋 已斷開連接")
+
+    async def launch_test_software(self):
+        """啟動滑鼠測試 GUI（由 Sikuli 自動化開啟，於背景執行緒等待，輸出收回後逐行寫入 LOG）"""
+        self.log("[Main] 啟動測試軟體 (Sikuli)...")
+        sikuli_output = ""
+        try:
+            with self.tracer.span("sikuli_launch"):
+                result = await asyncio.to_thread(subprocess.run, ["java", "-jar", sikuli_jar, "-r", sikuli_open],
+                                                 timeout=90, capture_output=True, text=True)
+            sikuli_output = (result.stdout or "") + (result.stderr or "")
+        except subprocess.TimeoutExpired as e:
+            self.log("[Sikuli] ❌ 測試軟體開啟超時")
+            sikuli_output = e.stdout.decode(errors="replace") if isinstance(e.stdout, bytes) else (e.stdout or "")
+        except FileNotFoundError:
+            self.log("[Sikuli] ❌ 找不到 java，略過啟動測試軟體")
+        for line in sikuli_output.splitlines():
+            self.log(line, component="Sikuli")
+        await self.clock.sleep(2)  # 預留啟動時間
+
+    async def run_test_cycle(self, test_points=None, rounds=None, angles=None, dut=None, skip=(), listener=None,
+                             checkpoint=None, plan=None):
+        """
+        執行一次完整的測試週期：
+        1. 啟動測試軟體（透過Sikuli開啟，並等待測試）
+        2. 依計畫逐站切換有變動的軸（輪盤旋轉與小智行駛同時進行）
+        3. 抵達後與 Arduino 握手並開始測試 → 測試結束立即派車前往下一站，截圖於背景完成
+        4. 輪盤返回 0°、小智返回原點，並結束 LOG
+        參數預設依 config 執行完整測試；bench_agent.py 指派工作時傳入：
+        - test_points / rounds / angles：測試點編號、趟數與角度（None = config）
+        - dut：受測裝置名稱（None = config）
+        - skip：已完成的站點 {(趟次, 角度, 測試點名稱)}，重新指派時略過
+        - listener：listener(kind, record)，kind 為 "station"（每站結束）或 "result"（判讀結果）
+        - checkpoint：CampaignCheckpoint，每站完成 / 每次旋轉後寫入進度；以 --resume 執行時
+          略過已完成站點、還原輪盤位置並沿用同一筆測試紀錄
+        - plan：已編譯的測試計畫（--plan）；None = 依上列參數與 config 建立
+        回傳測試紀錄狀態 "completed" / "failed"
+        """
+        if plan is None:
+            spec = {key: value for key, value in (("points", test_points), ("rounds", rounds),
+                                                  ("angles", angles), ("dut", dut)) if value is not None}
+            plan = compile_plan(spec, mode=self.mode)
+            log_plan(plan, log_func=self.log)
+        dut = dut or plan.dut
+        self.progress = None
+        analyzer = None
+        scheduler = None
+        homes = []
+        try:
+            # DUT slot、判讀器與各軸皆在 try 內建立，任何一步失敗都由 finally 收尾（不遺留判讀回呼 / 串口）
+            self.duts.open(plan.dut_slots)
+            get_capture_pipeline().validate([slot.window_title for slot in self.duts.slots])  # 設定不完整時硬體動作前即停止
+            self.robot.setup(plan)
+
+            await self.launch_test_software()
+
+            # 截圖後即時判讀 ReportRate（需先建立字形模板）
+            analyzer = create_station_analyzer(self.test_type, log_func=self.log)
+            if analyzer:
+                get_capture_pipeline().add_analyzer(analyzer)
+
+            # 建立測試紀錄（每站耗時、重試次數、截圖與判讀結果寫入 SQLite）
+            self.run_index = RunIndex()
+            campaign_config = plan.campaign_config()
+            label = dut or self.duts.label()
+            resumed = checkpoint is not None and checkpoint.open(dict(campaign_config, dut=label))
+            if resumed:
+                self.campaign_id = checkpoint.campaign_id  # 續跑：同一筆測試紀錄，已完成的站點略過
+                self.run_index.resume_campaign(self.campaign_id, self.log_file.path)
+                skip = set(skip) | checkpoint.done_keys()
+            else:
+                self.campaign_id = self.run_index.start_campaign(self.test_type, label, self.log_file.path,
+                                                                 config=campaign_config)
+                if checkpoint is not None:
+                    checkpoint.begin(self.campaign_id, dict(campaign_config, dut=label))
+            self.checkpoint = checkpoint
+            self.log(f"[Index] 🗂️ 測試紀錄 #{self.campaign_id}: {self.run_index.db_path}")
+            if analyzer:
+                analyzer.add_listener(functools.partial(self.run_index.record_result, self.campaign_id))
+                if listener:
+                    analyzer.add_listener(functools.partial(listener, "result"))
+
+            # 走訪順序由計畫展開（蛇行減少回程空跑，輪盤在小智所在端點旋轉）
+            stations = plan.remaining(skip)
+            if len(stations) < len(plan.tasks):
+                self.log(f"[Main] ⏭️ 略過已完成的 {len(plan.tasks) - len(stations)} 站，剩餘 {len(stations)} 站，"
+                         f"預估 {format_duration(plan.estimate_sec(stations))}")
+
+            for axis in self.axes:
+                if not await axis.setup(plan, stations, checkpoint, resumed):
+                    self.run_index.finish_campaign(self.campaign_id, "failed" if checkpoint is None else "interrupted")
+                    return "failed"
+
+            scheduler = self.duts.scheduler(self.robot, plan)
+            scheduler.add_listener(self.run_index.station_listener(self.campaign_id))
+            if checkpoint is not None:
+                turntable = next((axis for axis in self.axes if axis.name == "angle"), None)
+                scheduler.add_listener(checkpoint.station_listener(turntable and (lambda: turntable.position)))
+            if listener:
+                scheduler.add_listener(functools.partial(listener, "station"))
+            # 進度與預計完成時間（每站更新 LOG、cmd 視窗標題與狀態檔）
+            self.progress = create_progress_model(plan, self.test_type, self.run_index, log_func=self.log)
+            scheduler.add_listener(self.progress.station_listener())
+            self.progress.start(self.campaign_id, stations)
+
+            # 看門狗：長時間沒有進度時依 WATCHDOG_POLICY 恢復，最後中止（CampaignStalled，可 --resume）
+            async with create_watchdog(self.robot, scheduler, log_func=self.log):
+                await self.sweep(plan, stations, scheduler, dut)
+
+            # 各軸回到原點（輪盤返回 0° 同時小智返航）
+            homes = [asyncio.create_task(axis.finish()) for axis in self.axes]
+            await self.robot.finish()
+            self.log(f"[Main] ✅ 所有測試完成（{plan.describe()}），小智返回原點")
+            await asyncio.gather(*homes)
+        except BaseException:
+            if self.progress is not None:
+                self.progress.finish("interrupted" if checkpoint is not None else "failed")
+            raise
+        finally:
+            # 返航途中出錯 / 中止時先取消並等待各軸回原點的動作，再關閉串口（避免旋轉中關閉輪盤）
+            pending = [home for home in homes if not home.done()]
+            for home in pending:
+                home.cancel()
+            await asyncio.gather(*homes, return_exceptions=True)
+            if pending:
+                self.log("[Main] ⚠️ 各軸回原點未完成，請確認輪盤實際角度")
+            for axis in self.axes:
+                axis.close()
+            if scheduler is not None:
+                await scheduler.drain()  # 小智返航同時等待背景截圖完成
+                get_capture_pipeline().log_stats(self.log)
+            if analyzer:
+                # 判讀器綁定本次的測試紀錄與回報對象，移除後同一程序的下一筆工作不會重複判讀
+                get_capture_pipeline().remove_analyzer(analyzer)
+                analyzer.log_summary()
+
+        self.run_index.finish_campaign(self.campaign_id, "completed")
+        self.progress.finish("completed")
+        totals = self.run_index.campaign_totals(self.campaign_id)
+        resumed_note = f"（含中斷續跑 {checkpoint.resumes} 次）" if checkpoint is not None and checkpoint.resumes else ""
+        self.log(f"[Index] 📋 測試紀錄 #{self.campaign_id}: 共 {totals['stations']} 站，"
+                 f"成功 {totals['succeeded']} 站{resumed_note}")
+        if checkpoint is not None:
+            checkpoint.finish()
+        await self.clock.sleep(3)
+
+        # 結束 LOG
+        self.log_file.write("\n" + "="*50 + "\n")
+        self.log_file.write(f"[LOG END] {datetime.datetime.now()}\n")
+        self.log_file.write("="*50 + "\n\n")
+
+        # === 恢復並最大化 CMD 視窗 ===
+        await self.clock.sleep(0.5)
+        for win in gw.getWindowsWithTitle("cmd"):
+            if not win.isActive:
+                win.activate()
+                win.restore()
+                win.maximize()
+        return "completed"
+
+    async def sweep(self, plan, stations, scheduler, dut):
+        """
+        逐站執行：測試點以外的軸變動時記錄新的一趟，並切換有變動的硬體軸
+        軸切換失敗（例如輪盤旋轉失敗）時，該軸值的其餘站點全數跳過
+        """
+        previous = None
+        block = 0
+        blocked = {}                            # 軸名稱 → 切換失敗的值
+        # 多趟模式與輪盤單趟時截圖依原本命名（Result_<趟> / Angle_<角度>），輪盤多趟時檔名另加趟次
+        round_tag = plan.mode == "rounds" or plan.rounds > 1
+        for task in stations:
+            if previous is None or (task.round_index, task.angle) != (previous.round_index, previous.angle):
+                block += 1
+                if plan.mode == "rounds":
+                    self.log(f"🔁 第 {task.round_index + 1} 趟測試開始")
+                else:
+                    self.log(f"\n🔄 === 第{block}趟: {plan.block_label(task)} ===")
+            if any(blocked.get(axis.name, object()) == axis.value(task) for axis in self.axes):
+                previous = task
+                continue
+
+            prerequisites = [p for p in [await axis.transition(task, previous) for axis in self.axes] if p is not None]
+            prerequisite = prerequisites[0] if len(prerequisites) == 1 else (
+                asyncio.ensure_future(_all_ready(prerequisites)) if prerequisites else None)
+            previous = task
+            self.progress.begin(task)
+
+            # 執行測試（管線化：測試結束即前往下一站，截圖命名使用實際趟次 / 角度）
+            capture = functools.partial(submit_capture, self.test_type, task.round_index + 1 if round_tag else None,
+                                        task.point, log_func=self.log, angle=task.angle)
+            await scheduler.run_station(task.point, capture, prerequisite=prerequisite,
+                                        tags={"round": task.round_index + 1, "angle": task.angle,
+                                              "dut": dut or DUT_NAME})
+            for axis in self.axes:
+                if axis.failed(task):
+                    blocked[axis.name] = axis.value(task)
+
+
+def create_engine(mode):
+    """
+    依模式建立引擎與軸驅動（初始化 LOG，輪盤模式另建立輪盤；HC-12 於 run_test_cycle 依計畫的 DUT slot 開啟）
+    主程式與 bench_agent.py 共用
+    """
+    from config import TURNTABLE_COM_PORT, TURNTABLE_WRAP_LIMIT
+    log_file, log_print = init_log(TEST_TYPES[mode], base_path)
+    axes = []
+    if mode == "turntable":
+        controller = TurntableController(TURNTABLE_COM_PORT, log_func=log_print, wrap_limit=TURNTABLE_WRAP_LIMIT)
+        axes.append(TurntableAxis(controller, log_func=log_print))
+    return SweepEngine(mode, log_file, log_print, RobotAxis(log_func=log_print), DutAxis(log_func=log_print), axes)
+
+
+def parse_args(argv, mode):
+    parser = argparse.ArgumentParser(description=f"U3 滑鼠自動化測試（{MODE_NAMES[mode]}）")
+    parser.add_argument("--resume", action="store_true",
+                        help="從上次中斷的站點繼續（略過已完成站點，輪盤模式另還原輪盤位置）")
+    parser.add_argument("--plan", help="測試計畫檔（JSON，見 plans/）；未指定 = 依 config.py")
+    return parser.parse_args(argv)
+
+
+async def main(argv=(), mode="turntable"):
+    """主程式入口（mode："rounds" / "turntable"）"""
+    args = parse_args(argv, mode)
+    engine = create_engine(mode)
+    log_print = engine.log
+    log_print(f"🎯 U3 無線滑鼠自動化測試系統（{MODE_NAMES[mode]}模式）")
+    log_print("=" * 60)
+
+    checkpoint = CampaignCheckpoint(default_checkpoint_path(engine.test_type), mode, resume=args.resume,
+                                    log_func=log_print)
+    clock = get_clock()
+    if clock.scaled:
+        log_print(f"[Clock] ⏩ 時間倍率 x{clock.scale:g}（所有等待縮短為 1/{clock.scale:g}）")
+
+    try:
+        # 測試計畫：檢查內容並列出站點數、移動距離與預估時間（硬體動作前）
+        plan = compile_plan(load_plan(args.plan) if args.plan else {}, mode=mode)
+        log_plan(plan, log_func=log_print)
+
+        # 連接到小智（修改為實際IP請至 config.py）
+        with engine.tracer.span("ws_connect"):
+            await engine.connect(WS_IP, WS_PORT)
+        log_print("🔗 已連接到小智")
+
+        with engine.tracer.span("campaign", test_type=engine.test_type):
+            await engine.run_test_cycle(checkpoint=checkpoint, plan=plan)
+
+    except PlanError as e:
+        log_print(f"[Plan] ❌ {e}")
+    except Exception as e:
+        log_print(f"❌ 發生錯誤: {e}")
+        import traceback
+        log_print(f"❌ 錯誤詳情: {traceback.format_exc()}")
+        if engine.campaign_id is not None:
+            # 已有檢查點：標記為中斷，可用 --resume 從下一站繼續
+            engine.run_index.finish_campaign(engine.campaign_id, "interrupted" if checkpoint.state else "failed")
+            if checkpoint.state:
+                log_print(f"[Resume] 💾 已完成 {len(checkpoint.done_keys())} 站，"
+                          f"重新執行時加上 --resume 從中斷處繼續")
+    finally:
+        # === 測試結束後： 資源清理 ===
+        await engine.close()
+
+        if engine.tracer.enabled:
+            trace_path = engine.tracer.export(os.path.splitext(engine.log_file.path)[0] + ".trace.json")
+            log_print(f"[Trace] 🧭 時間軸已輸出: {trace_path}（以 ui.perfetto.dev 或 chrome://tracing 開啟）")
+
+        # === 強制將 LOG 緩衝寫入檔案並關閉 ===
+        engine.log_file.flush()
+        engine.log_file.close()
@@ -0,0 +1,10 @@
+# =============================================
+# 🔹 自動測試共用設定 - tests/conftest.py
+# 功能：主程式資料夾的模組以檔名直接匯入，從任何目錄執行 pytest 都加入搜尋路徑
+#   python -m pytest -q        （於 Mouse_U3_Auto_Test_Main 執行）
+# =============================================
+
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
@@ -0,0 +1,78 @@
+# =============================================
+# 🔹 測試中斷續跑 - tests/test_campaign_checkpoint.py
+# 功能：completed_keys 的成功站點判定（最後一筆為準、多 DUT 全部成功），
+#       檢查點寫入後續跑（略過成功站點、還原輪盤位置、設定不同時不續跑）（暫存檔，不需硬體）
+# =============================================
+
+import json
+from campaign_keys import station_key, completed_keys
+from campaign_checkpoint import CampaignCheckpoint
+
+CONFIG = {"points": [1, 2, 3], "angles": [0, 45]}
+
+
+def station(point, success=True, angle=0, round_=1, dut="U3"):
+    return {"round": round_, "angle": angle, "point": point, "dut": dut, "success": success}
+
+
+def make_checkpoint(tmp_path, resume=False, mode="turntable"):
+    return CampaignCheckpoint(str(tmp_path / "LOG" / "Mouse_Test_Turntable_checkpoint.json"), mode,
+                              resume=resume, log_func=lambda msg: None)
+
+
+def test_station_key_matches_plan_key():
+    assert station_key(station("1m", angle=45, round_=2)) == (2, 45, "1m")
+
+
+def test_completed_keys_uses_last_record_per_station():
+    records = [station("1m"), station("2m", success=False), station("2m"), station("3m"),
+               station("3m", success=False)]
+    assert completed_keys(records) == {(1, 0, "1m"), (1, 0, "2m")}  # 2m 重測成功、3m 重測失敗
+
+
+def test_completed_keys_requires_every_dut():
+    records = [station("1m", dut="A"), station("1m", dut="B", success=False), station("2m", dut="A"),
+               station("2m", dut="B")]
+    assert completed_keys(records) == {(1, 0, "2m")}
+
+
+def test_resume_skips_completed_stations_and_restores_turntable(tmp_path):
+    first = make_checkpoint(tmp_path)
+    assert first.open(CONFIG) is False
+    first.begin(7, CONFIG)
+    first.record(station("1m"), turntable_position=0)
+    first.record(station("2m", success=False), turntable_position=0)
+    first.set_turntable(45)
+    first.record(station("1m", angle=45), turntable_position=45)
+
+    resumed = make_checkpoint(tmp_path, resume=True)  # 新的程序以 --resume 執行
+    assert resumed.open(CONFIG) is True
+    assert (resumed.campaign_id, resumed.resumes) == (7, 1)
+    assert resumed.done_keys() == {(1, 0, "1m"), (1, 45, "1m")}
+    assert resumed.turntable_position() == 45
+
+
+def test_resume_interrupted_rotation_uses_start_angle(tmp_path):
+    first = make_checkpoint(tmp_path)
+    first.begin(1, CONFIG)
+    first.begin_rotation(0, 45)
+    resumed = make_checkpoint(tmp_path, resume=True)
+    assert resumed.open(CONFIG) and resumed.turntable_position() == 0
+
+
+def test_resume_refuses_different_config_or_mode(tmp_path):
+    first = make_checkpoint(tmp_path)
+    first.begin(1, CONFIG)
+    first.record(station("1m"))
+    assert make_checkpoint(tmp_path, resume=True).open(dict(CONFIG, points=[1, 2])) is False
+    assert make_checkpoint(tmp_path, resume=True, mode="rounds").open(CONFIG) is False
+
+
+def test_finish_removes_checkpoint(tmp_path):
+    checkpoint = make_checkpoint(tmp_path)
+    checkpoint.begin(1, CONFIG)
+    path = tmp_path / "LOG" / "Mouse_Test_Turntable_checkpoint.json"
+    assert json.loads(path.read_text(encoding="utf-8"))["campaign_id"] == 1
+    checkpoint.finish()
+    assert not path.exists()
+    assert make_checkpoint(tmp_path, resume=True).open(CONFIG) is False
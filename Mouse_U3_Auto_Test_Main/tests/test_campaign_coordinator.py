@@ -0,0 +1,151 @@
+# =============================================
+# 🔹 多機台測試協調器 - tests/test_campaign_coordinator.py
+# 功能：心跳逾時的機台離線後工作重新指派（略過已成功站點）、指派次數上限，
+#       每站只計一筆結果（bench_agent 合併截圖與判讀、協調器依站點合併）（假的連線，不需網路）
+# =============================================
+
+import json
+from campaign_coordinator import CampaignCoordinator, Bench
+from bench_agent import BenchAgent
+
+
+class FakeWriter:
+    def __init__(self):
+        self.messages = []
+        self.closed = False
+
+    def is_closing(self):
+        return self.closed
+
+    def write(self, data):
+        self.messages.append(json.loads(data))
+
+    def close(self):
+        self.closed = True
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def make_coordinator(specs=None, **kwargs):
+    specs = specs or [{"mode": "rounds", "dut": "U3", "points": [1, 2], "rounds": 1}]
+    coordinator = CampaignCoordinator(specs, heartbeat_timeout=30, log_func=lambda msg: None, **kwargs)
+    coordinator._now = Clock()
+    return coordinator
+
+
+def connect(coordinator, name):
+    bench = Bench(name, "rounds", [], FakeWriter(), coordinator._now())
+    coordinator.benches[name] = bench
+    coordinator.dispatch()
+    return bench
+
+
+def station(point, success=True, round_=1, dut="U3"):
+    return {"type": "station", "job": 1, "record": {"point": point, "round": round_, "angle": None,
+                                                    "dut": dut, "success": success}}
+
+
+def test_heartbeat_loss_requeues_remaining_stations():
+    coordinator = make_coordinator()
+    bench_a = connect(coordinator, "bench-A")
+    assert bench_a.writer.messages[0]["job"]["skip"] == []
+    coordinator.on_message(bench_a, station("1m"))
+
+    bench_b = connect(coordinator, "bench-B")  # 閒置：工作仍在 bench-A
+    assert bench_b.writer.messages == []
+
+    coordinator._now.now = 20
+    bench_b.last_seen = 20                     # bench-B 持續送心跳
+    coordinator.check_heartbeats()
+    assert set(coordinator.benches) == {"bench-A", "bench-B"}
+
+    coordinator._now.now = 40                  # bench-A 超過 30 秒未回報
+    coordinator.check_heartbeats()
+    assert set(coordinator.benches) == {"bench-B"} and bench_a.writer.closed
+    job = coordinator.jobs[0]
+    assert job.history == [("bench-A", "dropped")] and (job.status, job.bench, job.attempts) == ("running", "bench-B", 2)
+    assert bench_b.writer.messages[0]["job"]["skip"] == [[1, None, "1m"]]  # 只重測 2m
+
+
+def test_failed_station_is_retested_after_requeue():
+    coordinator = make_coordinator()
+    bench_a = connect(coordinator, "bench-A")
+    coordinator.on_message(bench_a, station("1m"))
+    coordinator.on_message(bench_a, station("2m", success=False))
+    coordinator._now.now = 31
+    coordinator.check_heartbeats()
+    bench_b = connect(coordinator, "bench-B")
+    assert bench_b.writer.messages[0]["job"]["skip"] == [[1, None, "1m"]]
+
+
+def test_drop_gives_up_after_max_attempts():
+    coordinator = make_coordinator(max_attempts=2)
+    for n in range(2):
+        connect(coordinator, f"bench-{n}")
+        coordinator._now.now += 31
+        coordinator.check_heartbeats()
+    job = coordinator.jobs[0]
+    assert job.status == "failed" and job.attempts == 2 and not coordinator.queue
+
+
+def test_drop_after_all_stations_succeeded_completes_job():
+    coordinator = make_coordinator()
+    bench = connect(coordinator, "bench-A")
+    coordinator.on_message(bench, station("1m"))
+    coordinator.on_message(bench, station("2m"))
+    coordinator._now.now = 31
+    coordinator.check_heartbeats()             # done 訊息送出前離線
+    assert coordinator.jobs[0].status == "completed" and not coordinator.queue
+
+
+def test_results_merge_by_station():
+    coordinator = make_coordinator()
+    bench = connect(coordinator, "bench-A")
+    keys = {"point": "1m", "round": 1, "angle": None, "dut": "U3"}
+    coordinator.on_message(bench, {"type": "result", "job": 1, "record": dict(keys, screenshot="a.png")})
+    coordinator.on_message(bench, {"type": "result", "job": 1, "record": dict(keys, report_rate=1000, status="PASS")})
+    results = coordinator.jobs[0].summary()["results"]
+    assert len(results) == 1
+    assert (results[0]["screenshot"], results[0]["report_rate"]) == ("a.png", 1000)
+
+
+class DoneTask:
+    def __init__(self, result):
+        self._result = result
+        self.callbacks = []
+
+    def add_done_callback(self, callback):
+        self.callbacks.append(callback)
+
+    def cancelled(self):
+        return False
+
+    def exception(self):
+        return None
+
+    def result(self):
+        return self._result
+
+
+def test_agent_sends_one_result_per_station():
+    agent = BenchAgent("bench-A", "turntable", "127.0.0.1", 0, log_func=lambda msg: None)
+    agent.writer = FakeWriter()
+    task = DoneTask("Angle_45/1m.png")
+    agent.listener(1, "station", {"point": "1m", "round": 1, "angle": 45, "dut": "U3", "success": True,
+                                  "timings": {}, "capture_task": task})
+    # 判讀結果的趟次 / DUT 依截圖檔名規則（輪盤單趟、單 DUT 時為 None）
+    agent.listener(1, "result", {"point": "1m", "round": None, "angle": 45, "dut": None,
+                                 "screenshot": "Angle_45/1m.png", "report_rate": 1000, "status": "PASS"})
+    task.callbacks[0](task)
+    kinds = [message["type"] for message in agent.writer.messages]
+    assert kinds == ["station", "result"]
+    result = agent.writer.messages[1]["record"]
+    assert result == {"point": "1m", "round": 1, "angle": 45, "dut": "U3", "screenshot": "Angle_45/1m.png",
+                      "report_rate": 1000, "status": "PASS"}
+    assert agent.analysis == {}
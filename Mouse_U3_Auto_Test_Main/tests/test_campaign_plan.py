@@ -0,0 +1,85 @@
+# =============================================
+# 🔹 測試計畫 - tests/test_campaign_plan.py
+# 功能：compile_plan 的錯誤檢查、蛇行展開順序、輪盤旋轉點與續跑略過（不需硬體）
+# =============================================
+
+import pytest
+from campaign_plan import compile_plan, PlanError
+
+
+def points_of(plan):
+    return [task.point for task in plan.tasks]
+
+
+def test_all_errors_reported_at_once():
+    with pytest.raises(PlanError) as error:
+        compile_plan({"mode": "rounds", "points": [], "rounds": 0, "pionts": [1]})
+    messages = "；".join(error.value.errors)
+    assert len(error.value.errors) == 3
+    assert "points 不可為空" in messages
+    assert "rounds" in messages
+    assert "未知的欄位 pionts" in messages
+
+
+def test_mode_mismatch():
+    with pytest.raises(PlanError):
+        compile_plan({"mode": "rounds"}, mode="turntable")
+
+
+@pytest.mark.parametrize("spec", [
+    {"points": [1, 2, 2]},
+    {"points": [0, 1]},
+    {"points": "a-b"},
+    {"angles": [0, 0]},
+    {"angles": [180], "wrap_limit": 90},
+    {"order": ["point", "tilt"]},
+    {"timing": {"test_duration": -1}},
+    {"retry": {"hc12_min_timeout": 20, "hc12_timeout": 10}},
+])
+def test_invalid_specs(spec):
+    with pytest.raises(PlanError):
+        compile_plan(dict(spec, mode="turntable"))
+
+
+def test_point_range_string():
+    plan = compile_plan({"mode": "rounds", "points": "1-3", "rounds": 1})
+    assert points_of(plan) == ["1m", "2m", "3m"]
+
+
+def test_rounds_serpentine_order():
+    plan = compile_plan({"mode": "rounds", "points": [1, 2, 3], "rounds": 2, "serpentine": True})
+    assert points_of(plan) == ["1m", "2m", "3m", "3m", "2m", "1m"]
+    assert [task.round_index for task in plan.tasks] == [0, 0, 0, 1, 1, 1]
+    assert [task.seq for task in plan.tasks] == list(range(1, 7))
+
+
+def test_rounds_without_serpentine():
+    plan = compile_plan({"mode": "rounds", "points": [1, 2, 3], "rounds": 2, "serpentine": False})
+    assert points_of(plan) == ["1m", "2m", "3m", "1m", "2m", "3m"]
+
+
+def test_turntable_rotates_once_per_angle():
+    plan = compile_plan({"mode": "turntable", "points": [1, 2], "angles": [0, 90], "order": ["angle", "point"]})
+    assert [(task.angle, task.point) for task in plan.tasks] == [(0, "1m"), (0, "2m"), (90, "2m"), (90, "1m")]
+    assert [task.rotate_to for task in plan.tasks] == [0, None, 90, None]
+    assert plan.transitions["rotation"] == 2
+
+
+def test_rounds_axis_never_reversed():
+    plan = compile_plan({"mode": "turntable", "points": [1], "angles": [0], "rounds": 3,
+                         "order": ["angle", "round", "point"]})
+    assert [task.round_index for task in plan.tasks] == [0, 1, 2]
+
+
+def test_remaining_skips_done_stations_in_order():
+    plan = compile_plan({"mode": "rounds", "points": [1, 2, 3], "rounds": 2})
+    done = {plan.key(task) for task in plan.tasks[:2]} | {plan.key(plan.tasks[4])}
+    remaining = plan.remaining(done)
+    assert [task.seq for task in remaining] == [3, 4, 6]
+    assert plan.remaining() == plan.tasks
+    assert plan.estimate_sec(remaining) < plan.estimate_sec(plan.tasks)
+
+
+def test_key_matches_station_records():
+    plan = compile_plan({"mode": "turntable", "points": [3], "angles": [45]})
+    assert plan.key(plan.tasks[0]) == (1, 45, "3m")
@@ -0,0 +1,129 @@
+# =============================================
+# 🔹 測試看門狗 - tests/test_campaign_watchdog.py
+# 功能：停滯時依序執行恢復動作（重送 → 重新連線 → 跳過此站 → 中止並拋出 CampaignStalled）、
+#       有新進度後從第一個動作重新開始，以及抵達期限逾時重送（時鐘加速 x1000，不需硬體）
+# =============================================
+
+import asyncio
+import pytest
+from clock_util import Clock
+from campaign_watchdog import CampaignWatchdog, CampaignStalled, TravelEstimator, ArrivalTimeout
+
+SCALE = 1000  # 模擬 10 秒 = 實際 10 ms
+
+
+def make_watchdog(policy=("resend", "reconnect", "skip_station", "abort"), stall_sec=10):
+    logs = []
+    watchdog = CampaignWatchdog(stall_sec=stall_sec, policy=policy, poll_sec=1, clock=Clock(SCALE),
+                                log_func=logs.append)
+    return watchdog, logs
+
+
+def test_escalates_in_policy_order_then_aborts():
+    calls = []
+
+    async def run():
+        watchdog, _ = make_watchdog()
+        for name in ("resend", "reconnect", "skip_station"):
+            watchdog.add_action(name, lambda name=name: calls.append(name))
+        async with watchdog:
+            watchdog.touch("arrived 1m")
+            await asyncio.Event().wait()        # 之後沒有任何進度
+
+    with pytest.raises(CampaignStalled, match="arrived 1m"):
+        asyncio.run(run())
+    assert calls == ["resend", "reconnect", "skip_station"]
+
+
+def test_progress_restarts_from_first_action():
+    calls = []
+
+    async def run():
+        watchdog, _ = make_watchdog(policy=("resend", "reconnect", "abort"))
+
+        def resend():
+            calls.append("resend")
+            if calls.count("resend") == 1:
+                watchdog.touch("arrived")       # 重送後小智抵達：進度恢復
+
+        async def reconnect():
+            calls.append("reconnect")
+
+        watchdog.add_action("resend", resend)
+        watchdog.add_action("reconnect", reconnect)
+        async with watchdog:
+            await asyncio.Event().wait()
+
+    with pytest.raises(CampaignStalled):
+        asyncio.run(run())
+    assert calls == ["resend", "resend", "reconnect"]
+
+
+def test_failed_or_unregistered_action_does_not_stop_escalation():
+    watchdog, logs = make_watchdog(policy=("resend", "reconnect", "abort"))
+
+    def resend():
+        raise ConnectionError("socket closed")
+
+    watchdog.add_action("resend", resend)       # reconnect 未登記
+
+    async def run():
+        async with watchdog:
+            await asyncio.Event().wait()
+
+    with pytest.raises(CampaignStalled):
+        asyncio.run(run())
+    assert [action for _, action in watchdog.recoveries] == ["resend", "reconnect", "abort"]
+    assert any("恢復動作 resend 失敗: socket closed" in msg for msg in logs)
+    assert any("未登記的恢復動作 reconnect" in msg for msg in logs)
+
+
+def test_disabled_watchdog_never_interrupts():
+    async def run():
+        watchdog, _ = make_watchdog(stall_sec=0)
+        async with watchdog:
+            await asyncio.sleep(0.05)           # 模擬 50 秒沒有進度
+        return watchdog
+
+    watchdog = asyncio.run(run())
+    assert watchdog.monitor_task is None and watchdog.recoveries == []
+
+
+def make_estimator(**kwargs):
+    return TravelEstimator(base_sec=10, sec_per_meter=2, factor=2.0, min_sec=5, clock=Clock(SCALE),
+                           log_func=lambda msg: None, **kwargs)
+
+
+def test_arrival_after_resend_is_not_recorded():
+    resends = []
+
+    async def run():
+        estimator = make_estimator(max_resends=2)
+        arrived = asyncio.Event()
+
+        async def resend():
+            resends.append(1)
+            arrived.set()
+
+        elapsed = await estimator.wait("5m", arrived, resend)
+        return estimator, elapsed
+
+    estimator, elapsed = asyncio.run(run())
+    assert resends == [1] and elapsed > 39      # 期限 = (10 + 2 × 5) × 2 = 40 秒後才重送
+    assert estimator.position == 5 and not estimator.samples
+
+
+def test_arrival_timeout_after_max_resends():
+    resends = []
+
+    async def run():
+        estimator = make_estimator(max_resends=2)
+
+        async def resend():
+            resends.append(1)
+
+        await estimator.wait("3m", asyncio.Event(), resend)
+
+    with pytest.raises(ArrivalTimeout, match="3m"):
+        asyncio.run(run())
+    assert len(resends) == 2
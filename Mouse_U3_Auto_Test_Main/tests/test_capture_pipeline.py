@@ -0,0 +1,44 @@
+# =============================================
+# 🔹 截圖設定檢查 - tests/test_capture_pipeline.py
+# 功能：CapturePipeline.validate 在設定不完整時於測試開始前停止，及擷取範圍的選擇（模擬 GUI，不需桌面）
+# =============================================
+
+import pytest
+from simulators import fake_gui
+
+fake_gui.install(force=True, log_func=lambda *a, **k: None)
+
+from mouse_test_screenshot import CapturePipeline  # noqa: E402  需先放入假的 pyautogui / pygetwindow
+
+
+def make_pipeline(**kwargs):
+    pipeline = CapturePipeline(**kwargs)
+    pipeline.shutdown(wait=False)  # 只檢查設定，不需要執行緒
+    return pipeline
+
+
+def test_window_mode_without_title_fails_and_lists_windows():
+    pipeline = make_pipeline(mode="window")
+    with pytest.raises(ValueError, match=fake_gui.PRIMAX_TITLE):
+        pipeline.validate([None])
+
+
+def test_window_mode_accepts_title_or_slot_titles():
+    make_pipeline(mode="window", window_title="Primax").validate([None])
+    make_pipeline(mode="window").validate(["Primax A", "Primax B"])
+    with pytest.raises(ValueError):
+        make_pipeline(mode="window").validate(["Primax A", None])
+
+
+def test_region_mode_requires_region():
+    with pytest.raises(ValueError):
+        make_pipeline(mode="region").validate()
+    make_pipeline(mode="region", region=(0, 0, 100, 50)).validate()
+    with pytest.raises(ValueError):
+        make_pipeline(mode="screen").validate()
+
+
+def test_capture_region_crops_to_window():
+    pipeline = make_pipeline(mode="window", window_title=fake_gui.PRIMAX_TITLE)
+    assert pipeline.capture_region(log_func=lambda msg: None) == (200, 100, 1280, 800)
+    assert make_pipeline(mode="full").capture_region() is None
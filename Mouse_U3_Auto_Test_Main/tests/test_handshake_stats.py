@@ -0,0 +1,81 @@
+# =============================================
+# 🔹 HC-12 握手逾時學習 - tests/test_handshake_stats.py
+# 功能：HandshakeStats 的 p99 × 安全係數、上下限、樣本不足時的後備與 JSON 保存（不需硬體）
+# =============================================
+
+import json
+import pytest
+from serial_util import HandshakeStats
+
+
+def make_stats(tmp_path, **kwargs):
+    return HandshakeStats(path=str(tmp_path / "hc12_stats.json"), log_func=lambda msg: None, **kwargs)
+
+
+def test_no_samples_uses_max_timeout(tmp_path):
+    stats = make_stats(tmp_path)
+    assert stats.timeout_for("COM3", "1m", min_timeout=1, max_timeout=10) == (10, 0)
+
+
+def test_too_few_samples_uses_max_timeout(tmp_path):
+    stats = make_stats(tmp_path, min_samples=5)
+    for _ in range(4):
+        stats.record("COM3", "1m", 2.0)
+    assert stats.timeout_for("COM3", "1m", min_timeout=1, max_timeout=10) == (10, 0)
+
+
+def test_p99_times_margin(tmp_path):
+    stats = make_stats(tmp_path)
+    for latency in (2.0, 2.0, 2.0, 2.0, 2.0, 4.0):
+        stats.record("COM3", "1m", latency)
+    timeout, samples = stats.timeout_for("COM3", "1m", min_timeout=1, max_timeout=10)
+    # p99 以線性內插：2.0 + (4.0 - 2.0) × 0.95 = 3.9，× 1.5
+    assert samples == 6
+    assert timeout == pytest.approx(3.9 * 1.5)
+
+
+def test_clamped_to_limits(tmp_path):
+    stats = make_stats(tmp_path)
+    for _ in range(5):
+        stats.record("COM3", "fast", 0.1)
+        stats.record("COM3", "slow", 9.0)
+    assert stats.timeout_for("COM3", "fast", min_timeout=1, max_timeout=10)[0] == 1
+    assert stats.timeout_for("COM3", "slow", min_timeout=1, max_timeout=10)[0] == 10
+
+
+def test_unknown_station_falls_back_to_port_total(tmp_path):
+    stats = make_stats(tmp_path)
+    for station in ("1m", "2m", "3m", "4m", "5m"):
+        stats.record("COM3", station, 2.0)
+    assert stats.timeout_for("COM3", "9m", min_timeout=1, max_timeout=10) == (3.0, 5)
+    assert stats.timeout_for("COM7", "9m", min_timeout=1, max_timeout=10) == (10, 0)
+
+
+def test_window_keeps_latest_samples(tmp_path):
+    stats = make_stats(tmp_path, window=5)
+    for _ in range(5):
+        stats.record("COM3", "1m", 8.0)
+    for _ in range(5):
+        stats.record("COM3", "1m", 2.0)
+    assert stats.timeout_for("COM3", "1m", min_timeout=1, max_timeout=10) == (3.0, 5)
+
+
+def test_saved_stats_are_reloaded(tmp_path):
+    stats = make_stats(tmp_path)
+    for _ in range(5):
+        stats.record("COM3", "1m", 2.0)
+    stats.save()
+    reloaded = make_stats(tmp_path)
+    assert reloaded.timeout_for("COM3", "1m", min_timeout=1, max_timeout=10) == (3.0, 5)
+    assert not (tmp_path / "hc12_stats.json.tmp").exists()
+
+
+def test_corrupt_file_is_ignored(tmp_path):
+    (tmp_path / "hc12_stats.json").write_text("{not json", encoding="utf-8")
+    messages = []
+    stats = HandshakeStats(path=str(tmp_path / "hc12_stats.json"), log_func=messages.append)
+    assert stats.timeout_for("COM3", "1m", min_timeout=1, max_timeout=10) == (10, 0)
+    assert any("無法讀取" in msg for msg in messages)
+    stats.record("COM3", "1m", 2.0)
+    stats.save()
+    assert json.loads((tmp_path / "hc12_stats.json").read_text(encoding="utf-8"))["ports"]["COM3"]["1m"] == [2.0]
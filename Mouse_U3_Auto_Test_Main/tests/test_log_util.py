@@ -0,0 +1,89 @@
+# =============================================
+# 🔹 LOG 背景寫入 - tests/test_log_util.py
+# 功能：LogWriter 的 flush / close、關閉後的紀錄同步寫入、JSONL 欄位與 init_log 不覆蓋舊檔
+# =============================================
+
+import json
+import time
+import threading
+from log_util import LogWriter, classify, init_log
+
+
+def make_writer(tmp_path):
+    return LogWriter(str(tmp_path / "run.txt"), str(tmp_path / "run.jsonl"), console=False)
+
+
+def read_jsonl(tmp_path):
+    with open(tmp_path / "run.jsonl", encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+
+def test_classify():
+    assert classify("[HC-12] ❌ 串口開啟失敗") == ("ERROR", "HC-12")
+    assert classify("[Main] ⚠️ 找不到視窗") == ("WARNING", "Main")
+    assert classify("[DEBUG] HC-12 通訊總耗時") == ("DEBUG", "DEBUG")
+    assert classify("🔗 已連接到小智") == ("INFO", "Main")
+
+
+def test_flush_writes_queued_records(tmp_path):
+    writer = make_writer(tmp_path)
+    writer.emit("[HC-12] ✅ 傳送: Robot_Arrived")
+    writer.write_raw("=== raw ===\n")
+    writer.flush()
+    text = (tmp_path / "run.txt").read_text(encoding="utf-8")
+    assert "[HC-12] ✅ 傳送: Robot_Arrived\n" in text and text.endswith("=== raw ===\n")
+    records = read_jsonl(tmp_path)
+    assert len(records) == 1  # write_raw 不進 JSONL
+    assert records[0]["component"] == "HC-12" and records[0]["level"] == "INFO"
+    writer.close()
+
+
+def test_records_after_close_are_written_synchronously(tmp_path):
+    writer = make_writer(tmp_path)
+    writer.emit("before close")
+    writer.close()
+    writer.emit("[Pipeline] 📸 背景任務完成", component="Pipeline")
+    writer.write_raw("[LOG END]\n")
+    lines = (tmp_path / "run.txt").read_text(encoding="utf-8").splitlines()
+    assert lines[0].endswith("before close")
+    assert lines[1].endswith("[Pipeline] 📸 背景任務完成") and lines[2] == "[LOG END]"
+    assert [r["msg"] for r in read_jsonl(tmp_path)] == ["before close", "[Pipeline] 📸 背景任務完成"]
+
+
+def test_flush_after_close_returns_immediately(tmp_path):
+    writer = make_writer(tmp_path)
+    writer.close()
+    start = time.monotonic()
+    writer.flush(timeout=5)
+    assert time.monotonic() - start < 0.5
+    writer.close()  # 重複關閉不會出錯
+
+
+def test_flush_racing_close_never_waits_for_timeout(tmp_path):
+    writer = make_writer(tmp_path)
+    durations = []
+
+    def flusher():
+        for _ in range(200):
+            start = time.monotonic()
+            writer.flush(timeout=2)
+            durations.append(time.monotonic() - start)
+
+    thread = threading.Thread(target=flusher)
+    thread.start()
+    writer.emit("racing")
+    writer.close()
+    thread.join()
+    assert max(durations) < 1  # 關閉標記之後不會再排入等不到的 flush
+
+
+def test_init_log_does_not_overwrite(tmp_path):
+    base = tmp_path / "main"
+    base.mkdir()
+    first, log_print = init_log("Unit_Test", str(base))
+    log_print("hello")
+    first.close()
+    second, _ = init_log("Unit_Test", str(base))
+    second.close()
+    assert first.path.endswith("_Unit_Test_LOG_1.txt") and second.path.endswith("_Unit_Test_LOG_2.txt")
+    assert "hello" in open(first.path, encoding="utf-8").read()
@@ -0,0 +1,80 @@
+# =============================================
+# 🔹 結果判讀 - tests/test_result_analyzer.py
+# 功能：ReportRateAnalyzer 以字形模板讀值（含小數點）、PASS/FAIL 判定，
+#       未設定數值區域時不啟用判讀（以 PIL 繪製的數字代替 Primax 截圖）
+# =============================================
+
+import pytest
+from PIL import Image, ImageDraw, ImageFont
+import config
+import result_analyzer
+from result_analyzer import ReportRateAnalyzer, build_templates, parse_value
+
+REGION = (0, 0, 400, 80)
+
+
+def render(text, path=None):
+    image = Image.new("RGB", (500, 120), "white")
+    ImageDraw.Draw(image).text((10, 10), text, fill="black", font=ImageFont.load_default(size=40))
+    if path:
+        image.save(path)
+    return image
+
+
+@pytest.fixture
+def template_dir(tmp_path):
+    sample = str(tmp_path / "sample.png")
+    render("0123456789", sample)
+    path = str(tmp_path / "templates")
+    assert build_templates(sample, "0123456789", path, REGION) == 10
+    return path
+
+
+def make_analyzer(template_dir, **kwargs):
+    return ReportRateAnalyzer(template_dir, REGION, log_func=lambda msg: None, **kwargs)
+
+
+def test_reads_integer_value(template_dir):
+    result = make_analyzer(template_dir).analyze(render("1000"))
+    assert (result["report_rate"], result["raw_text"], result["status"]) == (1000, "1000", "PASS")
+
+
+def test_decimal_point_is_kept(template_dir):
+    result = make_analyzer(template_dir).analyze(render("12.5"))
+    assert result["raw_text"] == "12.5"
+    assert result["report_rate"] == pytest.approx(12.5)  # 不會被讀成 125
+    assert result["status"] == "FAIL"
+
+
+def test_build_templates_skips_decimal_point(tmp_path):
+    sample = str(tmp_path / "sample.png")
+    render("98.7", sample)
+    path = str(tmp_path / "templates")
+    assert build_templates(sample, "98.7", path, REGION) == 4
+    assert sorted(p.name for p in (tmp_path / "templates").iterdir()) == ["7.png", "8.png", "9.png"]
+    with pytest.raises(ValueError):
+        build_templates(sample, "9.87", path, REGION)  # 小數點位置不符
+
+
+def test_parse_value():
+    assert parse_value("1000") == 1000
+    assert parse_value("999.5") == 999.5
+    assert parse_value("1?00") is None
+    assert parse_value("1.2.3") is None
+    assert parse_value("") is None
+
+
+def test_listener_receives_record_with_meta(template_dir):
+    analyzer = make_analyzer(template_dir)
+    records = []
+    analyzer.add_listener(records.append)
+    analyzer(render("500"), "a.png", {"point": "1m", "round": 1})
+    assert records == analyzer.records
+    assert records[0]["point"] == "1m" and records[0]["report_rate"] == 500 and records[0]["screenshot"] == "a.png"
+
+
+def test_station_analyzer_disabled_without_value_region(monkeypatch):
+    monkeypatch.setattr(config, "RESULT_VALUE_REGION", None)
+    logs = []
+    assert result_analyzer.create_station_analyzer("Mouse_Test", log_func=logs.append) is None
+    assert "RESULT_VALUE_REGION" in logs[0]
@@ -0,0 +1,106 @@
+# =============================================
+# 🔹 測試紀錄索引 - tests/test_run_index.py
+# 功能：RunIndex 的寫入、續跑、站點查詢（含判讀結果）、彙總與歷史查詢（暫存 SQLite，不需硬體）
+# =============================================
+
+import pytest
+from run_index import RunIndex
+
+
+@pytest.fixture
+def index(tmp_path):
+    run_index = RunIndex(str(tmp_path / "run_index.sqlite3"))
+    yield run_index
+    run_index.close()
+
+
+def station(point, success=True, angle=0, round_=1, dut="U3", total_sec=90.0, started_at="2025-07-11T10:00:00",
+            **timings):
+    return {"point": point, "success": success, "angle": angle, "round": round_, "dut": dut,
+            "total_sec": total_sec, "started_at": started_at, "handshake_attempts": 1,
+            "timings": dict({"travel": 5.0, "settle": 3.2, "handshake": 2.5, "test": 80.0}, **timings)}
+
+
+def test_station_timings_are_stored(index):
+    campaign = index.start_campaign("Mouse_Test", "U3", config={"points": ["1m"]})
+    index.record_station(campaign, station("1m"))
+    row = index.query_stations(campaign_id=campaign)[0]
+    assert (row["seq"], row["point"], row["test_type"]) == (1, "1m", "Mouse_Test")
+    assert row["settle_sec"] == pytest.approx(3.2) and row["handshake_sec"] == pytest.approx(2.5)
+
+
+def test_query_filters(index):
+    campaign = index.start_campaign("Mouse_Test_Turntable", "U3")
+    index.record_station(campaign, station("7m", angle=-45, started_at="2025-07-01T09:00:00"))
+    index.record_station(campaign, station("7m", angle=45, started_at="2025-07-02T09:00:00"))
+    index.record_station(campaign, station("1m", angle=-45, dut="U4", started_at="2025-07-03T09:00:00"))
+    assert [r["angle"] for r in index.query_stations(point="7m")] == [-45, 45]
+    assert [r["point"] for r in index.query_stations(angle=-45)] == ["7m", "1m"]
+    assert [r["dut"] for r in index.query_stations(dut="U4")] == ["U4"]
+    assert len(index.query_stations(since="2025-07-02", until="2025-07-03")) == 1
+    assert index.query_stations(angle=0) == []  # angle=0 仍是篩選條件
+
+
+def test_results_join_by_screenshot(index):
+    campaign = index.start_campaign("Mouse_Test", "U3")
+    station_id = index.record_station(campaign, station("1m"))
+    index.update_capture(station_id, "a.png", 1.2)
+    index.record_result(campaign, {"screenshot": "a.png", "point": "1m", "round": 1,
+                                   "report_rate": 1000, "status": "PASS", "raw_text": "1000"})
+    row = index.query_stations(campaign_id=campaign)[0]
+    assert (row["screenshot_path"], row["report_rate"], row["result_status"]) == ("a.png", 1000, "PASS")
+    summary = index.summarize()
+    assert summary[0]["passed"] == 1 and summary[0]["avg_report_rate"] == 1000
+
+
+def test_resume_continues_seq_and_counts_retested_station_once(index):
+    campaign = index.start_campaign("Mouse_Test", "U3", log_path="run1.txt")
+    index.record_station(campaign, station("1m", total_sec=90))
+    index.record_station(campaign, station("2m", success=False, total_sec=40))
+    index.finish_campaign(campaign, "interrupted")
+
+    resumed = RunIndex(index.db_path)  # 新的程序續跑
+    resumed.resume_campaign(campaign, "run2.txt")
+    resumed.record_station(campaign, station("2m", total_sec=95))  # 失敗站點重新測試
+    resumed.finish_campaign(campaign)
+    resumed.close()
+
+    assert [r["seq"] for r in index.query_stations(campaign_id=campaign)] == [1, 2, 3]
+    row = index.query_campaigns()[0]
+    assert (row["status"], row["log_path"]) == ("completed", "run1.txt;run2.txt")
+    totals = index.campaign_totals(campaign)
+    assert (totals["stations"], totals["succeeded"]) == (2, 2)
+    assert totals["total_sec"] == pytest.approx(225)
+
+
+def test_station_history_limits_to_recent_campaigns_of_type(index):
+    for n in range(3):
+        campaign = index.start_campaign("Mouse_Test_Turntable", "U3")
+        index.record_station(campaign, station(f"{n + 1}m"))
+    other = index.start_campaign("Mouse_Test", "U3")
+    index.record_station(other, station("9m"))
+    history = index.station_history("Mouse_Test_Turntable", campaigns=2)
+    assert [r["point"] for r in history] == ["2m", "3m"]
+
+
+def test_station_listener_updates_capture_when_done(index):
+    class DoneTask:
+        def __init__(self):
+            self.callbacks = []
+
+        def add_done_callback(self, callback):
+            self.callbacks.append(callback)
+
+        def cancelled(self):
+            return False
+
+        def result(self):
+            return "b.png"
+
+    campaign = index.start_campaign("Mouse_Test", "U3")
+    task = DoneTask()
+    record = dict(station("1m"), capture_task=task)
+    index.station_listener(campaign)(record)
+    assert index.query_stations()[0]["screenshot_path"] is None  # 截圖仍在背景
+    task.callbacks[0](task)
+    assert index.query_stations()[0]["screenshot_path"] == "b.png"
@@ -0,0 +1,141 @@
+# =============================================
+# 🔹 串口行協定引擎 - tests/test_serial_line_engine.py
+# 功能：SerialLineEngine 的多等待者分派、since 歷史比對、逾時、訂閱者，
+#       open_line_engine 的共用 / 各 port 獨立初始化，與 HC12Serial.wait_for 的 LOG（不需硬體）
+# =============================================
+
+import time
+import asyncio
+import threading
+import serial_line_engine
+import serial_util
+from serial_line_engine import SerialLineEngine, contains, exact, open_line_engine
+
+
+def make_engine():
+    return SerialLineEngine("COM_TEST", log_func=lambda msg: None)
+
+
+def feed_later(engine, lines, delay=0.01):
+    """模擬讀取執行緒：稍後從另一條執行緒送入各行"""
+    def run():
+        time.sleep(delay)
+        for line in lines:
+            engine._dispatch(line, time.time())
+    threading.Thread(target=run, daemon=True).start()
+
+
+def test_waiter_ignores_other_lines():
+    engine = make_engine()
+
+    async def run():
+        feed_later(engine, ["noise", "Test_Start"])
+        return await engine.wait_for("Test_Start", timeout=2)
+
+    assert asyncio.run(run()) == "Test_Start"
+    assert engine.waiters == []
+
+
+def test_multiple_waiters_resolve_from_same_line():
+    engine = make_engine()
+
+    async def run():
+        feed_later(engine, ["輪盤旋轉完成 90"])
+        return await asyncio.gather(engine.wait_for(contains("旋轉完成"), timeout=2),
+                                    engine.wait_for(contains("90"), timeout=2))
+
+    assert asyncio.run(run()) == ["輪盤旋轉完成 90", "輪盤旋轉完成 90"]
+
+
+def test_since_matches_history_after_timestamp():
+    engine = make_engine()
+    engine._dispatch("Test_Start", 100.0)
+    engine._dispatch("Test_Start", 200.0)
+
+    async def run():
+        return (await engine.wait_for("Test_Start", timeout=0.01, since=150.0),
+                await engine.wait_for("Test_Start", timeout=0.01, since=300.0))
+
+    assert asyncio.run(run()) == ("Test_Start", None)  # 只接受 since 之後的行
+    assert engine.waiters == []
+
+
+def test_without_since_only_new_lines_match():
+    engine = make_engine()
+    engine._dispatch("Test_Start", time.time())
+
+    async def run():
+        return await engine.wait_for("Test_Start", timeout=0.01)
+
+    assert asyncio.run(run()) is None
+
+
+def test_wait_for_blocking_and_timeout():
+    engine = make_engine()
+    feed_later(engine, ["Relay_End"])
+    assert engine.wait_for_blocking(exact("Relay_End"), timeout=2) == "Relay_End"
+    assert engine.wait_for_blocking("never", timeout=0.01) is None
+    assert engine.waiters == []
+
+
+def test_subscriber_sees_every_line_until_unsubscribed():
+    engine = make_engine()
+    received = []
+    unsubscribe = engine.subscribe(lambda line, arrival: received.append(line))
+    engine._dispatch("a", 1.0)
+    unsubscribe()
+    engine._dispatch("b", 2.0)
+    assert received == ["a"]
+
+
+class FakePort:
+    is_open = True
+
+    def close(self):
+        self.is_open = False
+
+
+def test_open_line_engine_shares_port_and_opens_ports_in_parallel(monkeypatch):
+    def fake_open(self, init_delay=2):
+        time.sleep(0.2)  # 模擬 Arduino 重置等待
+        self.ser = FakePort()
+
+    monkeypatch.setattr(SerialLineEngine, "open", fake_open)
+    monkeypatch.setattr(serial_line_engine, "_engines", {})
+    monkeypatch.setattr(serial_line_engine, "_port_locks", {})
+    engines = {}
+
+    def worker(port):
+        engines.setdefault(port, []).append(open_line_engine(port))
+
+    threads = [threading.Thread(target=worker, args=(port,)) for port in ("COM3", "COM4", "COM3")]
+    start = time.monotonic()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.monotonic() - start
+
+    assert elapsed < 0.35  # COM3 / COM4 同時初始化，不必依序等待
+    first, second = engines["COM3"]
+    assert first is second and first.refs == 2
+    assert engines["COM4"][0] is not first
+
+
+def test_hc12_wait_for_logs_received_line_once(monkeypatch):
+    engine = make_engine()
+    engine.ser = FakePort()
+    monkeypatch.setattr(serial_util, "open_line_engine", lambda *args, **kwargs: engine)
+    logs = []
+    hc12 = serial_util.HC12Serial("COM_TEST", log_func=logs.append,
+                                  stats=serial_util.HandshakeStats(path="unused.json", log_func=logs.append))
+    engine._dispatch("noise", 100.0)
+    engine._dispatch("Test_Start", 101.0)
+
+    async def run():
+        first = await hc12.wait_for("Test_Start", timeout=0.01, since=50.0)
+        second = await hc12.wait_for("Test_Start", timeout=0.01, since=50.0)  # 重送後再次比對歷史
+        return first, second
+
+    assert asyncio.run(run()) == (True, True)
+    assert [msg for msg in logs if "📩" in msg] == ["[HC-12] 📩 收到: 'Test_Start'"] * 2
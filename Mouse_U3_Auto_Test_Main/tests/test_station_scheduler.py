@@ -0,0 +1,160 @@
+# =============================================
+# 🔹 站點排程 - tests/test_station_scheduler.py
+# 功能：StationScheduler 管線化（截圖於背景、行駛與截圖重疊）、回穩 / 停留計時、
+#       失敗站點與站點紀錄回呼（假的送餐機、HC-12 與時鐘，不需硬體）
+# =============================================
+
+import asyncio
+import concurrent.futures
+from simulators import fake_gui
+
+fake_gui.install(force=True, log_func=lambda *a, **k: None)  # 測試中不可真的按鍵
+
+import pyautogui  # noqa: E402
+from station_scheduler import StationScheduler  # noqa: E402  需先放入假的 pyautogui
+from campaign_watchdog import ArrivalTimeout  # noqa: E402
+
+
+class FakeClock:
+    """手動時鐘：sleep 立即推進時間（overshoot：每次 sleep 多睡的秒數，模擬實際等待超過設定）"""
+
+    def __init__(self, overshoot=0.0):
+        self.now = 1000.0
+        self.overshoot = overshoot
+
+    def time(self):
+        return self.now
+
+    async def sleep(self, seconds):
+        self.now += max(seconds, 0) + self.overshoot
+        await asyncio.sleep(0)
+
+
+class FakeRobot:
+    def __init__(self, events, clock, travel_sec=5, unreachable=()):
+        self.events = events
+        self.clock = clock
+        self.travel_sec = travel_sec
+        self.unreachable = set(unreachable)
+
+    async def go_to(self, point):
+        self.events.append(("go_to", point))
+        if point in self.unreachable:
+            raise ArrivalTimeout(f"{point} 逾時")
+        await self.clock.sleep(self.travel_sec)
+
+
+class FakeHC12:
+    def __init__(self, events, ok=True):
+        self.events = events
+        self.ok = ok
+
+    async def handshake(self, station, **kwargs):
+        self.events.append(("handshake", station))
+        return self.ok, 1.5, 1
+
+
+def make_scheduler(events, clock, hc12_ok=True, **kwargs):
+    robot = FakeRobot(events, clock, unreachable=kwargs.pop("unreachable", ()))
+    return StationScheduler(robot, FakeHC12(events, hc12_ok), log_func=lambda *a, **k: None,
+                            clock=clock, test_duration=80, settle_sec=3, **kwargs)
+
+
+def test_next_station_departs_before_capture_finishes():
+    events = []
+    captures = []
+
+    def capture():
+        future = concurrent.futures.Future()
+        captures.append(future)
+        events.append(("capture", len(captures)))
+        return future
+
+    async def run():
+        scheduler = make_scheduler(events, FakeClock())
+        first = await scheduler.run_station("A", capture)
+        assert first["success"] and not captures[0].done()  # 截圖仍在背景
+        second = asyncio.ensure_future(scheduler.run_station("B", capture))
+        for _ in range(20):
+            await asyncio.sleep(0)
+        # 已派車並完成握手，但上一站截圖未完成前不按空白鍵
+        assert ("go_to", "B") in events and ("handshake", "B") in events
+        assert len(captures) == 1 and not second.done()
+        captures[0].set_result("A.png")
+        await second
+        captures[1].set_result("B.png")
+        await scheduler.drain()
+        return first, second.result()
+
+    first, second = asyncio.run(run())
+    assert events.index(("go_to", "B")) < events.index(("capture", 2))
+    assert first["capture_task"].result() == "A.png"
+    assert second["capture_task"].result() == "B.png"
+
+
+def test_timings_record_measured_settle():
+    events = []
+
+    async def run():
+        scheduler = make_scheduler(events, FakeClock(overshoot=0.5))
+        return await scheduler.run_station("A", lambda: "A.png")
+
+    result = asyncio.run(run())
+    assert result["timings"]["travel"] == 5.5
+    assert result["timings"]["settle"] == 3.5  # 實際經過時間，不是設定值
+    assert result["timings"]["handshake"] == 1.5
+
+
+def test_min_dwell_pads_after_test():
+    events = []
+
+    async def run():
+        scheduler = make_scheduler(events, FakeClock(), min_dwell_sec=150)
+        return await scheduler.run_station("A", lambda: "A.png")
+
+    result = asyncio.run(run())
+    assert result["timings"]["test"] == 80
+    assert result["timings"]["padding"] == 70
+
+
+def test_unreachable_station_is_skipped():
+    events = []
+
+    async def run():
+        scheduler = make_scheduler(events, FakeClock(), unreachable={"A"})
+        return await scheduler.run_station("A", lambda: "A.png")
+
+    result = asyncio.run(run())
+    assert not result["success"] and result["error"] == "arrival_timeout"
+    assert ("handshake", "A") not in events
+
+
+def test_handshake_failure_does_not_start_test():
+    events = []
+    before = len(pyautogui.pressed)
+
+    async def run():
+        scheduler = make_scheduler(events, FakeClock(), hc12_ok=False)
+        return await scheduler.run_station("A", lambda: "A.png")
+
+    result = asyncio.run(run())
+    assert not result["success"] and "capture_task" not in result
+    assert len(pyautogui.pressed) == before
+
+
+def test_listeners_receive_record_and_errors_are_isolated():
+    events = []
+    records = []
+
+    def broken(record):
+        raise RuntimeError("db locked")
+
+    async def run():
+        scheduler = make_scheduler(events, FakeClock())
+        scheduler.add_listener(broken)
+        scheduler.add_listener(records.append)
+        return await scheduler.run_station("A", lambda: "A.png", tags={"round": 1, "angle": 0})
+
+    result = asyncio.run(run())
+    assert records == [result]
+    assert records[0]["round"] == 1 and records[0]["total_sec"] > 0
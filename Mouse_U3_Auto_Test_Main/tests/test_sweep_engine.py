@@ -0,0 +1,136 @@
+# =============================================
+# 🔹 掃描測試引擎 - tests/test_sweep_engine.py
+# 功能：DutAxis 只開啟計畫的 slot（相同設定沿用），run_test_cycle 在設定階段失敗時
+#       仍移除判讀器並關閉各軸（假的軸與判讀器，不需硬體）
+# =============================================
+
+import asyncio
+import pytest
+from simulators import fake_gui
+
+fake_gui.install(force=True, log_func=lambda *a, **k: None)
+
+import sweep_engine  # noqa: E402  需先放入假的 pyautogui / pygetwindow
+from campaign_plan import compile_plan  # noqa: E402
+from run_index import RunIndex  # noqa: E402
+from mouse_test_screenshot import get_capture_pipeline  # noqa: E402
+
+
+class FakeSlot:
+    def __init__(self, name):
+        self.name = name
+        self.window_title = fake_gui.PRIMAX_TITLE
+        self.closed = False
+
+
+def test_dut_axis_opens_plan_slots_once(monkeypatch):
+    opened = []
+
+    def fake_open_slots(log_func=print, slots=None):
+        opened.append(slots)
+        return [FakeSlot(slot["name"]) for slot in slots or [{"name": None}]]
+
+    monkeypatch.setattr(sweep_engine, "open_slots", fake_open_slots)
+    monkeypatch.setattr(sweep_engine, "close_slots", lambda slots: [setattr(s, "closed", True) for s in slots])
+    duts = sweep_engine.DutAxis(log_func=lambda msg: None)
+    assert opened == [] and duts.slots == []  # 建立時不開啟任何串口
+
+    plan_slots = [{"name": "U3-A", "com_port": "COM7"}]
+    duts.open(plan_slots)
+    first = duts.slots
+    duts.open(list(plan_slots))  # 相同設定：沿用，不再等待串口初始化
+    assert opened == [plan_slots] and duts.slots is first
+
+    duts.open(None)  # 換回 config：關閉舊的再開啟
+    assert first[0].closed and opened == [plan_slots, None]
+    duts.close()
+    assert duts.slots == []
+
+
+class FakeDuts:
+    def __init__(self):
+        self.slots = [FakeSlot(None)]
+        self.opened = []
+
+    def open(self, dut_slots=None):
+        self.opened.append(dut_slots)
+
+    def label(self):
+        return "U3"
+
+
+class FakeAnalyzer:
+    def __init__(self):
+        self.listeners = []
+
+    def __call__(self, image, filepath, meta=None):
+        pass
+
+    def add_listener(self, listener):
+        self.listeners.append(listener)
+
+    def log_summary(self):
+        pass
+
+
+class FakeAxis:
+    name = "angle"
+
+    def __init__(self):
+        self.closed = 0
+
+    def close(self):
+        self.closed += 1
+
+
+def make_engine(monkeypatch, analyzer):
+    monkeypatch.setattr(sweep_engine, "create_station_analyzer", lambda test_type, log_func=print: analyzer)
+
+    class LogFile:
+        path = "run.txt"
+
+    engine = sweep_engine.SweepEngine("rounds", LogFile(), lambda *a, **k: None, robot=None, duts=FakeDuts())
+    engine.robot = type("Robot", (), {"setup": lambda self, plan: None})()
+
+    async def no_launch():
+        pass
+
+    engine.launch_test_software = no_launch
+    return engine
+
+
+def test_setup_failure_removes_analyzer_and_closes_axes(monkeypatch):
+    analyzer = FakeAnalyzer()
+    engine = make_engine(monkeypatch, analyzer)
+    axis = FakeAxis()
+    engine.axes = [axis]
+
+    def broken_index():
+        raise RuntimeError("database is locked")
+
+    monkeypatch.setattr(sweep_engine, "RunIndex", broken_index)
+    plan = compile_plan({"points": [1], "rounds": 1}, mode="rounds")
+    with pytest.raises(RuntimeError):
+        asyncio.run(engine.run_test_cycle(plan=plan))
+    assert analyzer not in get_capture_pipeline().analyzers
+    assert axis.closed == 1
+    assert engine.duts.opened == [None]
+
+
+def test_axis_setup_failure_marks_campaign_and_cleans_up(monkeypatch, tmp_path):
+    analyzer = FakeAnalyzer()
+    engine = make_engine(monkeypatch, analyzer)
+
+    class FailingAxis(FakeAxis):
+        async def setup(self, plan, stations, checkpoint=None, resumed=False):
+            return False
+
+    axis = FailingAxis()
+    engine.axes = [axis]
+    index_path = str(tmp_path / "run_index.sqlite3")
+    monkeypatch.setattr(sweep_engine, "RunIndex", lambda: RunIndex(index_path))
+    plan = compile_plan({"points": [1], "rounds": 1}, mode="rounds")
+    assert asyncio.run(engine.run_test_cycle(plan=plan)) == "failed"
+    assert analyzer not in get_capture_pipeline().analyzers
+    assert axis.closed == 1
+    assert engine.run_index.query_campaigns()[0]["status"] == "failed"
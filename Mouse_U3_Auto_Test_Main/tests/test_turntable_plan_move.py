@@ -0,0 +1,52 @@
+# =============================================
+# 🔹 輪盤最短路徑 - tests/test_turntable_plan_move.py
+# 功能：TurntableController.plan_move / plan_moves 在線材限制內選最短相對移動（不需硬體）
+# =============================================
+
+import pytest
+from turntable_controller import TurntableController
+
+
+def test_direct_move():
+    turntable = TurntableController(None)
+    assert turntable.plan_move(90) == (90, 90)
+    assert turntable.plan_move(-45) == (-45, -45)
+
+
+def test_already_at_target():
+    turntable = TurntableController(None)
+    turntable.position = 45
+    assert turntable.plan_move(45) == (0, 45)
+
+
+def test_same_direction_picks_shortest_within_limit():
+    turntable = TurntableController(None, wrap_limit=360)
+    # 170° → -170°：同方向的 190° 只差 +20°
+    assert turntable.plan_move(-170, start=170) == (20, 190)
+
+
+def test_wrap_limit_forces_long_way_round():
+    turntable = TurntableController(None, wrap_limit=180)
+    # 190° 超出 ±180°，只能反向轉 340°
+    assert turntable.plan_move(-170, start=170) == (-340, -170)
+    assert turntable.plan_move(-90, start=90) == (-180, -90)
+
+
+def test_target_outside_limit_raises():
+    turntable = TurntableController(None, wrap_limit=90)
+    with pytest.raises(ValueError):
+        turntable.plan_move(180)
+
+
+def test_plan_moves_chains_positions():
+    turntable = TurntableController(None)
+    moves = turntable.plan_moves([0, 45, 90, -45, -90, 0])
+    assert moves == [(0, 0, 0), (45, 45, 45), (90, 45, 90), (-45, -135, -45), (-90, -45, -90), (0, 90, 0)]
+    for _, _, position in moves:
+        assert -turntable.wrap_limit <= position <= turntable.wrap_limit
+    assert turntable.position == 0  # 只計算，不改變目前位置
+
+
+def test_estimate_rotation_sec():
+    turntable = TurntableController(None, deg_per_sec=18)
+    assert turntable.estimate_rotation_sec(-90) == 5
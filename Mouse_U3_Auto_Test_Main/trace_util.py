@@ -0,0 +1,158 @@
+# =============================================
+# 🔹 時間軸追蹤模組 - trace_util.py
+# 功能：以巢狀 span 記錄每個流程階段的開始 / 結束時間，
+#       匯出 Chrome / Perfetto 可開啟的 trace JSON（chrome://tracing、ui.perfetto.dev）
+#       設定 U3_TRACE=1 啟用；未啟用時所有呼叫皆為空操作
+# =============================================
+
+import os
+import json
+import threading
+import contextvars
+from clock_util import get_clock
+
+# 目前所在的 span（asyncio 任務建立時會複製，背景任務自動成為子 span）
+_current_span = contextvars.ContextVar("u3_trace_span", default=None)
+
+
+class Span:
+    """單一階段；以 with 使用，離開時寫入 trace"""
+
+    __slots__ = ("tracer", "name", "track", "args", "start", "parent", "_token")
+
+    def __init__(self, tracer, name, track, args):
+        self.tracer = tracer
+        self.name = name
+        self.track = track
+        self.args = args
+        self.start = None
+        self.parent = None
+        self._token = None
+
+    def set(self, **args):
+        """補充參數（例如結果、重試次數）"""
+        self.args.update(args)
+
+    def __enter__(self):
+        self.parent = _current_span.get()
+        if self.track is None:
+            self.track = self.parent.track if self.parent else "main"
+        self.start = self.tracer.clock.monotonic()
+        self._token = _current_span.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        end = self.tracer.clock.monotonic()
+        _current_span.reset(self._token)
+        if exc_type is not None:
+            self.args["error"] = repr(exc)
+        self.tracer._complete(self, end)
+        return False
+
+
+class _NullSpan:
+    """未啟用時共用的空 span"""
+
+    __slots__ = ()
+
+    def set(self, **args):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class Tracer:
+    """
+    trace 收集器
+    - span(name, track=None, **args)：巢狀階段；track 為時間軸上的列（預設沿用父 span）
+    - instant(name, **args)：單點事件（例如 HC-12 訊號遺失）
+    - export(path)：輸出 Chrome trace JSON
+    時間使用 clock_util 的時鐘，縮放重播時時間軸仍為實際測試秒數
+    """
+
+    enabled = True
+
+    def __init__(self, clock=None):
+        self.clock = clock or get_clock()
+        self.origin = self.clock.monotonic()
+        self.events = []
+        self.tracks = {}
+        self.lock = threading.Lock()
+
+    def span(self, name, track=None, **args):
+        return Span(self, name, track, args)
+
+    def instant(self, name, track=None, **args):
+        parent = _current_span.get()
+        track = track or (parent.track if parent else "main")
+        with self.lock:
+            self.events.append({"name": name, "ph": "i", "s": "t", "ts": self._us(self.clock.monotonic()),
+                                "pid": 1, "tid": self._track_id(track), "args": args})
+
+    def _us(self, t):
+        return round((t - self.origin) * 1e6)
+
+    def _track_id(self, track):
+        if track not in self.tracks:
+            self.tracks[track] = len(self.tracks) + 1
+        return self.tracks[track]
+
+    def _complete(self, span, end):
+        with self.lock:
+            self.events.append({"name": span.name, "cat": span.parent.name if span.parent else "campaign",
+                                "ph": "X", "ts": self._us(span.start), "dur": self._us(end) - self._us(span.start),
+                                "pid": 1, "tid": self._track_id(span.track), "args": span.args})
+
+    def export(self, path):
+        """寫出 trace 檔，回傳路徑"""
+        with self.lock:
+            metadata = [{"name": "thread_name", "ph": "M", "pid": 1, "tid": tid, "args": {"name": track}}
+                        for track, tid in self.tracks.items()]
+            metadata.append({"name": "process_name", "ph": "M", "pid": 1, "args": {"name": "U3 Mouse Auto Test"}})
+            events = sorted(self.events, key=lambda e: e["ts"])
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"traceEvents": metadata + events, "displayTimeUnit": "ms"}, f, ensure_ascii=False)
+        return path
+
+
+class NullTracer:
+    """未啟用追蹤：所有方法皆不做事，span() 回傳共用的空物件"""
+
+    enabled = False
+
+    def span(self, name, track=None, **args):
+        return _NULL_SPAN
+
+    def instant(self, name, track=None, **args):
+        pass
+
+    def export(self, path):
+        return None
+
+
+_tracer = None
+_tracer_lock = threading.Lock()
+
+
+def get_tracer():
+    """取得共用 tracer（依環境變數 U3_TRACE 決定是否啟用，預設不啟用）"""
+    global _tracer
+    with _tracer_lock:
+        if _tracer is None:
+            _tracer = Tracer() if os.environ.get("U3_TRACE", "0") not in ("", "0") else NullTracer()
+        return _tracer
+
+
+def set_tracer(tracer):
+    """替換共用 tracer，回傳原本的 tracer"""
+    global _tracer
+    with _tracer_lock:
+        previous, _tracer = _tracer, tracer
+        return previous
@@ -1,23 +1,64 @@
 # =============================================
 # 🔄 輪盤控制模組 - turntable_controller.py
-# 功能：簡單的輪盤角度控制，直接發送相對角度指令
+# 功能：輪盤角度控制，追蹤絕對位置並換算最短相對移動（受線材纏繞限制）
+#       串口讀取共用 serial_line_engine（與 HC-12 可同時等待）
 # =============================================
 
-import serial
-import time
-import asyncio
+from serial_line_engine import open_line_engine, contains
+from trace_util import get_tracer
 
 class TurntableController:
-    def __init__(self, port, log_func=print):
+    def __init__(self, port, log_func=print, wrap_limit=180, deg_per_sec=18):
         self.port = port
         self.log = log_func
-        self.ser = None
+        self.engine = None
+        self.position = 0              # 目前絕對角度（連線時視為 0°）
+        self.wrap_limit = wrap_limit   # 絕對角度限制在 ±wrap_limit 內，避免線材纏繞
+        self.deg_per_sec = deg_per_sec # 旋轉速度（3 RPM = 18°/秒），用於估算時間
+
+    def plan_move(self, target, start=None):
+        """
+        計算從 start（預設為目前位置）轉到絕對角度 target 的最短相對移動
+        同一方向角度（target ± 360°）中，選擇落在 ±wrap_limit 內且移動量最小者
+        回傳 (相對角度, 轉完後的絕對角度)
+        """
+        start = self.position if start is None else start
+        candidates = [target + 360 * k for k in range(-2, 3)]
+        allowed = [c for c in candidates if -self.wrap_limit <= c <= self.wrap_limit]
+        if not allowed:
+            raise ValueError(f"角度 {target}° 超出線材限制 ±{self.wrap_limit}°")
+        end = min(allowed, key=lambda c: abs(c - start))
+        return end - start, end
+
+    def plan_moves(self, targets, start=None):
+        """
+        將一串絕對角度換算為相對移動列表
+        回傳 [(目標角度, 相對角度, 轉完後的絕對角度), ...]
+        """
+        position = self.position if start is None else start
+        moves = []
+        for target in targets:
+            relative, position = self.plan_move(target, start=position)
+            moves.append((target, relative, position))
+        return moves
+
+    def estimate_rotation_sec(self, relative):
+        """估算旋轉所需秒數"""
+        return abs(relative) / self.deg_per_sec
+
+    async def rotate_to_position(self, target):
+        """旋轉到絕對角度（自動換算最短相對移動）"""
+        relative, end = self.plan_move(target)
+        if relative == 0:
+            self.log(f"[Turntable] ✅ 已在 {target}°，不需旋轉")
+            return True
+        self.log(f"[Turntable] 🎯 {self.position}° → {end}° (預估 {self.estimate_rotation_sec(relative):.1f} 秒)")
+        return await self.rotate_to_angle(relative)
         
     def connect(self):
         """連接輪盤"""
         try:
-            self.ser = serial.Serial(self.port, baudrate=9600, timeout=1)
-            time.sleep(2)
+            self.engine = open_line_engine(self.port, baudrate=9600, timeout=1, init_delay=2, log_func=self.log)
             self.log(f"[Turntable] ✅ 輪盤已連接 ({self.port})")
             return True
         except Exception as e:
@@ -26,24 +67,22 @@ class TurntableController:
     
     async def rotate_to_angle(self, angle):
         """旋轉指定角度（相對移動）"""
-        if not self.ser or not self.ser.is_open:
+        if not self.engine or not self.engine.is_open:
             self.log(f"[Turntable] ❌ 輪盤未連接")
             return False
             
         try:
             command = f"ROTATE_DEGREE:{angle}\n"
-            self.ser.write(command.encode())
-            self.log(f"[Turntable] 🔄 旋轉 {angle:+}°")
-            
-            # 等待旋轉完成
-            start_time = time.time()
-            while time.time() - start_time < 45:
-                if self.ser.in_waiting > 0:
-                    response = self.ser.readline().decode().strip()
-                    if response and "旋轉完成" in response:
-                        self.log(f"[Turntable] ✅ 旋轉完成")
-                        return True
-                await asyncio.sleep(0.1)
+            with get_tracer().span("rotate", track="turntable", degrees=angle, start=self.position):
+                sent_time = self.engine.write(command)
+                self.log(f"[Turntable] 🔄 旋轉 {angle:+}°")
+
+                # 等待旋轉完成
+                response = await self.engine.wait_for(contains("旋轉完成"), timeout=45, since=sent_time)
+            if response is not None:
+                self.position += angle
+                self.log(f"[Turntable] ✅ 旋轉完成 (目前 {self.position}°)")
+                return True
             
             self.log(f"[Turntable] ⏰ 旋轉超時")
             return False
@@ -54,6 +93,7 @@ class TurntableController:
     
     def close(self):
         """關閉連接"""
-        if self.ser and self.ser.is_open:
-            self.ser.close()
+        if self.engine and self.engine.is_open:
+            self.engine.close()
+            self.engine = None
             self.log("[Turntable] 🔌 輪盤連接已關閉")
\ No newline at end of file
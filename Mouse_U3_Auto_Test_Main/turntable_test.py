@@ -3,8 +3,8 @@
 # 功能：測試步進馬達旋轉功能，驗證通訊正常
 # =============================================
 
-import serial
 import time
+from serial_line_engine import open_line_engine, any_line
 
 port="COM5"
 
@@ -17,17 +17,17 @@ class SimpleTurntableTest:
     def __init__(self, port, baudrate=9600):
         self.port = port
         self.baudrate = baudrate
-        self.ser = None
+        self.engine = None
         
     def connect(self):
         """連接到輪盤 Arduino"""
         try:
-            self.ser = serial.Serial(self.port, self.baudrate, timeout=1)
-            time.sleep(2)  # 等待 Arduino 重置
+            open_time = time.time()
+            self.engine = open_line_engine(self.port, self.baudrate, timeout=1, init_delay=2)  # 等待 Arduino 重置
             print(f"✅ 已連接到輪盤系統 ({self.port})")
             
             # 讀取 Arduino 初始化訊息
-            initial_msg = self.ser.readline().decode().strip()
+            initial_msg = self.engine.wait_for_blocking(any_line, timeout=1, since=open_time)
             if initial_msg:
                 print(f"Arduino: {initial_msg}")
             return True
@@ -38,27 +38,24 @@ class SimpleTurntableTest:
     
     def rotate_test(self, angle):
         """測試旋轉到指定角度"""
-        if not self.ser or not self.ser.is_open:
+        if not self.engine or not self.engine.is_open:
             print("❌ 未連接")
             return False
             
         try:
             # 發送旋轉指令
             command = f"ROTATE_DEGREE:{angle}\n"
-            self.ser.write(command.encode())
+            sent_time = self.engine.write(command)
             print(f"📤 發送指令: ROTATE_DEGREE:{angle}")
             
-            # 等待回應
-            start_time = time.time()
-            while time.time() - start_time < 30:  # 30秒超時
-                if self.ser.in_waiting > 0:
-                    response = self.ser.readline().decode().strip()
-                    if response:
-                        print(f"📥 Arduino: {response}")
-                        if "旋轉完成" in response:
-                            print(f"✅ 旋轉到 {angle}° 完成")
-                            return True
-                time.sleep(0.1)
+            # 等待回應（每一行都印出，直到出現「旋轉完成」）
+            def match(response):
+                print(f"📥 Arduino: {response}")
+                return "旋轉完成" in response
+
+            if self.engine.wait_for_blocking(match, timeout=30, since=sent_time) is not None:  # 30秒超時
+                print(f"✅ 旋轉到 {angle}° 完成")
+                return True
             
             print("⏰ 等待回應超時")
             return False
@@ -69,8 +66,9 @@ class SimpleTurntableTest:
     
     def close(self):
         """關閉連接"""
-        if self.ser and self.ser.is_open:
-            self.ser.close()
+        if self.engine and self.engine.is_open:
+            self.engine.close()
+            self.engine = None
             print("🔌 連接已關閉")
 
 def main():
@@ -0,0 +1,27 @@
+@echo off
+:: ► 切換到本 .bat 所在資料夾
+cd /d "%~dp0"
+
+:: ► 進入 Main 資料夾
+cd Mouse_U3_Auto_Test_Main
+
+:: ► 從上次中斷的站點繼續（略過已完成站點並還原輪盤位置）
+::   U3_Mouse_Auto_Test_Resume.bat rounds     續跑多趟模式
+::   U3_Mouse_Auto_Test_Resume.bat turntable  續跑輪盤模式
+::   未指定時：只有多趟模式的檢查點（..\LOG\Mouse_Test_checkpoint.json）時續跑多趟，否則續跑輪盤
+set MODE=%~1
+if "%MODE%"=="" (
+    set MODE=turntable
+    if exist "..\LOG\Mouse_Test_checkpoint.json" if not exist "..\LOG\Mouse_Test_Turntable_checkpoint.json" set MODE=rounds
+)
+
+if /i "%MODE%"=="rounds" (
+    python U3_Mouse_Auto_Test_Main.py --resume
+) else if /i "%MODE%"=="turntable" (
+    python U3_Mouse_Auto_Test_Main_Turntable.py --resume
+) else (
+    echo Unknown mode: %MODE% (use rounds or turntable)
+)
+
+:: ► 執行完後暫停，避免視窗瞬間關閉
+pause